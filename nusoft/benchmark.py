@@ -0,0 +1,244 @@
+#!/usr/bin/env python
+#
+# Benchmark
+#
+# Measures the wall time and peak memory of the nusoft commands, against the real packages and
+# against generated repositories of many package versions. Run as,
+#
+#     python -m nusoft.benchmark --output benchmark.json
+#
+# Author agent - 2026-10-18 <agent@local> : New file.
+####################################################################################################
+from __future__ import absolute_import # Otherwise nusoft.nusoft is found relative to this module
+import os
+import sys
+import time
+import json
+import shutil
+import resource
+import tempfile
+import platform
+import argparse
+import datetime
+import subprocess
+import StringIO
+import logging
+
+COMMANDS = ["list", "search", "query", "plan"]
+
+MODULE_TEMPLATE = """import nusoft.package.local as local_package
+import os
+
+class Synthetic(local_package.LocalPackage):
+    \"\"\" A generated package.\"\"\"
+    def __init__(self, system, repository):
+        super(Synthetic, self).__init__(self._version, system, repository)
+    def get_dependencies(self):
+        return ["make", "g++", "x11"] + self._requires
+    def _is_installed(self):
+        return self._system.exists(os.path.join(self.get_install_path(), "bin"))
+
+versions = [%s]
+"""
+
+class Timer(object):
+    """ Accumulates the time spent in wrapped functions.
+
+    :param _totals: seconds spent keyed by phase name
+    :param _active: phases currently being timed, to avoid counting nested calls twice
+    """
+    def __init__(self):
+        """ Initialise with no time spent."""
+        self._totals = {}
+        self._active = set()
+    def wrap(self, phase, owner, name):
+        """ Replace the function *name* of *owner* with one that adds its time to *phase*.
+
+        :param phase: name of the phase
+        :param owner: class or module owning the function
+        :param name: name of the function
+        """
+        function = getattr(owner, name)
+        def timed(*args, **kwargs):
+            if phase in self._active: # Nested call, already timed
+                return function(*args, **kwargs)
+            self._active.add(phase)
+            start = time.time()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self._active.discard(phase)
+                self.add(phase, time.time() - start)
+        setattr(owner, name, timed)
+    def add(self, phase, seconds):
+        """ Add *seconds* to the *phase*.
+
+        :param phase: name of the phase
+        :param seconds: time to add
+        """
+        self._totals[phase] = self._totals.get(phase, 0.0) + seconds
+    def get_totals(self):
+        """ Return the time spent in each phase.
+
+        :return: seconds keyed by phase name
+        :rtype: dictionary
+        """
+        return dict(self._totals)
+
+def generate_repositories(path, versions):
+    """ Generate a repository of *versions* packages at *path*, alongside the real nusoft
+    repository for the command and library packages they depend on. Each package depends on an
+    earlier version, so dependency trees are log(versions) deep.
+
+    :param path: path to create the repositories in
+    :param versions: number of versions to generate
+    :return: name of the last generated package
+    """
+    real_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../packages/nusoft")
+    shutil.copytree(real_path, os.path.join(path, "nusoft"), ignore=shutil.ignore_patterns("*.pyc"))
+    os.makedirs(os.path.join(path, "synthetic"))
+    per_module = 10
+    for module in range(0, (versions + per_module - 1) / per_module):
+        classes = []
+        for version in range(module * per_module, min(versions, (module + 1) * per_module)):
+            requires = [] if version == 0 else ["synthetic-%i" % (version / 2)]
+            classes.append("type('Synthetic%i', (Synthetic, object), {'_version' : 'synthetic-%i', "
+                           "'_requires' : %r})" % (version, version, requires))
+        with open(os.path.join(path, "synthetic", "synthetic%i.py" % module), "w") as module_file:
+            module_file.write(MODULE_TEMPLATE % ",\n            ".join(classes))
+    return "synthetic-%i" % (versions - 1)
+
+def measure(command, argument, install_path, repositories_path):
+    """ Measure a single *command* with *argument*, this should run in a fresh interpreter.
+
+    :param command: name of the nusoft command
+    :param argument: argument for the command
+    :param install_path: path to install to
+    :param repositories_path: path of the package repositories
+    :return: wall time, peak memory and time spent in each phase
+    :rtype: dictionary
+    """
+    # Log as the nusoft command does, logging is part of the cost
+    logging.basicConfig(filename=os.path.join(install_path, "benchmark.log"), level=logging.DEBUG)
+    timer = Timer()
+    start = time.time()
+    import nusoft.nusoft
+    import nusoft.package_loader
+    import nusoft.package_manager
+    import nusoft.package.package
+    timer.add("import", time.time() - start)
+    timer.wrap("module loading", nusoft.package_loader.PackageLoader, "_import")
+    timer.wrap("instantiation", nusoft.package_loader.PackageLoader, "_create")
+    timer.wrap("probing", nusoft.package_manager.PackageManager, "check_states")
+    timer.wrap("probing", nusoft.package.package.Package, "is_installed")
+    command_start = time.time()
+    installer = nusoft.nusoft.Nusoft(install_path, repositories_path=repositories_path)
+    stdout = sys.stdout
+    sys.stdout = StringIO.StringIO() # The command output is not wanted
+    try:
+        if argument is None:
+            getattr(installer, command)()
+        else:
+            getattr(installer, command)(argument)
+    finally:
+        sys.stdout = stdout
+    timer.add("command", time.time() - command_start)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if platform.system() == "Darwin": # Bytes on mac, kilobytes elsewhere
+        peak /= 1024
+    return {"wall" : time.time() - start, "peak_memory_kb" : peak, "phases" : timer.get_totals()}
+
+def run_scenario(name, repositories_path, target, repeats):
+    """ Run each command *repeats* times against the *repositories_path*, each in a new
+    interpreter. The first run of each command uses a fresh install path (cold caches).
+
+    :param name: name of the scenario
+    :param repositories_path: path of the package repositories
+    :param target: package to search for, query and plan
+    :param repeats: number of warm runs
+    :return: list of results
+    """
+    results = []
+    for command in COMMANDS:
+        argument = None if command == "list" else target
+        if command == "search":
+            argument = target.split("-")[0]
+        install_path = tempfile.mkdtemp(prefix="nusoft_benchmark")
+        try:
+            for run in range(0, repeats + 1):
+                process = subprocess.Popen([sys.executable, "-m", "nusoft.benchmark", "--measure",
+                                            command, "--argument", json.dumps(argument),
+                                            "--install-path", install_path,
+                                            "--repositories", repositories_path],
+                                           stdout=subprocess.PIPE, cwd=install_path,
+                                           env=dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path)))
+                output = process.communicate()[0]
+                if process.returncode != 0:
+                    raise Exception("Benchmark of %s %s failed" % (name, command))
+                result = json.loads(output.splitlines()[-1])
+                result.update({"scenario" : name, "command" : command, "cold" : run == 0})
+                print ("%s %s %s: %.3fs %ikB" % (name, command, "cold" if run == 0 else "warm",
+                                                 result["wall"], result["peak_memory_kb"]))
+                results.append(result)
+        finally:
+            shutil.rmtree(install_path)
+    return results
+
+def summarise(results):
+    """ Return the minimum warm and the cold wall time of each scenario and command.
+
+    :param results: list of results
+    :return: dictionary keyed by scenario and command
+    """
+    summary = {}
+    for result in results:
+        entry = summary.setdefault("%s %s" % (result["scenario"], result["command"]), {})
+        if result["cold"]:
+            entry["cold_wall"] = result["wall"]
+        else:
+            entry["warm_wall"] = min(entry.get("warm_wall", result["wall"]), result["wall"])
+        entry["peak_memory_kb"] = max(entry.get("peak_memory_kb", 0), result["peak_memory_kb"])
+    return summary
+
+def main():
+    """ Run the benchmarks and write the results to a json file."""
+    parser = argparse.ArgumentParser(prog='nusoft.benchmark',
+                                     description='Benchmark the nusoft commands')
+    parser.add_argument('--output', default='benchmark.json', help='Json file to write results to')
+    parser.add_argument('--sizes', default='100,1000,10000',
+                        help='Comma separated numbers of generated package versions')
+    parser.add_argument('--repeats', type=int, default=3, help='Number of warm runs per command')
+    parser.add_argument('--target', default='rat-5.0.0', help='Real package to query and plan')
+    parser.add_argument('--measure', help=argparse.SUPPRESS)
+    parser.add_argument('--argument', help=argparse.SUPPRESS)
+    parser.add_argument('--install-path', help=argparse.SUPPRESS)
+    parser.add_argument('--repositories', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.measure is not None: # Single measurement in this interpreter
+        print json.dumps(measure(args.measure, json.loads(args.argument), args.install_path,
+                                 args.repositories))
+        return
+    results = run_scenario("packages", os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                    "../packages"), args.target, args.repeats)
+    for size in [int(size) for size in args.sizes.split(",") if size != ""]:
+        repositories_path = tempfile.mkdtemp(prefix="nusoft_repositories")
+        try:
+            target = generate_repositories(repositories_path, size)
+            results.extend(run_scenario("synthetic-%i" % size, repositories_path, target,
+                                        args.repeats))
+        finally:
+            shutil.rmtree(repositories_path)
+    try:
+        commit = subprocess.Popen(["git", "rev-parse", "HEAD"], stdout=subprocess.PIPE,
+                                  cwd=os.path.dirname(os.path.abspath(__file__))).communicate()[0]
+    except OSError:
+        commit = ""
+    with open(args.output, "w") as output_file:
+        json.dump({"commit" : commit.strip(), "date" : datetime.datetime.now().isoformat(),
+                   "python" : platform.python_version(), "platform" : platform.platform(),
+                   "summary" : summarise(results), "results" : results}, output_file, indent=1,
+                  sort_keys=True)
+    print "Results written to %s" % args.output
+
+if __name__ == '__main__':
+    main()
@@ -7,6 +7,7 @@
 # Author P G Jones - 2014-03-23 <p.g.jones@qmul.ac.uk> : New file.
 ####################################################################################################
 import getpass
+import threading
 import logging
 logger = logging.getLogger(__name__)
 
@@ -16,6 +17,7 @@ class Credentials(object):
     :param _username: Download username
     :param _password: Download password to go with a username
     :param _token: Instead of username and password use token.
+    :param _lock: lock so that only one download asks for the username and password
     """
     def __init__(self, token=None):
         """ Initialise the credentials.
@@ -25,6 +27,7 @@ class Credentials(object):
         self._token = token
         self._username = None
         self._password = None
+        self._lock = threading.Lock()
         if token is not None:
             logger.debug("Using a token")
     def authenticate(self):
@@ -34,11 +37,10 @@ class Credentials(object):
         """
         if self._token is not None:
             return self._token
-        elif self._username is not None:
-            return (self._username, self._password)
-        else:
-            self._username = raw_input("Username:").replace('\n', '')
-            self._password = getpass.getpass("Password:").replace('\n', '')
+        with self._lock:
+            if self._username is None:
+                self._username = raw_input("Username:").replace('\n', '')
+                self._password = getpass.getpass("Password:").replace('\n', '')
             return (self._username, self._password)
     def reset(self):
         """ Reset the known username and password."""
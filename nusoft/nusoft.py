@@ -10,7 +10,7 @@ import system.standard
 import system.mac
 import package_manager
 import package_loader
-import re
+import search
 import logging
 import os
 logger = logging.getLogger(__name__)
@@ -30,43 +30,48 @@ class Nusoft(object):
     :param _package_manager: The package manger 
     :param _package_loader: The package loader.
     """
-    def __init__(self, install_path):
+    def __init__(self, install_path, **kwargs):
         """ Initialise the nusoft installer with an installation path
 
         :param install_path: path to install everything to
         :type install_path: string
+        :param kwargs: optional system settings e.g. jobs, see :class:`system.system.System`
         """
         if os.uname()[0] == "Darwin":
             logger.info("Using Mac system")
-            self._system = system.mac.Mac(install_path)
+            self._system = system.mac.Mac(install_path, **kwargs)
         else:
             logger.info("Using Standard system")
-            self._system = system.standard.Standard(install_path)
-        self._package_manager = package_manager.PackageManager()
+            self._system = system.standard.Standard(install_path, **kwargs)
+        self._package_manager = package_manager.PackageManager(lazy=True, 
+                                                               jobs=self._system.get_jobs(),
+                                                               downloads=self._system.get_downloads(),
+                                                               jobserver=self._system.get_jobserver())
         self._package_loader = package_loader.PackageLoader(self._system, self._package_manager)
     def list(self):
         """ The list command."""
         self._package_loader.load()
+        self._package_manager.check_states()
         logger.info("Listing all packages.")
         for package in sorted(self._package_manager.packages()):
             if package[1].is_installed():
                 print OKBLUE + ("%s from %s is installed" % (package[0], package[1].get_repository())) + END
             else:
                 print ("%s from %s is known" % (package[0], package[1].get_repository()))
-    def search(self, name):
-        """ The search command, searches for packages that match *name*
+    def search(self, query):
+        """ The search command, searches for packages that match the *query*
 
-        *name* can be a regular expression
+        The *query* is space separated terms that must all match the package name, most relevant
+        matches are listed first. Terms can be a prefix, part of or a misspelling of the name, or
+        repo:name and depends:name filters.
 
-        :param name: name of package to find
-        :type name: string
+        :param query: query to find packages with
+        :type query: string
         """
-        logger.info("Searching for %s" % name)
-        self._package_loader.load()
-        re_name = re.compile(name)
-        for package in self._package_manager.packages():
-            if re_name.match(package[0]):
-                print package[0]
+        logger.info("Searching for %s" % query)
+        index = self._package_loader.load_index()
+        for package_name in search.SearchEngine(index.packages()).search(query):
+            print package_name
     def install(self, package_name):
         """ This installs the package *package_name*
 
@@ -74,14 +79,33 @@ class Nusoft(object):
         :type package_name: string
         """
         logger.info("Installing %s" % package_name)
-        self._package_loader.load()
         print HEADER + ("Installing %s" % package_name) + END
         try:
+            self._package_loader.load_packages([package_name])
             self._package_manager.install_package(package_name)
             print OKBLUE + ("%s installed" % package_name) + END
         except Exception, error:
             print FAIL + "Installation failed" + END
             print error
+    def plan(self, package_name):
+        """ This prints the packages that installing *package_name* would install, in order
+
+        :param package_name: name of package to plan the installation of
+        :type package_name: string
+        """
+        logger.info("Planning %s" % package_name)
+        try:
+            self._package_loader.load_packages([package_name])
+            plan = self._package_manager.install_plan(package_name)
+            if len(plan) == 0:
+                print OKBLUE + ("%s is installed" % package_name) + END
+                return
+            print HEADER + ("Installing %s would install" % package_name) + END
+            for package in plan:
+                print ("%s from %s" % (package.get_name(), package.get_repository()))
+        except Exception, error:
+            print FAIL + "Cannot plan package " + package_name + END
+            print error
     def update(self, package_name):
         """ This updates the package *package_name*
 
@@ -119,8 +143,9 @@ class Nusoft(object):
         :type package_name: string
         """
         logger.info("Querying %s" % package_name)
-        self._package_loader.load()
         try:
+            self._package_loader.load_packages([package_name])
+            self._package_manager.check_states(self._package_manager.dependency_closure(package_name))
             package = self._package_manager.get_package(package_name)
             if package.is_installed():
                 print OKBLUE + ("%s from %s is installed" % (package.get_name(), package.get_repository())) + END
@@ -7,7 +7,6 @@
 # Author P G Jones - 2014-02-23 <p.g.jones@qmul.ac.uk> : First revision
 ####################################################################################################
 import package
-import os
 import logging
 logger = logging.getLogger(__name__)
 
@@ -31,9 +30,9 @@ class CommandPackage(package.Package):
         super(CommandPackage, self).__init__(name, system, repository)
         self._command = command
     def check_state(self):
-        """ Try to find the location of the command."""
-        result = self._system.execute("which", [self._command])
-        logger.debug("Command which gives location at %r" % result[1])
-        if result[1] is not None and result[1] != "" and result[1] != "\n":
-            self._install_path = os.path.abspath(result[1])
+        """ Try to find the location of the command, the location is cached by the system."""
+        location = self._cached_probe(lambda: self._system.which(self._command), [self._command])
+        logger.debug("Command %s location is %r" % (self._command, location))
+        if location is not None:
+            self._install_path = location
             self._installed = True
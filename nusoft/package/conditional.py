@@ -34,6 +34,7 @@ class ConditionalPackage(package.Package):
         :param config: config command
         """
         super(ConditionalPackage, self).__init__(name, system, repository)
+        self._install_path = os.path.join(system.get_install_path(), self._name)
         self._updated = False
         self._libraries = []
         self._headers = []
@@ -50,18 +51,13 @@ class ConditionalPackage(package.Package):
 
         If checking on the system try to find the location of the config command first (if 
         specified) and use it to find the library and headers. If not just try compiling against 
-        the library with the headers.."""
+        the library with the headers. The system result is cached by the system."""
         # First see if installed on the system
-        if self._config is not None:
-            result = self._system.execute("which", [self._config])
-            logger.debug("Command which gives config location at %r" % result[1])
-            if result[1] is not None and result[1] != "" and result[1] == "\n":
-                output = self._system.execute(self._config, ['--libs'])
-                self._libraries = output[1].strip('\n').split()
-                output = self._system.execute(self._config, ['--cflags'])
-                self._flags = output[1].strip('\n').split()
-
-        if self._system.compilation_test(self._headers, self._libraries + self._flags):
+        commands, data = self._probe_dependencies()
+        state = self._cached_probe(self._probe_system, commands, data)
+        self._libraries = state["libraries"]
+        self._flags = state["flags"]
+        if state["installed"]:
             self._installed = True
             
         # Not on system so set a local install path
@@ -73,6 +69,35 @@ class ConditionalPackage(package.Package):
             else:
                 self._installed = False
                 self._updated = False
+    def prepare_state(self):
+        """ Queue the compilation test with the system, unless a config command is needed first
+        or the result is cached."""
+        commands, data = self._probe_dependencies()
+        if self._config is None and not self._is_probe_cached(commands, data):
+            self._system.queue_compilation_test(self._headers, self._libraries + self._flags)
+    def _probe_dependencies(self):
+        """ Return the commands and data the system probe result depends on.
+
+        :return: tuple of list of commands and data
+        """
+        if self._config is not None:
+            return (["g++", self._config], [self._headers, self._config])
+        return (["g++"], [self._headers, self._libraries, self._flags])
+    def _probe_system(self):
+        """ Probe the system for the library, using the config command if specified.
+
+        :return: dictionary of the installed state, libraries and flags
+        """
+        state = {"installed" : False, "libraries" : self._libraries, "flags" : self._flags}
+        if self._config is not None:
+            if self._system.which(self._config) is not None:
+                output = self._system.execute(self._config, ['--libs'])
+                state["libraries"] = output[1].strip('\n').split()
+                output = self._system.execute(self._config, ['--cflags'])
+                state["flags"] = output[1].strip('\n').split()
+        state["installed"] = self._system.compilation_test(self._headers, 
+                                                           state["libraries"] + state["flags"])
+        return state
     def install(self):
         """ Function to install the package.
 
@@ -80,7 +105,7 @@ class ConditionalPackage(package.Package):
         """
         logger.info("Installing %s to %s" % (self._name, self._install_path))
         if not self._installed:
-            self._download()
+            self.download()
             self._install()
             self.check_state()
     def update(self):
@@ -7,7 +7,6 @@
 # Author P G Jones - 2014-02-23 <p.g.jones@qmul.ac.uk> : First revision
 ####################################################################################################
 import package
-import os
 import logging
 logger = logging.getLogger(__name__)
 
@@ -47,17 +46,39 @@ class LibraryPackage(package.Package):
     def check_state(self):
         """ Try to find the location of the config command first (if specified) and use it
         to find the library and headers. If not just try compiling against the library with
-        the headers.."""
+        the headers. The result is cached by the system."""
+        commands, data = self._probe_dependencies()
+        state = self._cached_probe(self._probe_system, commands, data)
+        self._libraries = state["libraries"]
+        self._flags = state["flags"]
+        self._installed = state["installed"]
+    def prepare_state(self):
+        """ Queue the compilation test with the system, unless a config command is needed first
+        or the result is cached."""
+        commands, data = self._probe_dependencies()
+        if self._config is None and not self._is_probe_cached(commands, data):
+            self._system.queue_compilation_test(self._headers, self._libraries + self._flags)
+    def _probe_dependencies(self):
+        """ Return the commands and data the system probe result depends on.
+
+        :return: tuple of list of commands and data
+        """
         if self._config is not None:
-            result = self._system.execute("which", [self._config])
-            logger.debug("Command which gives config location at %r" % result[1])
-            if result[1] is None or result[1] == "" or result[1] == "\n":
-                return # Is not installed.
+            return (["g++", self._config], [self._headers, self._config])
+        return (["g++"], [self._headers, self._libraries, self._flags])
+    def _probe_system(self):
+        """ Probe the system for the library, using the config command if specified.
+
+        :return: dictionary of the installed state, libraries and flags
+        """
+        state = {"installed" : False, "libraries" : self._libraries, "flags" : self._flags}
+        if self._config is not None:
+            if self._system.which(self._config) is None:
+                return state # Is not installed.
             output = self._system.execute(self._config, ['--libs'])
-            self._libraries = output[1].strip('\n').split()
+            state["libraries"] = output[1].strip('\n').split()
             output = self._system.execute(self._config, ['--cflags'])
-            self._flags = output[1].strip('\n').split()
-
-        if self._system.compilation_test(self._headers, self._libraries + self._flags):
-            self._installed = True
-        
+            state["flags"] = output[1].strip('\n').split()
+        state["installed"] = self._system.compilation_test(self._headers, 
+                                                           state["libraries"] + state["flags"])
+        return state
@@ -41,7 +41,7 @@ class LocalPackage(package.Package):
         """
         logger.info("Installing %s to %s" % (self._name, self._install_path))
         if not self._installed:
-            self._download()
+            self.download()
             self._install()
             self.check_state()
     def update(self):
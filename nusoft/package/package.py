@@ -14,9 +14,17 @@ class Package(object):
     :param _system: the system used to install packages
     :param _install_path: the installation path of this package
     :param _installed: True when the state has been checked and the package is installed
+    :param _checked: True once the state has been checked, until then the state is unknown
+    :param _downloaded: True once the package has been downloaded in this session
     :param _dependencies: dict of name keyed dependency packages
     :param _repository: Local name of repository this package belongs to
+    :param _sha256: expected sha256 hex digest of the package download, None if not known. This is
+    a class attribute so that it can be set per version in the versions tables.
+    :param _max_jobs: most make jobs the package builds with, None for no limit, for builds that
+    break with parallel make. Also a class attribute, applied by :meth:`_make`.
     """
+    _sha256 = None
+    _max_jobs = None
     def __init__(self, name, system, repository):
         """ Construct the package with a *name* and the *system* installation information.
         
@@ -30,6 +38,8 @@ class Package(object):
         self._repository = repository
         self._install_path = None
         self._installed = False
+        self._checked = False
+        self._downloaded = False
         self._dependencies = {}
     def get_name(self):
         """ Return the package name.
@@ -43,12 +53,52 @@ class Package(object):
         :return: local name of the repository this package is part of
         """
         return self._repository
+    def is_checked(self):
+        """ Return if the package state has been checked.
+
+        :return: True if checked
+        :rtype: bool
+        """
+        return self._checked
+    def download(self):
+        """ Download the package ready to install, packages are downloaded at most once. This is 
+        safe to call before the dependencies are installed, e.g. to download whilst others build.
+        """
+        if not self._downloaded:
+            self._download()
+            self._downloaded = True
     def set_dependencies(self, dependencies):
         """ Set the dependencies for this package.
 
         :param dependencies: dict of name keyed dependency packages
         """
         self._dependencies = dependencies
+    def _cached_probe(self, probe, commands=None, data=None):
+        """ Return the result of the system *probe* for this package, cached by the system.
+
+        :param probe: function to call to get the result, the result must be json serialisable
+        :param commands: optional list of commands the result depends on
+        :param data: optional json serialisable data the result depends on
+        :return: the probe result
+        """
+        return self._system.cached_probe("%s/%s" % (self._repository, self._name), probe, commands,
+                                         data)
+    def _is_probe_cached(self, commands=None, data=None):
+        """ Check if the result of the system probe for this package is cached.
+
+        :param commands: optional list of commands the result depends on
+        :param data: optional json serialisable data the result depends on
+        :return: True if cached
+        """
+        return self._system.is_probe_cached("%s/%s" % (self._repository, self._name), commands, 
+                                            data)
+    def _make(self, command='make', args=None, cwd=None, env=None):
+        """ Run a make for this package with at most the package's make jobs, see 
+        :meth:`nusoft.system.System.make` for the arguments.
+
+        :return: standard output from command
+        """
+        return self._system.make(command, args, cwd, env, max_jobs=self._max_jobs)
 ####################################################################################################
     # Functions to override by subclasses
     def get_dependencies(self):
@@ -61,9 +111,15 @@ class Package(object):
     def is_installed(self):
         """ Check and return if package is installed.
 
+        The state is checked on the first call only, the result is then remembered (packages
+        update their state themselves after installing, updating or removing).
+
         :retruns: True if installed, False if not
         :rtype: bool
         """
+        if not self._checked:
+            self.check_state()
+            self._checked = True
         return self._installed
     def get_install_path(self):
         """ Return a the package installation path.
@@ -72,9 +128,16 @@ class Package(object):
         :rtype: string
         """
         return self._install_path
+    def prepare_state(self):
+        """ Function called before a batch of state checks, packages can queue work with the
+        system to be done together."""
+        pass
     def check_state(self):
         """ Function to force the package to check what it's status is."""
         pass
+    def _download(self):
+        """ Function to download the package, nothing to download unless implemented."""
+        pass
     def install(self):
         """ Function to install the package, raises exception unless implemented."""
         raise Exception("%s from %s cannot be installed by nusoft" % (self._name, self._repository))
@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+#
+# PackageIndex
+#
+# Index of the packages in the repositories, saved to disk to avoid importing every package module.
+#
+# Author agent - 2026-10-18 <agent@local> : New file.
+####################################################################################################
+import os
+import json
+import types
+import hashlib
+import logging
+logger = logging.getLogger(__name__)
+
+class PackageIndex(object):
+    """ Index of the packages in each repository module. Each module entry holds the modification
+    time and hash of the module file, and the name, class name and dependencies of each package
+    the module provides.
+
+    :param _file_path: path to the index file
+    :param _modules: dictionary of module entries keyed by module file path
+    :param _packages: dictionary of package entries keyed by package name
+    :param _changed: True if the index has changed since it was loaded
+    """
+    def __init__(self, file_path):
+        """ Initialise the index from the file at *file_path*.
+
+        :param file_path: path to the index file
+        :type file_path: string
+        """
+        self._file_path = file_path
+        self._modules = {}
+        self._packages = {}
+        self._changed = False
+        if os.path.exists(file_path):
+            try:
+                with open(file_path, "r") as index_file:
+                    self._modules = json.load(index_file)
+            except (IOError, ValueError):
+                logger.warning("Package index %s is unreadable, rebuilding it" % file_path)
+    def is_current(self, module_path):
+        """ Check if the entry for the module at *module_path* is current.
+
+        The modification time is checked first, if it has changed the hash is compared.
+
+        :param module_path: path to the module file
+        :return: True if the module entry is current
+        """
+        entry = self._modules.get(module_path)
+        if entry is None:
+            return False
+        mtime = os.path.getmtime(module_path)
+        if entry["mtime"] == mtime:
+            return True
+        if entry["sha1"] == self._hash(module_path):
+            entry["mtime"] = mtime # Contents unchanged
+            self._changed = True
+            return True
+        return False
+    def set_module(self, module_path, repository, packages):
+        """ Set the entry for the module at *module_path* in the *repository*.
+
+        :param module_path: path to the module file
+        :param repository: local name of the repository the module is in
+        :param packages: list of the package instances the module provides
+        :type packages: list of :class:`nusoft.package.package.Package` instances
+        """
+        self._modules[module_path] = {"mtime" : os.path.getmtime(module_path),
+                                      "sha1" : self._hash(module_path),
+                                      "repository" : repository,
+                                      "packages" : [{"name" : package.get_name(),
+                                                     "class" : package.__class__.__name__,
+                                                     "dependencies" : package.get_dependencies()}
+                                                    for package in packages]}
+        self._changed = True
+    def set_modules(self, module_paths):
+        """ Set the known module paths, removing the entries for any other modules and building
+        the package name lookup in the order of *module_paths*.
+
+        :param module_paths: list of paths to all the module files
+        """
+        for module_path in self._modules.keys():
+            if module_path not in module_paths:
+                del self._modules[module_path]
+                self._changed = True
+        self._packages = {}
+        for module_path in module_paths:
+            entry = self._modules[module_path]
+            for package in entry["packages"]:
+                if package["name"] in self._packages:
+                    logger.warn("Package %s is indexed twice, using the one from %s" %
+                                (package["name"], entry["repository"]))
+                self._packages[package["name"]] = dict(package, module=module_path,
+                                                       repository=entry["repository"])
+    def save(self):
+        """ Save the index if it has changed, the file is replaced atomically."""
+        if not self._changed:
+            return
+        directory = os.path.dirname(self._file_path)
+        try:
+            if not os.path.exists(directory):
+                os.makedirs(directory)
+            temp_path = "%s.%i" % (self._file_path, os.getpid())
+            with open(temp_path, "w") as index_file:
+                json.dump(self._modules, index_file)
+            os.rename(temp_path, self._file_path)
+            self._changed = False
+        except (IOError, OSError):
+            logger.exception("Cannot save the package index to %s" % self._file_path, exc_info=True)
+    def packages(self):
+        """ Yields a package name, package entry tuple.
+
+        The entry is a dictionary with the name, repository, module, class and dependencies.
+
+        :return: tuple name and entry dictionary
+        """
+        for package_name in self._packages:
+            yield (package_name, self._packages[package_name])
+    def get_package(self, package_name):
+        """ Return the entry for the package with a name equal to *package_name*
+
+        :param package_name: name of the package
+        :return: the package entry
+        :rtype: dictionary
+        """
+        try:
+            return self._packages[package_name]
+        except KeyError:
+            logger.exception("Package %s does not exist" % package_name, exc_info=True)
+            raise
+    def dependency_closure(self, package_names):
+        """ Return the names of the packages in *package_names* and all their dependencies,
+        including every choice of optional dependencies.
+
+        :param package_names: list of package names
+        :return: set of package names
+        """
+        closure = set()
+        pending = list(package_names)
+        while len(pending) > 0:
+            package_name = pending.pop()
+            if package_name in closure:
+                continue
+            closure.add(package_name)
+            for dependency in self.get_package(package_name)["dependencies"]:
+                if isinstance(dependency, types.ListType): # Multiple optional dependencies
+                    pending.extend(dependency)
+                else:
+                    pending.append(dependency)
+        return closure
+    def _hash(self, module_path):
+        """ Return the hash of the module file at *module_path*.
+
+        :param module_path: path to the module file
+        :return: hex digest of the file contents
+        """
+        with open(module_path, "rb") as module_file:
+            return hashlib.sha1(module_file.read()).hexdigest()
@@ -8,6 +8,7 @@
 ####################################################################################################
 import os
 import imp
+import package_index
 import logging
 logger = logging.getLogger(__name__)
 
@@ -16,6 +17,10 @@ class PackageLoader(object):
 
     :param _system: The system
     :param _package_manager: The package manager to load packages into
+    :param _repositories: The repository locations keyed by repository name
+    :param _index: The index of the packages in the repositories
+    :param _modules: The imported modules keyed by module file path
+    :param _loaded: The names of the packages loaded into the package manager
     """
     def __init__(self, system, package_manager):
         """ Initialises the loader with the current *system* information and a *package manger*
@@ -32,12 +37,96 @@ class PackageLoader(object):
             if os.path.isdir(location):
                 logger.info("Found %s in system repositories" % dir)
                 self._repositories[dir] = location
+        self._index = package_index.PackageIndex(os.path.join(self._system.get_cache_path(),
+                                                              "package_index.json"))
+        self._modules = {}
+        self._loaded = set()
     def load(self):
         """ Load the packages from the repositories. """
-        for repository in self._repositories:
-            for module in os.listdir(self._repositories[repository]):
+        for repository, module_path in self._module_paths():
+            self._load_module(repository, module_path)
+        self._load_index()
+    def load_index(self):
+        """ Load the package index, only modules that have changed since the index was saved are
+        imported.
+
+        :return: the package index
+        :rtype: :class:`nusoft.package_index.PackageIndex` instance
+        """
+        for repository, module_path in self._module_paths():
+            if not self._index.is_current(module_path):
+                logger.info("Indexing %s" % module_path)
+                self._load_module(repository, module_path)
+        self._load_index()
+        return self._index
+    def load_packages(self, package_names):
+        """ Load the packages with names in *package_names* and all their dependencies, only the
+        modules providing these packages are imported.
+
+        :param package_names: list of package names
+        """
+        self.load_index()
+        for package_name in self._index.dependency_closure(package_names):
+            if package_name in self._loaded:
+                continue
+            entry = self._index.get_package(package_name)
+            module = self._import(entry["repository"], entry["module"])
+            for package in module.versions:
+                if package.__name__ == entry["class"]:
+                    self._register(self._create(package, entry["repository"]))
+    def _load_module(self, repository, module_path):
+        """ Load all the packages in the module at *module_path* and index them.
+
+        :param repository: local name of the repository the module is in
+        :param module_path: path to the module file
+        """
+        module = self._import(repository, module_path)
+        packages = [self._create(package, repository) for package in module.versions]
+        for package in packages:
+            if package.get_name() not in self._loaded:
+                self._register(package)
+        self._index.set_module(module_path, repository, packages)
+    def _load_index(self):
+        """ Update the index with the current modules and save it."""
+        self._index.set_modules([module_path for repository, module_path in self._module_paths()])
+        self._index.save()
+    def _create(self, package_class, repository):
+        """ Create an instance of the *package_class* from the *repository*.
+
+        :param package_class: the package class
+        :param repository: local name of the repository the package is from
+        :return: the package
+        :rtype: :class:`nusoft.package.package.Package` instance
+        """
+        return package_class(self._system, repository)
+    def _register(self, package):
+        """ Register the *package* in the package manager.
+
+        :param package: package to register
+        :type package: :class:`nusoft.package.package.Package` instance
+        """
+        self._package_manager.register_package(package)
+        self._loaded.add(package.get_name())
+        logger.debug("Loaded package %s" % package.get_name())
+    def _import(self, repository, module_path):
+        """ Import the module at *module_path*, modules are only imported once. The module name 
+        includes the *repository*, as modules in different repositories share file names.
+
+        :param repository: local name of the repository the module is in
+        :param module_path: path to the module file
+        :return: the module
+        """
+        if module_path not in self._modules:
+            module_name = "nusoft_%s_%s" % (repository, os.path.basename(module_path)[:-3])
+            self._modules[module_path] = imp.load_source(module_name, module_path)
+        return self._modules[module_path]
+    def _module_paths(self):
+        """ Yields a repository name, module path tuple for each module in the repositories, in
+        a fixed order.
+
+        :return: tuple repository name and module file path
+        """
+        for repository in sorted(self._repositories):
+            for module in sorted(os.listdir(self._repositories[repository])):
                 if module[-3:] == '.py':
-                    module = imp.load_source(module[:-3], os.path.join(self._repositories[repository],  module))
-                    for package in module.versions:
-                        self._package_manager.register_package(package(self._system, repository))
-                        logger.debug("Loaded package %s" % package.__name__)
+                    yield (repository, os.path.join(self._repositories[repository], module))
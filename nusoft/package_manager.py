@@ -7,6 +7,8 @@
 # Author P G Jones - 2014-02-08 <p.g.jones@qmul.ac.uk> : First revision
 ####################################################################################################
 import types
+import threading
+import multiprocessing.pool
 import logging
 logger = logging.getLogger(__name__)
 
@@ -15,10 +17,36 @@ class PackageManager(object):
 
     :param _packages: packages keyed by package name
     :type _packages: dictionary string and :class:`nusoft.package`
+    :param _lazy: True if package states are only checked when first needed
+    :param _jobs: The job budget, the number of package states to check or packages to install at
+    once
+    :param _downloads: The number of packages to download at once
+    :param _prefetches: pending prefetch downloads keyed by package name
+    :param _jobserver: make jobserver the installs share, or None
     """
-    def __init__(self):
-        """ Initialise"""
+    def __init__(self, lazy=False, jobs=1, downloads=1, jobserver=None):
+        """ Initialise, optionally in *lazy* mode.
+
+        In lazy mode packages are registered without checking their state, the state is instead
+        checked the first time a package is asked if it is installed.
+
+        :param lazy: True to delay package state checks until needed
+        :type lazy: bool
+        :param jobs: job budget, the number of package states to check or packages to install at 
+        once
+        :type jobs: int
+        :param downloads: number of packages to download at once when prefetching
+        :type downloads: int
+        :param jobserver: optional make jobserver, each package installing at once beyond the 
+        first holds a token so that their makes share the jobserver's jobs
+        :type jobserver: :class:`nusoft.system.jobserver.JobServer`
+        """
         self._packages = {} 
+        self._lazy = lazy
+        self._jobs = jobs
+        self._downloads = downloads
+        self._prefetches = {}
+        self._jobserver = jobserver
     def register_package(self, package):
         """ Register a *package* in this manager
 
@@ -28,8 +56,10 @@ class PackageManager(object):
         logger.debug("Registering %s package" % package.get_name())
         if package.get_name() in self._packages:
             logger.warn("Package %s already registered, replacing package from %s with package from %s." % 
-                        (package.get_name(), self._packages[package].get_name(), package.get_repository()))
-        package.check_state()
+                        (package.get_name(), self._packages[package.get_name()].get_repository(),
+                         package.get_repository()))
+        if not self._lazy:
+            package.is_installed() # Checks the state now
         self._packages[package.get_name()] = package
     def packages(self):
         """ Yields a package name, package instance tuple.
@@ -50,6 +80,50 @@ class PackageManager(object):
         except KeyError:
             logger.exception("Package %s does not exist" % package_name, exc_info=True)
             raise
+    def check_states(self, package_names=None):
+        """ Check the state of the packages with names in *package_names*, or all packages if 
+        None. The packages are prepared first so that system work can be batched, then the checks 
+        run in parallel.
+
+        :param package_names: optional list of package names
+        """
+        if package_names is None:
+            package_names = self._packages.keys()
+        packages = [self.get_package(package_name) for package_name in package_names]
+        for package in packages:
+            if not package.is_checked():
+                package.prepare_state()
+        if self._jobs <= 1 or len(packages) <= 1:
+            for package in packages:
+                package.is_installed()
+            return
+        logger.debug("Checking %i package states with %i jobs" % (len(packages), self._jobs))
+        pool = multiprocessing.pool.ThreadPool(min(self._jobs, len(packages)))
+        try:
+            pool.map(lambda package: package.is_installed(), packages)
+        finally:
+            pool.close()
+            pool.join()
+    def dependency_closure(self, package_name):
+        """ Return the names of the package with name *package_name* and all its dependencies, 
+        including every choice of optional dependencies.
+
+        :param package_name: name of the package
+        :return: set of package names
+        """
+        closure = set()
+        pending = [package_name]
+        while len(pending) > 0:
+            package_name = pending.pop()
+            if package_name in closure:
+                continue
+            closure.add(package_name)
+            for dependency in self.get_package(package_name).get_dependencies():
+                if isinstance(dependency, types.ListType): # Multiple optional dependencies
+                    pending.extend(dependency)
+                else:
+                    pending.append(dependency)
+        return closure
 ####################################################################################################
     # Functions that act on single packages
     def install_all(self):
@@ -78,16 +152,49 @@ class PackageManager(object):
         :param package_name: name of the package of which dependencies should be installed
         """
         package = self.get_package(package_name)
-        self._install_package_dependencies(package)
+        self.check_states(self.dependency_closure(package_name))
+        plan = self.install_plan(package_name)
+        if package in plan:
+            plan.remove(package)
+        pool = self._prefetch(plan)
+        installed = False
+        try:
+            self._install_plan(plan)
+            installed = True
+        finally:
+            self._end_prefetch(pool, cancel=not installed)
     def install_package(self, package_name):
-        """ Install the package with a name equal to *package_name*
+        """ Install the package with a name equal to *package_name*, and its dependencies. 
+        Packages are installed as soon as their dependencies are, independent packages at once 
+        within the job budget.
 
         :param package_name: name of the package to install
         :return: the installed package
         :rtype: :class:`nusoft.package.Package` instance
         """
         package = self.get_package(package_name)
-        return self._install_package(package)
+        self.check_states(self.dependency_closure(package_name))
+        plan = self.install_plan(package_name)
+        pool = self._prefetch(plan)
+        installed = False
+        try:
+            self._install_plan(plan)
+            installed = True
+        finally:
+            self._end_prefetch(pool, cancel=not installed)
+        return package
+    def install_plan(self, package_name):
+        """ Return the packages that installing the package with name equal to *package_name* 
+        would install, in installation order.
+
+        :param package_name: name of the package to plan
+        :return: list of packages to install
+        :rtype: list of :class:`nusoft.package.Package` instances
+        """
+        self.check_states(self.dependency_closure(package_name))
+        plan = []
+        self._plan_package(self.get_package(package_name), plan)
+        return plan
     def update_package(self, package_name):
         """ Update the package with a name equal to *package_name*
 
@@ -115,26 +222,180 @@ class PackageManager(object):
         :param package: package to install
         :types package: dictionary string key to :class:`nusoft.package.Package`
         """
-        installed_dependencies = {}
+        installed_dependencies = self._choose_dependencies(package)
+        for dependency_name, dependency in installed_dependencies.iteritems():
+            if not dependency.is_installed(): # Must install it
+                self._install_package(dependency)
+        return installed_dependencies
+    def _choose_dependencies(self, package):
+        """ Return the dependencies of the *package*, choosing the first installed optional 
+        dependency or if none are installed the first optional dependency.
+
+        :param package: package to choose the dependencies of
+        :type package: :class:`nusoft.package.Package` instance
+        :return: dependency packages keyed by name
+        :rtype: dictionary string key to :class:`nusoft.package.Package`
+        """
+        dependencies = {}
         for dependency_name in package.get_dependencies():
-            # First need to check if dependency is installed, if dependency is a list should check
-            # at least one is installed.
             if isinstance(dependency_name, types.ListType): # Multiple optional dependencies
                 for optional_dependency_name in dependency_name:
-                    optional_dependency = self.get_package(optional_dependency_name)
-                    if optional_dependency.is_installed(): # Great found one!
-                        installed_dependencies[optional_dependency_name] = optional_dependency
+                    if self.get_package(optional_dependency_name).is_installed(): # Found one
                         break
                 else: # No optional dependency is installed, thus install the first
-                    dependency = self.get_package(dependency_name[0])
-                    installed_dependencies[dependency_name[0]] = self._install_package(dependency)
+                    optional_dependency_name = dependency_name[0]
+                dependencies[optional_dependency_name] = self.get_package(optional_dependency_name)
             else: # Just a single dependency
-                dependency = self.get_package(dependency_name)
-                if dependency.is_installed():
-                    installed_dependencies[dependency_name] = dependency
-                else: # Must install it
-                    installed_dependencies[dependency_name] = self._install_package(dependency)
-        return installed_dependencies
+                dependencies[dependency_name] = self.get_package(dependency_name)
+        return dependencies
+    def _install_plan(self, plan):
+        """ Install the packages in the *plan*, each as soon as its dependencies in the plan are
+        installed, running at most _jobs installs at once, and no more than the jobserver has jobs
+        so that every install beyond the first can get a token. The first install running uses the
+        implicit job of the jobserver, any others take a token first. If an install fails no more
+        are started, those running are allowed to finish and then the first failure is raised.
+
+        :param plan: list of packages to install in dependency order, see :meth:`install_plan`
+        :type plan: list of :class:`nusoft.package.Package` instances
+        """
+        names = set(package.get_name() for package in plan)
+        waiting = {} # Names of the dependencies in the plan each package waits for
+        for package in plan:
+            dependencies = self._choose_dependencies(package)
+            package.set_dependencies(dependencies)
+            waiting[package.get_name()] = set(dependencies.keys()) & names
+        limit = max(1, self._jobs)
+        if self._jobserver is not None:
+            limit = min(limit, self._jobserver.get_jobs())
+        pending = list(plan)
+        running = []
+        finished = []
+        errors = []
+        implicit = [None] # The package using the implicit job
+        condition = threading.Condition()
+        def install(package, needs_token):
+            token = None
+            try:
+                if needs_token:
+                    token = self._jobserver.acquire()
+                self._build_package(package)
+            except Exception as error:
+                errors.append(error)
+            finally:
+                if token is not None:
+                    self._jobserver.release(token)
+            with condition:
+                running.remove(package)
+                if implicit[0] is package:
+                    implicit[0] = None
+                finished.append(package.get_name())
+                condition.notify()
+        with condition:
+            while True:
+                for name in finished:
+                    for dependencies in waiting.itervalues():
+                        dependencies.discard(name)
+                del finished[:]
+                for package in list(pending):
+                    if len(errors) > 0 or len(running) >= limit:
+                        break
+                    if len(waiting[package.get_name()]) == 0:
+                        pending.remove(package)
+                        running.append(package)
+                        needs_token = implicit[0] is not None and self._jobserver is not None
+                        if implicit[0] is None:
+                            implicit[0] = package
+                        thread = threading.Thread(target=install, args=(package, needs_token))
+                        thread.daemon = True
+                        thread.start()
+                if len(running) == 0:
+                    break
+                condition.wait(1.0) # A timeout, so that the wait can be interrupted
+        if len(errors) > 0:
+            if len(pending) > 0:
+                logger.warning("Cancelled installing %s" % 
+                               ", ".join(package.get_name() for package in pending))
+            raise errors[0]
+    def _build_package(self, package):
+        """ Install the *package* once its dependencies are installed.
+
+        :param package: package to install
+        :type package: :class:`nusoft.package.Package` instance
+        :raises Exception: if the install fails
+        """
+        self._wait_for_download(package)
+        try:
+            package.install()
+        except Exception as e:
+            logger.exception("Installation fail.", exc_info=True)
+            raise Exception("Failed to install " + package.get_name() + " see log for details")
+        package.check_state()
+    def _prefetch(self, packages):
+        """ Start downloading the *packages* in order, at most _downloads at once. Installation 
+        then waits only for each package's own download.
+
+        :param packages: list of packages to download
+        :type packages: list of :class:`nusoft.package.Package` instances
+        :return: the download pool to end with :meth:`_end_prefetch`, or None
+        """
+        if len(packages) == 0:
+            return None
+        logger.debug("Prefetching %i packages with %i downloads at once" % 
+                     (len(packages), self._downloads))
+        pool = multiprocessing.pool.ThreadPool(max(1, min(self._downloads, len(packages))))
+        for package in packages:
+            self._prefetches[package.get_name()] = pool.apply_async(package.download)
+        return pool
+    def _end_prefetch(self, pool, cancel=False):
+        """ End the prefetching *pool*, any downloads not yet waited for are abandoned. If 
+        *cancel* is True, e.g. as an install failed, downloads not yet started are not started.
+
+        :param pool: the download pool or None
+        :param cancel: True to cancel the downloads not yet started
+        """
+        self._prefetches = {}
+        if pool is None:
+            return
+        if cancel:
+            pool.terminate()
+        else:
+            pool.close()
+            pool.join()
+    def _wait_for_download(self, package):
+        """ Wait for the prefetch of the *package* if there is one. If the prefetch failed the 
+        package will download itself again when installed.
+
+        :param package: package to wait for
+        :type package: :class:`nusoft.package.Package` instance
+        """
+        prefetch = self._prefetches.pop(package.get_name(), None)
+        if prefetch is None:
+            return
+        try:
+            prefetch.get()
+        except Exception:
+            logger.warning("Prefetch of %s failed, downloading it again" % package.get_name(), 
+                           exc_info=True)
+    def _plan_package(self, package, plan):
+        """ Add the *package* to the *plan* after its dependencies, if it is not installed. This 
+        chooses optional dependencies as installing would.
+
+        :param package: package to plan
+        :type package: :class:`nusoft.package.Package` instance
+        :param plan: list of packages to install
+        """
+        if package.is_installed() or package in plan:
+            return
+        for dependency_name in package.get_dependencies():
+            if isinstance(dependency_name, types.ListType): # Multiple optional dependencies
+                for optional_dependency_name in dependency_name:
+                    if self.get_package(optional_dependency_name).is_installed():
+                        break
+                else: # No optional dependency is installed, thus install the first
+                    self._plan_package(self.get_package(dependency_name[0]), plan)
+            else:
+                self._plan_package(self.get_package(dependency_name), plan)
+        plan.append(package)
     def _install_package(self, package):
         """ Install the package
 
@@ -147,13 +408,8 @@ class PackageManager(object):
             return package
         dependencies = self._install_package_dependencies(package)
         package.set_dependencies(dependencies)
-        try:
-            package.install()
-        except Exception as e:
-            logger.exception("Installation fail.", exc_info=True)
-            raise Exception("Failed to install " + package.get_name() + " see log for details")
-        package.check_state()
-        return package        
+        self._build_package(package)
+        return package
     def _update_package(self, package):
         """ Update the package
 
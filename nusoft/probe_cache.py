@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+#
+# ProbeCache
+#
+# Stores the results of system probes (command locations, compilation tests) on disk.
+#
+# Author agent - 2026-10-18 <agent@local> : New file.
+####################################################################################################
+import os
+import json
+import threading
+import logging
+logger = logging.getLogger(__name__)
+
+class ProbeCache(object):
+    """ Stores probe results in a file, each result is keyed by a name and only valid whilst the
+    fingerprint of the things that can change the result is unchanged.
+
+    :param _file_path: path to the cache file
+    :param _refresh: True if existing results should be ignored (and replaced)
+    :param _entries: dictionary of name keyed fingerprint and result dictionaries
+    :param _lock: lock guarding the entries and the file
+    """
+    def __init__(self, file_path, refresh=False):
+        """ Initialise the cache from the file at *file_path*, optionally *refresh* all results.
+
+        :param file_path: path to the cache file
+        :type file_path: string
+        :param refresh: True to ignore the existing results
+        :type refresh: bool
+        """
+        self._file_path = file_path
+        self._refresh = refresh
+        self._entries = {}
+        self._lock = threading.Lock()
+        if not refresh and os.path.exists(file_path):
+            try:
+                with open(file_path, "r") as cache_file:
+                    self._entries = json.load(cache_file)
+            except (IOError, ValueError):
+                logger.warning("Probe cache %s is unreadable, ignoring it" % file_path)
+    def get(self, name, fingerprint):
+        """ Return the cache entry for *name* if it matches the *fingerprint*.
+
+        :param name: name of the probe
+        :param fingerprint: current fingerprint of the probe
+        :return: dictionary with the result (key result) or None if there is no valid entry
+        """
+        with self._lock:
+            entry = self._entries.get(name)
+        if entry is None or entry["fingerprint"] != fingerprint:
+            return None
+        logger.debug("Using cached probe result for %s" % name)
+        return entry
+    def set(self, name, fingerprint, result):
+        """ Store the *result* of the probe *name* with the *fingerprint* and save the cache.
+
+        :param name: name of the probe
+        :param fingerprint: current fingerprint of the probe
+        :param result: json serialisable result of the probe
+        """
+        with self._lock:
+            self._entries[name] = {"fingerprint" : fingerprint, "result" : result}
+            self._save()
+    def _save(self):
+        """ Save the entries to the cache file, the file is replaced atomically."""
+        directory = os.path.dirname(self._file_path)
+        try:
+            if not os.path.exists(directory):
+                os.makedirs(directory)
+            temp_path = "%s.%i" % (self._file_path, os.getpid())
+            with open(temp_path, "w") as cache_file:
+                json.dump(self._entries, cache_file)
+            os.rename(temp_path, self._file_path)
+        except (IOError, OSError):
+            logger.exception("Cannot save the probe cache to %s" % self._file_path, exc_info=True)
@@ -0,0 +1,225 @@
+#!/usr/bin/env python
+#
+# SearchEngine
+#
+# Searches the package index by name, version, repository and dependencies.
+#
+# Author agent - 2026-10-18 <agent@local> : New file.
+####################################################################################################
+import re
+import types
+import logging
+logger = logging.getLogger(__name__)
+
+# Scores for each way a term can match a package name, higher is more relevant
+EXACT_SCORE = 100
+PREFIX_SCORE = 80
+PATTERN_SCORE = 70
+WORD_PREFIX_SCORE = 60
+SUBSTRING_SCORE = 40
+FUZZY_SCORE = 30
+# Minimum trigram similarity for a fuzzy match
+TRIGRAM_THRESHOLD = 0.4
+
+class SearchEngine(object):
+    """ Searches packages by relevance. Queries are space separated terms which must all match the
+    package name, by exact, prefix, substring or fuzzy (edit distance or trigram) matching, and
+    optional repo:name and depends:name filters. Fuzzy matching is by word, version words are 
+    never fuzzy matched, they must start the package version instead.
+
+    :param _packages: dictionary of package index entries keyed by lower case package name
+    :param _words: dictionary of lists of lower case name words (split at -, _ and .) keyed by name
+    :param _trigrams: dictionary of sets of name words, excluding versions, keyed by trigram
+    """
+    def __init__(self, packages):
+        """ Initialise the engine with the *packages*, an iterable of package name and index entry
+        tuples.
+
+        :param packages: iterable of tuples of name and entry dictionary
+        """
+        self._packages = {}
+        self._words = {}
+        self._trigrams = {}
+        for name, entry in packages:
+            name = name.lower()
+            self._packages[name] = entry
+            self._words[name] = _words(name)
+            for word in self._words[name]:
+                if not _is_version(word):
+                    for trigram in _trigrams(word):
+                        self._trigrams.setdefault(trigram, set()).add(word)
+    def search(self, query):
+        """ Return the names of the packages matching the *query*, most relevant first.
+
+        :param query: space separated terms and filters
+        :type query: string
+        :return: list of package names
+        """
+        terms = []
+        filters = []
+        for term in query.lower().split():
+            if term.startswith("repo:"):
+                filters.append(lambda entry, value=term[5:]: entry["repository"].lower() == value)
+            elif term.startswith("depends:"):
+                filters.append(lambda entry, value=term[8:]: _depends_on(entry, value))
+            else:
+                terms.append(term)
+        scores = {}
+        for name, entry in self._packages.iteritems():
+            if all(test(entry) for test in filters):
+                scores[name] = 0
+        for term in terms:
+            fuzzy = dict((word, self._fuzzy_words(word)) for word in _words(term))
+            for name in scores.keys():
+                score = self._score(term, name, fuzzy)
+                if score is None:
+                    del scores[name]
+                else:
+                    scores[name] += score
+        logger.debug("Search for %s matches %i packages" % (query, len(scores)))
+        ranked = sorted(scores.iteritems(), key=lambda item: (-item[1], item[0]))
+        return [self._packages[name]["name"] for name, score in ranked]
+    def _score(self, term, name, fuzzy):
+        """ Return the score of the *term* matching the package *name*.
+
+        :param term: lower case query term
+        :param name: lower case package name
+        :param fuzzy: dictionary of the edit distance of similar name words, keyed by term word
+        :return: the score or None if the term does not match
+        """
+        if name == term:
+            return EXACT_SCORE
+        if name.startswith(term):
+            return PREFIX_SCORE
+        if _matches_pattern(term, name): # Previous searches were regular expressions
+            return PATTERN_SCORE
+        words = self._words[name]
+        if any(word.startswith(term) for word in words):
+            return WORD_PREFIX_SCORE
+        if term in name:
+            return SUBSTRING_SCORE
+        # Fuzzy match, every term word must match a name word and the term's version words the start
+        # of the name's version
+        if not _starts_version([word for word in _words(term) if _is_version(word)],
+                               [word for word in words if _is_version(word)]):
+            return None
+        distance = 0
+        for term_word, similar in fuzzy.iteritems():
+            if _is_version(term_word) or \
+                    any(word.startswith(term_word) for word in words if not _is_version(word)):
+                continue
+            distances = [similar[word] for word in words if word in similar]
+            if len(distances) == 0:
+                return None
+            distance = max(distance, min(distances))
+        return FUZZY_SCORE - distance
+    def _fuzzy_words(self, term_word):
+        """ Return the name words similar to the *term_word*, by edit distance or trigram similarity.
+
+        :param term_word: lower case word from a query term
+        :return: dictionary of edit distances keyed by similar name word
+        """
+        similar = {}
+        if _is_version(term_word):
+            return similar
+        candidates = set()
+        for trigram in _trigrams(term_word):
+            candidates.update(self._trigrams.get(trigram, set()))
+        allowed = max(1, len(term_word) / 4)
+        for word in candidates:
+            if abs(len(word) - len(term_word)) > allowed and \
+                    _similarity(term_word, word) < TRIGRAM_THRESHOLD:
+                continue
+            distance = _edit_distance(term_word, word)
+            if distance <= allowed or _similarity(term_word, word) >= TRIGRAM_THRESHOLD:
+                similar[word] = distance
+        return similar
+
+def _words(text):
+    """ Return the words in the *text*, split at -, _ and .
+
+    :param text: text to split
+    :return: list of words
+    """
+    return [word for word in re.split(r"[-_.]", text) if word != ""]
+
+def _is_version(word):
+    """ Return True if the *word* is a version, it starts with a digit or a letter and digit e.g.
+    5, v5 or p02."""
+    return re.match(r"[a-z]?[0-9]", word) is not None
+
+def _starts_version(term_versions, versions):
+    """ Check if the *term_versions* words start the *versions* words in order, each is equal to
+    or a prefix of its version word, ignoring a leading letter of the version word e.g. v5.
+
+    :param term_versions: list of version words from a query term
+    :param versions: list of version words from a package name
+    :return: True if they match
+    """
+    if len(term_versions) > len(versions):
+        return False
+    for term_version, version in zip(term_versions, versions):
+        if not version.startswith(term_version) and \
+                not (version[:1].isalpha() and version[1:].startswith(term_version)):
+            return False
+    return True
+
+def _trigrams(text):
+    """ Return the trigrams of the *text*, padded so short texts have trigrams.
+
+    :param text: text to split
+    :return: set of trigrams
+    """
+    text = "  %s " % text
+    return set(text[index:index + 3] for index in range(0, len(text) - 2))
+
+def _similarity(first, second):
+    """ Return the trigram similarity of the *first* and *second* texts.
+
+    :return: shared trigrams over all trigrams, between 0 and 1
+    """
+    first = _trigrams(first)
+    second = _trigrams(second)
+    return float(len(first & second)) / len(first | second)
+
+def _edit_distance(first, second):
+    """ Return the edit distance between the *first* and *second* texts, counting single character
+    insertions, deletions, substitutions and swaps of neighbouring characters.
+
+    :return: number of edits
+    """
+    rows = [range(0, len(second) + 1)]
+    for index in range(1, len(first) + 1):
+        row = [index]
+        for other in range(1, len(second) + 1):
+            cost = int(first[index - 1] != second[other - 1])
+            row.append(min(rows[-1][other] + 1, row[other - 1] + 1, rows[-1][other - 1] + cost))
+            if index > 1 and other > 1 and first[index - 1] == second[other - 2] and \
+                    first[index - 2] == second[other - 1]: # Swapped characters
+                row[other] = min(row[other], rows[-2][other - 2] + 1)
+        rows.append(row)
+    return rows[-1][-1]
+
+def _matches_pattern(term, name):
+    """ Check if the *term* as a regular expression matches the start of the *name*.
+
+    :return: True if the term contains regular expression characters and matches
+    """
+    if re.search(r"[\^$*+?\[\]()|\\]", term) is None:
+        return False
+    try:
+        return re.match(term, name) is not None
+    except re.error:
+        return False
+
+def _depends_on(entry, value):
+    """ Check if the package index *entry* depends on a package starting with *value*.
+
+    :return: True if any dependency, or optional dependency, name starts with the value
+    """
+    for dependency in entry["dependencies"]:
+        if not isinstance(dependency, types.ListType):
+            dependency = [dependency]
+        if any(name.lower().startswith(value) for name in dependency):
+            return True
+    return False
@@ -0,0 +1,243 @@
+#!/usr/bin/env python
+#
+# Archive
+#
+# Extracts tar and zip archives, decompressing with multi-threaded tools where available.
+#
+# Author agent - 2026-10-18 <agent@local> : New file.
+####################################################################################################
+import os
+import tarfile
+import zipfile
+import subprocess
+import threading
+from contextlib import closing
+import logging
+logger = logging.getLogger(__name__)
+try:
+    from backports import lzma
+except ImportError: # Optional, xz is then decompressed by the xz command only
+    lzma = None
+try:
+    import zstandard
+except ImportError: # Optional, zstd is then decompressed by the zstd command only
+    zstandard = None
+
+# Archive suffixes and their compression, tar files are compressed or plain (""), or zip
+SUFFIXES = [(".tar.gz", "gz"), (".tgz", "gz"), (".tar.bz2", "bz2"), (".tbz2", "bz2"),
+            (".tbz", "bz2"), (".tar.xz", "xz"), (".txz", "xz"), (".tar.zst", "zst"),
+            (".tzst", "zst"), (".tar", ""), (".zip", "zip")]
+# Leading bytes of each compression
+MAGIC = [("\x1f\x8b", "gz"), ("BZh", "bz2"), ("\xfd7zXZ\x00", "xz"), ("\x28\xb5\x2f\xfd", "zst"),
+         ("PK\x03\x04", "zip")]
+# Decompression commands for each compression in order of preference, each writes to stdout
+DECOMPRESSORS = {"gz" : [["pigz", "-dc"]],
+                 "bz2" : [["pbzip2", "-dc"]],
+                 "xz" : [["xz", "-T0", "-dc"]],
+                 "zst" : [["zstd", "-T0", "-dc"]]}
+# Bytes read at a time
+CHUNK_SIZE = 64 * 1024
+
+def compression(name, head=None):
+    """ Return the compression of the archive called *name*, from its suffix or else its leading
+    bytes *head*.
+
+    :param name: name of the archive
+    :param head: optional leading bytes of the archive
+    :return: gz, bz2, xz, zst, "" for a plain tar, zip, or None if unknown
+    """
+    for suffix, compression in SUFFIXES:
+        if name.endswith(suffix):
+            return compression
+    for magic, compression in MAGIC:
+        if head is not None and head.startswith(magic):
+            return compression
+    return None
+
+def is_streamable(name):
+    """ Check if the archive called *name* can be extracted as a stream, i.e. is a tar archive.
+
+    :param name: name of the archive
+    :return: True if streamable
+    """
+    return compression(name) not in [None, "zip"]
+
+def extract(source, target_path, strip_depth=0, name=None, which=None):
+    """ Extract the archive *source*, a path or a file like object, to *target_path* stripping
+    *strip_depth* leading directories from the member names. The compression is found from the
+    *name* (defaults to the *source* path) or the leading bytes of a path. Compressed tar archives
+    are piped through the first decompression command found by *which*, so that decompression
+    runs in parallel, otherwise they are decompressed in process. Zip archives must be paths.
+
+    :param source: path to the archive or file like object with a read method
+    :param target_path: path to extract to
+    :param strip_depth: optional number of leading directories to strip
+    :param name: optional name of the archive
+    :param which: optional function returning the location of a command or None, commands are
+    not used if None
+    """
+    if isinstance(source, basestring):
+        if name is None:
+            name = source
+        with open(source, "rb") as archive_file:
+            kind = compression(name, archive_file.read(8))
+        if kind == "zip":
+            _extract_zip(source, target_path, strip_depth)
+            return
+        with open(source, "rb") as archive_file:
+            _extract_tar(archive_file, target_path, strip_depth, kind, which)
+    else:
+        kind = compression(name or "")
+        if kind == "zip":
+            raise tarfile.ReadError("Zip archive %s cannot be extracted as a stream" % name)
+        _extract_tar(source, target_path, strip_depth, kind, which)
+
+def _extract_tar(source, target_path, strip_depth, kind, which):
+    """ Extract the tar file object *source* compressed with *kind*, see :func:`extract`."""
+    command = None
+    if kind not in [None, ""] and which is not None:
+        for decompressor in DECOMPRESSORS[kind]:
+            if which(decompressor[0]) is not None:
+                command = decompressor
+                break
+    if command is not None:
+        logger.debug("Decompressing with %s" % " ".join(command))
+        _extract_piped(source, target_path, strip_depth, command)
+        return
+    if kind == "xz" or kind == "zst":
+        source = _Decompressed(source, kind)
+    mode = "r|*" if kind is None else "r|%s" % (kind if kind in ["gz", "bz2"] else "")
+    with closing(tarfile.open(fileobj=source, mode=mode)) as tar_file:
+        tar_file.extractall(target_path, _strip_members(tar_file, strip_depth))
+
+def _extract_piped(source, target_path, strip_depth, command):
+    """ Extract the tar file object *source* decompressed by *command*, a thread pumps the source
+    to the command, see :func:`extract`.
+    """
+    process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    errors = []
+    def pump():
+        try:
+            for chunk in iter(lambda: source.read(CHUNK_SIZE), ""):
+                try:
+                    process.stdin.write(chunk)
+                except IOError: # The command stopped, its exit status is checked
+                    break
+        except Exception as error: # Raised in the caller once the extraction stops
+            errors.append(error)
+        finally:
+            try:
+                process.stdin.close()
+            except IOError: # The command has already stopped
+                pass
+    thread = threading.Thread(target=pump)
+    thread.daemon = True
+    thread.start()
+    try:
+        with closing(tarfile.open(fileobj=process.stdout, mode="r|")) as tar_file:
+            tar_file.extractall(target_path, _strip_members(tar_file, strip_depth))
+        for chunk in iter(lambda: process.stdout.read(CHUNK_SIZE), ""): # Trailing padding
+            pass
+    except Exception:
+        if process.poll() is None:
+            process.kill()
+        thread.join()
+        process.wait()
+        if len(errors) > 0: # The source failed, e.g. the download dropped
+            raise errors[0]
+        raise
+    thread.join()
+    if len(errors) > 0:
+        raise errors[0]
+    if process.wait() != 0:
+        raise tarfile.ReadError("%s failed with %i" % (" ".join(command), process.returncode))
+
+def _extract_zip(file_path, target_path, strip_depth):
+    """ Extract the zip at *file_path*, keeping the permissions of each file, see :func:`extract`.
+    """
+    with closing(zipfile.ZipFile(file_path)) as zip_file:
+        for member in zip_file.infolist():
+            name = _strip_path(member.filename, strip_depth)
+            if name is None:
+                continue
+            member.filename = name + ("/" if member.filename.endswith("/") else "")
+            extracted = zip_file.extract(member, target_path)
+            mode = (member.external_attr >> 16) & 0777
+            if mode != 0 and not os.path.isdir(extracted):
+                os.chmod(extracted, mode)
+
+class _Decompressed(object):
+    """ File like object decompressing xz or zstd from another file like object in process.
+
+    :param _source: file like object of compressed bytes
+    :param _decompressor: decompressor object with a decompress method
+    :param _buffer: decompressed bytes not yet read
+    """
+    def __init__(self, source, kind):
+        """ Initialise to decompress the *source* compressed with *kind*.
+
+        :param source: file like object with a read method
+        :param kind: xz or zst
+        """
+        self._source = source
+        self._buffer = ""
+        if kind == "xz" and lzma is not None:
+            self._decompressor = lzma.LZMADecompressor()
+        elif kind == "zst" and zstandard is not None:
+            self._decompressor = zstandard.ZstdDecompressor().decompressobj()
+        else:
+            raise tarfile.CompressionError("Cannot decompress %s, install the %s command" %
+                                           (kind, DECOMPRESSORS[kind][0][0]))
+    def read(self, size=CHUNK_SIZE):
+        """ Read at most *size* decompressed bytes.
+
+        :param size: number of bytes
+        :return: the bytes read, empty at the end
+        """
+        while len(self._buffer) < size:
+            chunk = self._source.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            self._buffer += self._decompressor.decompress(chunk)
+        result, self._buffer = self._buffer[:size], self._buffer[size:]
+        return result
+
+def _strip_members(tar_file, strip_depth):
+    """ Yield the members of the *tar_file* with the *strip_depth* leading directories removed
+    from their names (and hard link targets), as tar --strip-components does. Members within the
+    stripped directories, pax global headers and members outside the target are skipped.
+
+    :param tar_file: open tar file
+    :param strip_depth: number of leading directories to strip
+    :return: generator of members
+    """
+    for member in tar_file:
+        if member.type in [tarfile.XGLTYPE, tarfile.XHDTYPE] or \
+                member.name == "pax_global_header":
+            continue
+        name = _strip_path(member.name, strip_depth)
+        if name is None:
+            continue
+        if member.islnk():
+            linkname = _strip_path(member.linkname, strip_depth)
+            if linkname is None:
+                logger.warning("Skipping %s, linked to a stripped member" % member.name)
+                continue
+            member.linkname = linkname
+        member.name = name
+        yield member
+
+def _strip_path(path, strip_depth):
+    """ Return the *path* with the *strip_depth* leading directories removed.
+
+    :param path: path of an archive member
+    :param strip_depth: number of leading directories to strip
+    :return: the stripped path or None if nothing is left or it is outside the target
+    """
+    parts = [part for part in path.split("/") if part not in ["", "."]]
+    if path.startswith("/") or ".." in parts:
+        logger.warning("Skipping %s, outside the target" % path)
+        return None
+    if len(parts) <= strip_depth:
+        return None
+    return "/".join(parts[strip_depth:])
@@ -0,0 +1,247 @@
+#!/usr/bin/env python
+#
+# ConnectionPool
+#
+# Keeps HTTP(S) connections open between requests to the same host.
+#
+# Author agent - 2026-10-18 <agent@local> : New file.
+####################################################################################################
+import time
+import socket
+import urllib
+import urllib2
+import httplib
+import urlparse
+import threading
+import logging
+logger = logging.getLogger(__name__)
+
+# Most redirects to follow for a request
+MAX_REDIRECTS = 10
+# Most idle connections to keep per host
+MAX_IDLE = 8
+
+class ConnectionPool(object):
+    """ Pool of persistent HTTP and HTTPS connections keyed by scheme, host and port, shared by
+    all the downloads in a session and safe to use from several threads. Responses look like
+    urllib2 responses, and HTTP errors raise urllib2.HTTPError. Redirects are followed, the
+    Authorization header is only sent on to the same host. Other schemes (e.g. ftp) and proxied
+    urls are opened with urllib2. The connections in use to each host at once can be capped, 
+    requests then wait, at most their timeout, for a connection to be released.
+
+    :param _max_per_host: most connections in use to a host at once, None for no cap
+    :param _idle: dictionary of lists of idle connections keyed by scheme, host and port
+    :param _in_use: dictionary of the number of connections in use keyed as _idle
+    :param _lock: lock guarding the idle connections and the connections in use
+    :param _released: condition, on the lock, notified when a connection is no longer in use
+    """
+    def __init__(self, max_per_host=None):
+        """ Initialise an empty pool, optionally with at most *max_per_host* connections in use to
+        each host.
+
+        :param max_per_host: most connections in use to a host at once, None for no cap
+        :type max_per_host: int
+        """
+        self._max_per_host = max_per_host
+        self._idle = {}
+        self._in_use = {}
+        self._lock = threading.Lock()
+        self._released = threading.Condition(self._lock)
+    def open(self, url, headers=None, timeout=None):
+        """ Request the *url* with the extra *headers*, following redirects.
+
+        :param url: url to request
+        :param headers: optional dictionary of extra request headers
+        :param timeout: optional timeout in seconds for connecting and each read
+        :return: the response, close it to return the connection to the pool
+        """
+        headers = dict(headers or {})
+        for redirect in range(0, MAX_REDIRECTS + 1):
+            parsed = urlparse.urlparse(url)
+            if parsed.scheme not in ["http", "https"] or self._is_proxied(url):
+                return urllib2.urlopen(urllib2.Request(url, headers=headers), timeout=timeout)
+            response = self._request(parsed, headers, timeout)
+            if response.getcode() not in [301, 302, 303, 307, 308]:
+                return response
+            location = urlparse.urljoin(url, response.info().getheader("Location"))
+            try:
+                response.read()
+            finally:
+                response.close()
+            if urlparse.urlparse(location).netloc != parsed.netloc:
+                headers.pop("Authorization", None)
+            logger.debug("Redirected from %s to %s" % (url, location))
+            url = location
+        raise urllib2.URLError("Too many redirects for %s" % url)
+    def release(self, key, connection):
+        """ Return the *connection* for *key* to the pool, or close it if the pool is full.
+
+        :param key: tuple of scheme, host and port
+        :param connection: idle connection
+        """
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < MAX_IDLE:
+                idle.append(connection)
+                connection = None
+        if connection is not None:
+            connection.close()
+        self._release_slot(key)
+    def discard(self, key, connection):
+        """ Close the *connection* for *key* rather than returning it to the pool.
+
+        :param key: tuple of scheme, host and port
+        :param connection: connection to close
+        """
+        connection.close()
+        self._release_slot(key)
+    def get_free(self, url):
+        """ Return the number of connections to the host of the *url* that can be opened without
+        waiting.
+
+        :param url: url on the host
+        :return: number of connections, None if the connections are not capped
+        """
+        if self._max_per_host is None:
+            return None
+        parsed = urlparse.urlparse(url)
+        with self._lock:
+            return max(0, self._max_per_host - 
+                       self._in_use.get((parsed.scheme, parsed.hostname, parsed.port), 0))
+    def close(self):
+        """ Close all the idle connections."""
+        with self._lock:
+            connections = [connection for idle in self._idle.values() for connection in idle]
+            self._idle = {}
+        for connection in connections:
+            connection.close()
+    def _request(self, parsed, headers, timeout):
+        """ Send a GET request for the *parsed* url on a pooled connection, a reused connection
+        that the server has since closed is replaced by a new connection.
+
+        :param parsed: parsed url
+        :param headers: dictionary of extra request headers
+        :param timeout: timeout in seconds or None
+        :return: the response
+        """
+        key = (parsed.scheme, parsed.hostname, parsed.port)
+        path = parsed.path or "/"
+        if parsed.query:
+            path += "?" + parsed.query
+        while True:
+            connection, reused = self._acquire(key, timeout)
+            try:
+                connection.request("GET", path, headers=headers)
+                response = connection.getresponse()
+                break
+            except (socket.error, httplib.HTTPException) as error:
+                self.discard(key, connection)
+                if not reused: # A new connection failed, the server is at fault
+                    if isinstance(error, httplib.HTTPException):
+                        raise urllib2.URLError(error)
+                    raise
+                logger.debug("Pooled connection to %s was closed, reconnecting" % parsed.netloc)
+        url = urlparse.urlunparse(parsed)
+        if response.status >= 400:
+            self.discard(key, connection)
+            raise urllib2.HTTPError(url, response.status, response.reason, response.msg, None)
+        return PooledResponse(self, key, connection, response, url)
+    def _acquire(self, key, timeout):
+        """ Return an idle connection for *key*, or a new connection if there are none.
+
+        :param key: tuple of scheme, host and port
+        :param timeout: timeout in seconds or None, also the longest wait for a capped host
+        :return: tuple of the connection and True if it was reused
+        """
+        if self._max_per_host is not None:
+            end = None if timeout is None else time.time() + timeout
+            with self._released:
+                while self._in_use.get(key, 0) >= self._max_per_host:
+                    remaining = None if end is None else end - time.time()
+                    if remaining is not None and remaining <= 0:
+                        raise urllib2.URLError("Timed out waiting for a connection to %s" % key[1])
+                    self._released.wait(remaining)
+                self._in_use[key] = self._in_use.get(key, 0) + 1
+        with self._lock:
+            idle = self._idle.get(key, [])
+            connection = idle.pop() if len(idle) > 0 else None
+        if connection is not None:
+            connection.timeout = timeout
+            if connection.sock is not None:
+                connection.sock.settimeout(timeout)
+            return connection, True
+        scheme, host, port = key
+        if scheme == "https":
+            return httplib.HTTPSConnection(host, port, timeout=timeout), False
+        return httplib.HTTPConnection(host, port, timeout=timeout), False
+    def _release_slot(self, key):
+        """ Release the connection slot for *key*, if connections are capped.
+
+        :param key: tuple of scheme, host and port
+        """
+        if self._max_per_host is not None:
+            with self._released:
+                self._in_use[key] -= 1
+                self._released.notify_all()
+    def _is_proxied(self, url):
+        """ Check if the *url* should be requested through a proxy.
+
+        :param url: url to check
+        :return: True if a proxy is set for the url
+        """
+        parsed = urlparse.urlparse(url)
+        return parsed.scheme in urllib.getproxies() and not urllib.proxy_bypass(parsed.hostname)
+
+class PooledResponse(object):
+    """ Response on a pooled connection, with the urllib2 response methods. Closing a fully read
+    response returns the connection to the pool.
+
+    :param _pool: the pool the connection belongs to
+    :param _key: tuple of scheme, host and port of the connection
+    :param _connection: the connection
+    :param _response: the httplib response
+    :param _url: the url requested
+    """
+    def __init__(self, pool, key, connection, response, url):
+        """ Initialise the response.
+
+        :param pool: the pool the connection belongs to
+        :param key: tuple of scheme, host and port of the connection
+        :param connection: the connection
+        :param response: the httplib response
+        :param url: the url requested
+        """
+        self._pool = pool
+        self._key = key
+        self._connection = connection
+        self._response = response
+        self._url = url
+    def getcode(self):
+        """ Return the HTTP status code."""
+        return self._response.status
+    def geturl(self):
+        """ Return the url requested."""
+        return self._url
+    def info(self):
+        """ Return the response headers, with a getheader method."""
+        return self._response.msg
+    def read(self, size=None):
+        """ Read at most *size* bytes, or all if None.
+
+        :param size: optional number of bytes
+        :return: the bytes read, empty once all are read
+        """
+        try:
+            return self._response.read(size)
+        except httplib.HTTPException as error:
+            raise urllib2.URLError(error)
+    def close(self):
+        """ Close the response, the connection is returned to the pool if the response was fully
+        read and the server keeps the connection open."""
+        if self._connection is None:
+            return
+        if self._response.isclosed() and not self._response.will_close:
+            self._pool.release(self._key, self._connection)
+        else:
+            self._pool.discard(self._key, self._connection)
+        self._connection = None
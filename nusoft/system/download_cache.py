@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+#
+# DownloadCache
+#
+# Content addressed cache of downloaded files, which can be shared between install paths and users.
+#
+# Author agent - 2026-10-18 <agent@local> : New file.
+####################################################################################################
+import os
+import json
+import errno
+import tempfile
+import threading
+import placement
+import downloader
+import logging
+logger = logging.getLogger(__name__)
+try:
+    import fcntl
+except ImportError: # Not on this system, urls.json is then only locked within this process
+    fcntl = None
+
+class DownloadCache(object):
+    """ Cache of downloaded files keyed by the sha256 hex digest of their contents, files are
+    saved read only at sha256/<first two digits>/<digest> in the cache path. A urls.json file maps
+    urls to digests, so that downloads without a known checksum are also cached. Updates to
+    urls.json are locked, by a lock file, against other threads and processes sharing the cache.
+    Cached files are checked against their digest before they are used. As anyone who can write
+    to a shared cache can map a url to a file of their own, urls are only looked up in a urls.json
+    owned by the current user, files with a known digest are found whoever stored them.
+
+    :param _path: path to the cache directory
+    :param _lock: lock guarding urls.json within this process
+    """
+    def __init__(self, path):
+        """ Initialise the cache in the directory at *path*, it is created when first needed.
+
+        :param path: path to the cache directory
+        :type path: string
+        """
+        self._path = path
+        self._lock = threading.Lock()
+    def get_path(self):
+        """ Return the cache directory path.
+
+        :return: the cache path
+        :rtype: string
+        """
+        return self._path
+    def lookup(self, url, sha256=None):
+        """ Return the path to the cached file with the *sha256* digest, or if None the digest the
+        *url* last downloaded as, if this user saved urls.json last.
+
+        :param url: url of the file
+        :param sha256: optional expected sha256 hex digest of the file
+        :return: path to the cached file or None if not cached or changed since it was cached
+        """
+        if sha256 is None:
+            if not self._owns_urls():
+                return None
+            sha256 = self._load_urls().get(url)
+            if sha256 is None:
+                return None
+        file_path = self._file_path(sha256)
+        if not os.path.exists(file_path):
+            return None
+        if downloader.file_sha256(file_path).hexdigest() != sha256.lower():
+            logger.warning("Cached %s does not match its sha256 %s, ignoring it" % (file_path, 
+                                                                                   sha256))
+            try:
+                os.remove(file_path)
+            except OSError: # Owned by another user, it is replaced when next stored
+                pass
+            return None
+        logger.debug("Found %s in the download cache as %s" % (url, sha256))
+        return file_path
+    def make_temporary(self):
+        """ Return the path to a new empty file in the cache, to download a file to that is then
+        stored by moving it.
+
+        :return: path to the file
+        :raises OSError: if the file cannot be made
+        """
+        try:
+            os.makedirs(self._path)
+        except OSError as error:
+            if error.errno != errno.EEXIST:
+                raise
+        handle, temp_path = tempfile.mkstemp(dir=self._path, prefix=".download")
+        os.close(handle)
+        return temp_path
+    def store(self, url, file_path, sha256, move=False):
+        """ Copy the file at *file_path*, downloaded from *url* with the *sha256* digest, into the
+        cache, or move it if *move* is True, replacing a cached file that has changed. Files are
+        placed at a temporary file in the cache then renamed, so other users never see a partial
+        file.
+
+        :param url: url the file was downloaded from
+        :param file_path: path to the downloaded file
+        :param sha256: sha256 hex digest of the file
+        :param move: True if the file at *file_path* is not needed afterwards
+        """
+        cache_path = self._file_path(sha256)
+        try:
+            if not os.path.exists(cache_path) or \
+                    downloader.file_sha256(cache_path).hexdigest() != sha256:
+                directory = os.path.dirname(cache_path)
+                try:
+                    os.makedirs(directory)
+                except OSError as error:
+                    if error.errno != errno.EEXIST: # Made by another process
+                        raise
+                handle, temp_path = tempfile.mkstemp(dir=directory, prefix=".%s" % sha256)
+                os.close(handle)
+                placement.place(file_path, temp_path, move=move)
+                os.chmod(temp_path, 0444)
+                os.rename(temp_path, cache_path)
+            self._update_urls(url, sha256)
+            logger.debug("Stored %s in the download cache as %s" % (url, sha256))
+        except (IOError, OSError): # The cache is an optimisation, the download has succeeded
+            logger.warning("Cannot store %s in the download cache %s" % (url, self._path),
+                           exc_info=True)
+    def _file_path(self, sha256):
+        """ Return the path of the file with the *sha256* digest.
+
+        :param sha256: sha256 hex digest
+        :return: path in the cache
+        """
+        return os.path.join(self._path, "sha256", sha256[:2], sha256)
+    def _update_urls(self, url, sha256):
+        """ Map the *url* to the *sha256* digest in urls.json, which is read, updated and replaced
+        whilst locked so that concurrent updates are not lost.
+
+        :param url: url the file was downloaded from
+        :param sha256: sha256 hex digest of the file
+        """
+        with self._lock:
+            with open(os.path.join(self._path, "urls.lock"), "a") as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                try:
+                    urls = self._load_urls()
+                    if urls.get(url) != sha256:
+                        urls[url] = sha256
+                        self._save_urls(urls)
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+    def _owns_urls(self):
+        """ Check if urls.json exists and is owned by the current user.
+
+        :return: True if owned
+        """
+        try:
+            owner = os.stat(os.path.join(self._path, "urls.json")).st_uid
+        except OSError:
+            return False
+        return not hasattr(os, "getuid") or owner == os.getuid()
+    def _load_urls(self):
+        """ Return the url to digest map.
+
+        :return: dictionary of sha256 hex digests keyed by url
+        """
+        try:
+            with open(os.path.join(self._path, "urls.json"), "r") as urls_file:
+                return json.load(urls_file)
+        except (IOError, ValueError):
+            return {}
+    def _save_urls(self, urls):
+        """ Save the url to digest map, the file is replaced atomically.
+
+        :param urls: dictionary of sha256 hex digests keyed by url
+        """
+        handle, temp_path = tempfile.mkstemp(dir=self._path, prefix=".urls")
+        with os.fdopen(handle, "w") as urls_file:
+            json.dump(urls, urls_file)
+        os.chmod(temp_path, 0644)
+        os.rename(temp_path, os.path.join(self._path, "urls.json"))
@@ -0,0 +1,533 @@
+#!/usr/bin/env python
+#
+# Downloader
+#
+# Downloads files in chunks, resuming partial downloads where the server allows.
+#
+# Author agent - 2026-10-18 <agent@local> : New file.
+####################################################################################################
+import os
+import re
+import json
+import time
+import urllib2
+import connection_pool
+import rate_limiter
+import retry_policy
+import hashlib
+import threading
+from contextlib import closing
+import logging
+logger = logging.getLogger(__name__)
+
+# Bytes read and written at a time
+CHUNK_SIZE = 64 * 1024
+# Smallest file, in bytes, to download in segments
+MIN_SEGMENTED_SIZE = 16 * 1024 * 1024
+
+class ChecksumError(IOError):
+    """ Raised when a downloaded file does not match its expected checksum."""
+    pass
+
+class Downloader(object):
+    """ Downloads files to a .part file which is renamed when complete. The .part file and a
+    .part.json file of the server's validators (ETag and Last-Modified) are kept if the download
+    fails, the next download of the same url then continues from the end of the .part file using
+    a Range request, if the server supports ranges and the file is unchanged. Files are hashed as
+    they are streamed, and checked against the expected sha256 digest before they are renamed.
+
+    Large files can instead be downloaded in segments, byte ranges fetched at once over several
+    connections into a preallocated .part file, see :meth:`fetch_segmented`. At most the free
+    connections to each host are used, so that segments never wait for a connection.
+
+    :param _pool: pool of persistent connections shared by the downloads
+    :param _limiter: rate limiter shared by the downloads
+    """
+    def __init__(self, pool=None, limiter=None):
+        """ Initialise the downloader with a connection *pool* and rate *limiter*.
+
+        :param pool: optional connection pool, a new pool is made if None
+        :type pool: :class:`connection_pool.ConnectionPool`
+        :param limiter: optional rate limiter, downloads are not limited if None
+        :type limiter: :class:`rate_limiter.RateLimiter`
+        """
+        if pool is None:
+            pool = connection_pool.ConnectionPool()
+        if limiter is None:
+            limiter = rate_limiter.RateLimiter()
+        self._pool = pool
+        self._limiter = limiter
+    def fetch(self, url, target_path, headers=None, progress=None, timeout=None, sha256=None,
+              end=None):
+        """ Download the *url* to the *target_path*, sending the extra *headers*. If the file does 
+        not match the *sha256* digest it is discarded and a ChecksumError raised. If the download 
+        is still running at the *end* time a DeadlineError is raised, keeping the .part file.
+
+        :param url: url to download
+        :param target_path: path to save the file to
+        :param headers: optional dictionary of extra request headers
+        :param progress: optional function called with the bytes downloaded, the total bytes (None
+        if unknown) and the throughput in bytes per second after each chunk
+        :param timeout: optional timeout in seconds for connecting and each read
+        :param sha256: optional expected sha256 hex digest of the file
+        :param end: optional time, as from time.time(), the download must end by
+        :return: number of bytes in the file and its sha256 hex digest
+        """
+        part_path = target_path + ".part"
+        validators = self._resume_validators(url, part_path)
+        request_headers = dict(headers or {})
+        offset = 0
+        if validators is not None:
+            offset = os.path.getsize(part_path)
+            request_headers["Range"] = "bytes=%i-" % offset
+            request_headers["If-Range"] = validators.get("etag") or validators["last_modified"]
+        try:
+            response = self._pool.open(url, request_headers, timeout)
+        except urllib2.HTTPError as error:
+            if error.code != 416: # Range not satisfiable, the .part file is unusable
+                raise
+            logger.debug("Cannot resume %s, downloading it again" % url)
+            self._discard(part_path)
+            return self.fetch(url, target_path, headers, progress, timeout, sha256, end)
+        with closing(response):
+            offset = self._resume_offset(response, offset)
+            if offset == 0:
+                self._save_validators(url, part_path, response)
+            with self._limiter.transfer() as transfer:
+                size, digest = self._stream(response, part_path, offset, transfer, progress, end)
+        if sha256 is not None and digest != sha256.lower():
+            self._discard(part_path)
+            raise ChecksumError("Download of %s has sha256 %s not %s" % (url, digest, sha256))
+        os.rename(part_path, target_path)
+        self._discard(part_path)
+        return size, digest
+    def fetch_segmented(self, urls, target_path, segments, headers=None, progress=None, 
+                        timeout=None, sha256=None, end=None):
+        """ Download the file at the mirror *urls* to the *target_path* in *segments* byte ranges
+        at once, each written into place in a preallocated .part file. The segments are shared 
+        between the mirrors if the *sha256* digest is known, otherwise only the first mirror is 
+        used as the result could not be verified. The segments are fetched by a connection for 
+        each, or fewer if the hosts have fewer connections free, each connection fetching the next
+        segment once its segment is done. The file is hashed once complete. The progress of each
+        segment is saved if the download fails, the next download continues each segment.
+
+        :param urls: list of mirror urls of the file
+        :param target_path: path to save the file to
+        :param segments: number of segments
+        :param headers: optional dictionary of extra request headers
+        :param progress: optional progress function, see :meth:`fetch`
+        :param timeout: optional timeout in seconds for connecting and each read
+        :param sha256: optional expected sha256 hex digest of the file
+        :param end: optional time, as from time.time(), the download must end by
+        :return: number of bytes in the file and its sha256 hex digest, or None if the file is 
+        smaller than MIN_SEGMENTED_SIZE or the server does not support ranges
+        """
+        if sha256 is None:
+            urls = urls[:1]
+        size, validator = self._range_support(urls[0], headers, timeout)
+        if size is None or size < MIN_SEGMENTED_SIZE:
+            return None
+        part_path = target_path + ".part"
+        state = self._segment_state(urls[0], part_path, size, validator)
+        if state is None:
+            length = (size + segments - 1) / segments
+            state = {"url" : urls[0], "validator" : validator, "size" : size,
+                     "segments" : [[start, min(start + length, size) - 1, 0] 
+                                   for start in range(0, size, length)]}
+            with open(part_path, "wb") as part_file:
+                part_file.truncate(size)
+        logger.debug("Downloading %s in %i segments from %i mirrors" % 
+                     (urls[0], len(state["segments"]), len(urls)))
+        errors = []
+        reporter = _SegmentProgress(state["segments"], size, progress)
+        pending = [segment for segment in state["segments"] 
+                   if segment[0] + segment[2] <= segment[1]] # Not already complete
+        lock = threading.Lock()
+        transfer = self._limiter.transfer() # The segments share the rate of one transfer
+        def fetch_pending(url):
+            while True:
+                with lock:
+                    if len(pending) == 0:
+                        return
+                    segment = pending.pop(0)
+                self._fetch_segment(url, part_path, segment, validator if url == urls[0] else None,
+                                    headers, timeout, end, transfer, reporter, errors)
+        threads = []
+        for url in self._connection_urls(urls, len(pending)):
+            thread = threading.Thread(target=fetch_pending, args=(url,))
+            thread.daemon = True
+            threads.append(thread)
+        with transfer:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        if len(errors) > 0:
+            if validator is not None: # Can continue next time
+                with open(part_path + ".json", "w") as state_file:
+                    json.dump(state, state_file)
+            raise errors[0]
+        digest = file_sha256(part_path).hexdigest()
+        if sha256 is not None and digest != sha256.lower():
+            self._discard(part_path)
+            raise ChecksumError("Download of %s has sha256 %s not %s" % (urls[0], digest, sha256))
+        os.rename(part_path, target_path)
+        self._discard(part_path)
+        return size, digest
+    def fetch_stream(self, url, consume, headers=None, progress=None, timeout=None, sha256=None,
+                     tee_path=None, end=None):
+        """ Download the *url* and pass it, as a file like object, to *consume* as it arrives. The
+        bytes are hashed on the way and optionally written to *tee_path* too. Nothing is resumed, 
+        if the download fails or does not match the *sha256* digest the caller must undo whatever 
+        *consume* did.
+
+        :param url: url to download
+        :param consume: function taking a file like object with a read method
+        :param headers: optional dictionary of extra request headers
+        :param progress: optional progress function, see :meth:`fetch`
+        :param timeout: optional timeout in seconds for connecting and each read
+        :param sha256: optional expected sha256 hex digest of the file
+        :param tee_path: optional path to also save the file to
+        :param end: optional time, as from time.time(), the download must end by
+        :return: number of bytes in the file and its sha256 hex digest
+        """
+        with closing(self._pool.open(url, headers, timeout)) as response:
+            with self._limiter.transfer() as transfer:
+                tee_file = open(tee_path, "wb") if tee_path is not None else None
+                try:
+                    stream = _HashingStream(response, transfer, progress, tee_file, end)
+                    consume(stream)
+                    size, digest = stream.drain()
+                finally:
+                    if tee_file is not None:
+                        tee_file.close()
+        if sha256 is not None and digest != sha256.lower():
+            raise ChecksumError("Download of %s has sha256 %s not %s" % (url, digest, sha256))
+        return size, digest
+    def probe(self, url, headers=None, timeout=None):
+        """ Return the seconds the server of the *url* takes to respond to a request for the first
+        byte, sending the extra *headers*.
+
+        :param url: url to probe
+        :param headers: optional dictionary of extra request headers
+        :param timeout: optional timeout in seconds
+        :return: latency in seconds
+        """
+        start = time.time()
+        with closing(self._pool.open(url, dict(headers or {}, Range="bytes=0-0"), 
+                                     timeout)) as response:
+            response.read(1)
+        return time.time() - start
+    def _range_support(self, url, headers, timeout):
+        """ Return the size and validator (ETag or Last-Modified) of the file at the *url* if the
+        server supports ranges.
+
+        :param url: url of the file
+        :param headers: optional dictionary of extra request headers
+        :param timeout: optional timeout in seconds
+        :return: tuple of size in bytes and validator, (None, None) if ranges are not supported
+        """
+        with closing(self._pool.open(url, dict(headers or {}, Range="bytes=0-0"), 
+                                     timeout)) as response:
+            match = re.match(r"bytes 0-0/(\d+)", response.info().getheader("Content-Range") or "")
+            if response.getcode() != 206 or match is None:
+                return None, None
+            response.read() # The one byte, so the connection can be reused
+            return int(match.group(1)), (response.info().getheader("ETag") or 
+                                         response.info().getheader("Last-Modified"))
+    def _connection_urls(self, urls, wanted):
+        """ Return the mirror url to fetch segments over for each of at most *wanted* connections,
+        taking the mirrors in turn and at most the free connections to each host.
+
+        :param urls: list of mirror urls of the file
+        :param wanted: most connections wanted
+        :return: list of urls, at least one
+        """
+        free = [self._pool.get_free(url) for url in urls]
+        connections = []
+        for turn in range(wanted):
+            for url, count in zip(urls, free):
+                if count is None or count > turn:
+                    connections.append(url)
+        return connections[:wanted] or urls[:1]
+    def _segment_state(self, url, part_path, size, validator):
+        """ Return the saved segments state of the .part file at *part_path* if the segmented
+        download of the *url* can be continued.
+
+        :param url: url being downloaded
+        :param part_path: path to the .part file
+        :param size: size in bytes of the file
+        :param validator: current validator of the file, None if there is none
+        :return: the state dictionary or None
+        """
+        if validator is None or not os.path.exists(part_path) or \
+                not os.path.exists(part_path + ".json"):
+            return None
+        try:
+            with open(part_path + ".json", "r") as state_file:
+                state = json.load(state_file)
+        except (IOError, ValueError):
+            return None
+        if state.get("segments") is None or state.get("url") != url or \
+                state.get("validator") != validator or state.get("size") != size or \
+                os.path.getsize(part_path) != size:
+            return None
+        logger.debug("Continuing the segmented download of %s" % url)
+        return state
+    def _fetch_segment(self, url, part_path, segment, validator, headers, timeout, end, transfer, 
+                       reporter, errors):
+        """ Download the remainder of the *segment* of the *url* into place in the .part file, 
+        errors are appended to *errors* rather than raised as this runs in a thread.
+
+        :param url: url of the file
+        :param part_path: path to the .part file
+        :param segment: list of the first byte, last byte and bytes done, updated as downloaded
+        :param validator: optional validator to send as If-Range
+        :param headers: optional dictionary of extra request headers
+        :param timeout: optional timeout in seconds for connecting and each read
+        :param end: optional time, as from time.time(), the segment must end by
+        :param transfer: :class:`rate_limiter.Transfer` the segment is part of
+        :param reporter: :class:`_SegmentProgress` to report to
+        :param errors: list to append errors to
+        """
+        start = segment[0] + segment[2]
+        request_headers = dict(headers or {}, Range="bytes=%i-%i" % (start, segment[1]))
+        if validator is not None:
+            request_headers["If-Range"] = validator
+        try:
+            with closing(self._pool.open(url, request_headers, timeout)) as response:
+                content_range = response.info().getheader("Content-Range") or ""
+                match = re.match(r"bytes (\d+)-(\d+)", content_range)
+                if response.getcode() != 206 or match is None or int(match.group(1)) != start:
+                    raise urllib2.URLError("Unexpected content range %s from %s" % 
+                                           (content_range, url))
+                with open(part_path, "r+b") as part_file:
+                    part_file.seek(start)
+                    while segment[0] + segment[2] <= segment[1]:
+                        chunk = response.read(min(CHUNK_SIZE, 
+                                                  segment[1] - segment[0] - segment[2] + 1))
+                        if not chunk:
+                            raise urllib2.URLError("Incomplete segment from %s" % url)
+                        part_file.write(chunk)
+                        segment[2] += len(chunk)
+                        reporter.report()
+                        transfer.consume(len(chunk))
+                        _check_end(end, url)
+        except IOError as error:
+            logger.warning("Segment %i-%i of %s failed" % (segment[0], segment[1], url), 
+                           exc_info=True)
+            errors.append(error)
+    def _resume_validators(self, url, part_path):
+        """ Return the validators of the .part file at *part_path* if it can be resumed.
+
+        :param url: url being downloaded
+        :param part_path: path to the .part file
+        :return: dictionary of validators or None
+        """
+        if not os.path.exists(part_path) or not os.path.exists(part_path + ".json"):
+            return None
+        try:
+            with open(part_path + ".json", "r") as validators_file:
+                validators = json.load(validators_file)
+        except (IOError, ValueError):
+            return None
+        if validators.get("url") != url or "segments" in validators or \
+                (validators.get("etag") is None and validators.get("last_modified") is None):
+            return None
+        logger.debug("Resuming %s from byte %i" % (url, os.path.getsize(part_path)))
+        return validators
+    def _resume_offset(self, response, offset):
+        """ Return the offset the *response* body starts at, the requested *offset* if the server
+        sent the requested range, otherwise 0 as the server sent the whole file.
+
+        :param response: open url response
+        :param offset: requested offset
+        :return: offset of the body
+        """
+        if offset == 0 or response.getcode() != 206:
+            return 0
+        content_range = response.info().getheader("Content-Range") or ""
+        match = re.match(r"bytes (\d+)-", content_range)
+        if match is None or int(match.group(1)) != offset:
+            raise urllib2.URLError("Unexpected content range %s" % content_range)
+        return offset
+    def _save_validators(self, url, part_path, response):
+        """ Save the validators of the *response* for the .part file at *part_path*.
+
+        :param url: url being downloaded
+        :param part_path: path to the .part file
+        :param response: open url response
+        """
+        validators = {"url" : url, "etag" : response.info().getheader("ETag"),
+                      "last_modified" : response.info().getheader("Last-Modified")}
+        if response.info().getheader("Accept-Ranges") == "none":
+            validators = {}
+        with open(part_path + ".json", "w") as validators_file:
+            json.dump(validators, validators_file)
+    def _stream(self, response, part_path, offset, transfer, progress=None, end=None):
+        """ Stream the *response* to the .part file at *part_path* from *offset* in chunks of
+        CHUNK_SIZE.
+
+        :param response: open url response
+        :param part_path: path to the .part file
+        :param offset: byte offset to write from, the file is truncated if 0
+        :param transfer: :class:`rate_limiter.Transfer` to limit the rate of
+        :param progress: optional progress function, see :meth:`fetch`
+        :param end: optional time, as from time.time(), the download must end by
+        :return: number of bytes in the file and its sha256 hex digest
+        """
+        total = response.info().getheader("Content-Length")
+        if total is not None:
+            total = int(total) + offset
+        sha256 = hashlib.sha256()
+        if offset > 0:
+            file_sha256(part_path, sha256)
+        downloaded = offset
+        start = time.time()
+        with open(part_path, "ab" if offset > 0 else "wb") as part_file:
+            while True:
+                chunk = response.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                part_file.write(chunk)
+                sha256.update(chunk)
+                downloaded += len(chunk)
+                transfer.consume(len(chunk))
+                if progress is not None:
+                    progress(downloaded, total,
+                             (downloaded - offset) / max(time.time() - start, 1e-6))
+                _check_end(end, response.geturl())
+        if total is not None and downloaded != total:
+            raise urllib2.URLError("Incomplete download, %i of %i bytes" % (downloaded, total))
+        return downloaded, sha256.hexdigest()
+    def _discard(self, part_path):
+        """ Remove the .part file at *part_path* and its validators, if they exist.
+
+        :param part_path: path to the .part file
+        """
+        for file_path in [part_path, part_path + ".json"]:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+
+class _SegmentProgress(object):
+    """ Reports the progress of all the segments of a download.
+
+    :param _segments: list of segments, each a list of the first byte, last byte and bytes done
+    :param _total: size in bytes of the file
+    :param _progress: progress function or None
+    :param _initial: bytes done before this download started
+    :param _start: time this download started
+    :param _lock: lock so that progress is reported by one segment at a time
+    """
+    def __init__(self, segments, total, progress):
+        """ Initialise with the *segments* of a file of *total* bytes and the *progress* function.
+
+        :param segments: list of segments
+        :param total: size in bytes of the file
+        :param progress: progress function or None
+        """
+        self._segments = segments
+        self._total = total
+        self._progress = progress
+        self._initial = self._done()
+        self._start = time.time()
+        self._lock = threading.Lock()
+    def report(self):
+        """ Report the progress of all the segments."""
+        if self._progress is None:
+            return
+        with self._lock:
+            done = self._done()
+            self._progress(done, self._total, 
+                           (done - self._initial) / max(time.time() - self._start, 1e-6))
+    def _done(self):
+        """ Return the bytes done in all segments."""
+        return sum(segment[2] for segment in self._segments)
+
+class _HashingStream(object):
+    """ File like object reading a response, hashing, rate limiting, reporting the progress of and
+    optionally saving the bytes as they are read.
+
+    :param _response: open url response
+    :param _transfer: :class:`rate_limiter.Transfer` to limit the rate of
+    :param _progress: progress function or None
+    :param _tee_file: open file to also write the bytes to, or None
+    :param _sha256: hashlib sha256 object of the bytes read
+    :param _total: bytes in the response, None if unknown
+    :param _downloaded: bytes read
+    :param _start: time the stream started
+    :param _end: time the stream must end by, None for no deadline
+    """
+    def __init__(self, response, transfer, progress=None, tee_file=None, end=None):
+        """ Initialise the stream of the *response*.
+
+        :param response: open url response
+        :param transfer: :class:`rate_limiter.Transfer` to limit the rate of
+        :param progress: optional progress function
+        :param tee_file: optional open file to also write the bytes to
+        :param end: optional time, as from time.time(), the stream must end by
+        """
+        self._response = response
+        self._transfer = transfer
+        self._progress = progress
+        self._tee_file = tee_file
+        self._sha256 = hashlib.sha256()
+        self._total = response.info().getheader("Content-Length")
+        if self._total is not None:
+            self._total = int(self._total)
+        self._downloaded = 0
+        self._start = time.time()
+        self._end = end
+    def read(self, size=CHUNK_SIZE):
+        """ Read at most *size* bytes.
+
+        :param size: number of bytes
+        :return: the bytes read, empty at the end of the response
+        """
+        chunk = self._response.read(size)
+        if not chunk:
+            return chunk
+        self._sha256.update(chunk)
+        if self._tee_file is not None:
+            self._tee_file.write(chunk)
+        self._downloaded += len(chunk)
+        self._transfer.consume(len(chunk))
+        if self._progress is not None:
+            self._progress(self._downloaded, self._total,
+                           self._downloaded / max(time.time() - self._start, 1e-6))
+        _check_end(self._end, self._response.geturl())
+        return chunk
+    def drain(self):
+        """ Read what remains of the response, e.g. padding the reader stopped before.
+
+        :return: number of bytes in the response and its sha256 hex digest
+        """
+        while self.read(CHUNK_SIZE):
+            pass
+        if self._total is not None and self._downloaded != self._total:
+            raise urllib2.URLError("Incomplete download, %i of %i bytes" % (self._downloaded, 
+                                                                             self._total))
+        return self._downloaded, self._sha256.hexdigest()
+
+def _check_end(end, url):
+    """ Raise a DeadlineError if the download of the *url* is still running at the *end* time.
+
+    :param end: time, as from time.time(), the download must end by, None for no deadline
+    :param url: url being downloaded
+    """
+    if end is not None and time.time() > end:
+        raise retry_policy.DeadlineError("Download of %s ran past its deadline" % url)
+
+def file_sha256(file_path, sha256=None):
+    """ Return the sha256 hash of the file at *file_path*, optionally updating the *sha256* hash.
+
+    :param file_path: path to the file
+    :param sha256: optional hashlib sha256 object to update
+    :return: the hashlib sha256 object
+    """
+    if sha256 is None:
+        sha256 = hashlib.sha256()
+    with open(file_path, "rb") as hashed_file:
+        for chunk in iter(lambda: hashed_file.read(1024 * 1024), ""):
+            sha256.update(chunk)
+    return sha256
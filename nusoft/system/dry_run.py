@@ -7,6 +7,7 @@
 # Author P G Jones - 2014-06-18 <p.g.jones@qmul.ac.uk> : New file.
 ####################################################################################################
 import system
+import types
 import logging
 logger = logging.getLogger(__name__)
 
@@ -59,19 +60,29 @@ class DryRun(system.System):
         file_path = self._file_path(file)
         self._file.write("Remove the file %s\n" % file_path)
         logger.debug("Removing file %s" % file_path)
-    def download(self, url, authenticate=False, name=None, retries=0):
+    def download(self, url, authenticate=False, name=None, retries=None, progress=None,
+                 sha256=None, segments=None):
         """ Download the *url* to a file called *name* in the temporary path, if *name* is not set
         will save to the url filename. If *authenticate* is True the credentials are queried and
-        required. Retry downloading *retries* number of times
+        required. Retry downloading as the *retries* policy allows
         
-        :param url: of the file to download
-        :type url: string
+        :param url: of the file to download, or list of mirror urls of the file
+        :type url: string or list of strings
         :param authenticate: True if authentication is required.
         :param name: optional name to save to in the temporary path
         :type name: string
-        :param retries: number of retries
-        :type retries: int
+        :param retries: optional number of retries or retry policy, defaults to the system policy
+        :type retries: int or :class:`nusoft.system.retry_policy.RetryPolicy`
+        :param progress: optional function called with the bytes downloaded, the total bytes (None 
+        if unknown) and the throughput in bytes per second after each chunk
+        :param sha256: optional expected sha256 hex digest of the file
+        :type sha256: string
+        :param segments: optional number of segments to download a large file in at once, 
+        defaults to the system setting
+        :type segments: int
         """
+        if isinstance(url, types.ListType): # Mirrors, the first would be tried
+            url = url[0]
         if name is None:
             name = url.split('/')[-1]
         target_path = self._file_path(name)
@@ -136,7 +147,7 @@ class DryRun(system.System):
         # Firstly setup the environment
         local_env = os.environ.copy()
         if env is not None:
-            pass
+            local_env.update(env)
         # Now open and run the shell_command
         shell_command = [command]
         if args is not None:
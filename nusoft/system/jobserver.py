@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+#
+# JobServer
+#
+# GNU make jobserver, so that concurrent builds share one job budget.
+#
+# Author agent - 2026-10-18 <agent@local> : New file.
+####################################################################################################
+import os
+import errno
+import logging
+logger = logging.getLogger(__name__)
+
+class JobServer(object):
+    """ A GNU make jobserver, a pipe holding a token for each job that may run beyond the first.
+    Make commands given the :meth:`get_environment` take a token from the pipe before starting
+    each job after their first, and return it when the job ends. Anything else that runs a make
+    at the same time as another, e.g. a second package building, must first :meth:`acquire` a
+    token, so that N jobs run in total however many makes run. Makes given their own -j, e.g.
+    builds capped at a number of jobs, do not use the jobserver and their jobs beyond the first
+    are not counted.
+
+    :param _jobs: the total number of jobs
+    :param _read: file descriptor of the read end of the pipe
+    :param _write: file descriptor of the write end of the pipe
+    """
+    def __init__(self, jobs):
+        """ Initialise a jobserver for *jobs* jobs in total.
+
+        :param jobs: the total number of jobs, at least 1
+        :type jobs: int
+        """
+        self._jobs = max(1, jobs)
+        self._read, self._write = os.pipe()
+        os.write(self._write, "+" * (self._jobs - 1))
+        logger.debug("Jobserver for %i jobs on pipe %i,%i" % (self._jobs, self._read, self._write))
+    def get_jobs(self):
+        """ Return the total number of jobs.
+
+        :return: number of jobs
+        :rtype: int
+        """
+        return self._jobs
+    def get_environment(self, env=None):
+        """ Return the *env* with MAKEFLAGS set so that make uses this jobserver. The options of
+        both GNU make 4.2 and later and of earlier versions are set.
+
+        :param env: optional dictionary of environment
+        :return: dictionary of environment
+        """
+        env = dict(env or {})
+        flags = "-j --jobserver-fds=%i,%i --jobserver-auth=%i,%i" % (self._read, self._write,
+                                                                    self._read, self._write)
+        env["MAKEFLAGS"] = (env.get("MAKEFLAGS", "") + " " + flags).strip()
+        return env
+    def acquire(self):
+        """ Take a token from the pipe, waiting until one is free.
+
+        :return: the token, to pass to :meth:`release`
+        """
+        while True:
+            try:
+                token = os.read(self._read, 1)
+            except OSError as error:
+                if error.errno == errno.EINTR:
+                    continue
+                raise
+            if token:
+                return token
+    def release(self, token):
+        """ Return the *token* to the pipe.
+
+        :param token: token from :meth:`acquire`
+        """
+        os.write(self._write, token)
+    def close(self):
+        """ Close the pipe."""
+        os.close(self._read)
+        os.close(self._write)
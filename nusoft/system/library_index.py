@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+#
+# LibraryIndex
+#
+# Index of the libraries and headers the compiler can find, to check libraries without compiling.
+#
+# Author agent - 2026-10-18 <agent@local> : New file.
+####################################################################################################
+import os
+import logging
+logger = logging.getLogger(__name__)
+
+# Flags that do not change which libraries or headers are found
+IGNORED_FLAG_PREFIXES = ["-D", "-O", "-W", "-f", "-g", "-m", "-pthread", "-std"]
+
+class LibraryIndex(object):
+    """ Index of the library files in the library search directories and the headers in the include
+    directories. Each directory is listed at most once, after which lookups are dictionary lookups.
+
+    :param _library_paths: list of library search directories
+    :param _include_paths: list of include search directories
+    :param _libraries: dictionary of sets of library file names keyed by directory
+    :param _headers: dictionary of header existence keyed by directory and header name tuples
+    """
+    def __init__(self, library_paths, include_paths, ldconfig_output=None):
+        """ Initialise the index with the *library_paths* and *include_paths*, and optionally the
+        output of ldconfig -p to add the dynamic linker directories.
+
+        :param library_paths: list of library search directories
+        :param include_paths: list of include search directories
+        :param ldconfig_output: optional output of ldconfig -p
+        :type ldconfig_output: string
+        """
+        self._library_paths = []
+        self._include_paths = []
+        self._libraries = {}
+        self._headers = {}
+        for path in library_paths:
+            self._add_path(self._library_paths, path)
+        for path in include_paths:
+            self._add_path(self._include_paths, path)
+        if ldconfig_output is not None:
+            for line in ldconfig_output.splitlines():
+                if "=>" in line:
+                    self._add_path(self._library_paths, os.path.dirname(line.split("=>")[1].strip()))
+        logger.debug("Library index paths are %r and include paths are %r" %
+                     (self._library_paths, self._include_paths))
+    def lookup(self, headers, flags):
+        """ Check if the *headers* and libraries in the *flags* can be found.
+
+        :param headers: list of header names with extension
+        :param flags: list of flags
+        :return: True if all are found, None if unsure
+        """
+        library_paths = list(self._library_paths)
+        include_paths = list(self._include_paths)
+        libraries = []
+        for flag in flags:
+            if flag.startswith("-l"):
+                libraries.append(flag[2:])
+            elif flag.startswith("-L"):
+                library_paths.insert(0, os.path.abspath(flag[2:]))
+            elif flag.startswith("-I"):
+                include_paths.insert(0, os.path.abspath(flag[2:]))
+            elif flag.startswith("-Wl,") or \
+                    not any(flag.startswith(prefix) for prefix in IGNORED_FLAG_PREFIXES):
+                logger.debug("Library index unsure of flag %s" % flag)
+                return None
+        for library in libraries:
+            if not any(self._has_library(path, library) for path in library_paths):
+                logger.debug("Library index cannot find library %s" % library)
+                return None
+        for header in headers:
+            if not any(self._has_header(path, header) for path in include_paths):
+                logger.debug("Library index cannot find header %s" % header)
+                return None
+        return True
+    def _has_library(self, path, library):
+        """ Check if the *library* is in the directory at *path*.
+
+        :param path: library directory
+        :param library: library name without the lib prefix or extension
+        :return: True if found
+        """
+        if path not in self._libraries:
+            try:
+                self._libraries[path] = set(os.listdir(path))
+            except OSError:
+                self._libraries[path] = set()
+        names = self._libraries[path]
+        return any(("lib%s%s" % (library, extension)) in names
+                   for extension in [".so", ".a", ".dylib"])
+    def _has_header(self, path, header):
+        """ Check if the *header* is in the directory at *path*.
+
+        :param path: include directory
+        :param header: header name with extension, optionally with leading directories
+        :return: True if found
+        """
+        key = (path, header)
+        if key not in self._headers:
+            self._headers[key] = os.path.isfile(os.path.join(path, header))
+        return self._headers[key]
+    def _add_path(self, paths, path):
+        """ Add the *path* to the *paths* if it is new and exists.
+
+        :param paths: list of paths
+        :param path: path to add
+        """
+        path = os.path.normpath(path)
+        if path != "" and path not in paths and os.path.isdir(path):
+            paths.append(path)
@@ -18,13 +18,14 @@ logger = logging.getLogger(__name__)
 
 class Mac(standard.Standard):
     """ The mac system implementation"""
-    def __init__(self, install_path):
+    def __init__(self, install_path, **kwargs):
         """ Initialise the system with an *install_path*
 
         :param install_path: Location to install to
         :type install_path: string
+        :param kwargs: optional system settings, see :class:`system.System`
         """
-        super(Mac, self).__init__(install_path)
+        super(Mac, self).__init__(install_path, **kwargs)
         # Now check for various installation locations and add to the c++ paths
         # Check if XCode in 10.7 installs X11 to /usr/X11
         if os.path.exists("/usr/X11"):
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+#
+# MirrorRanking
+#
+# Ranks download mirrors by latency, remembering the ranking for a period.
+#
+# Author agent - 2026-10-18 <agent@local> : New file.
+####################################################################################################
+import os
+import json
+import time
+import urlparse
+import threading
+import logging
+logger = logging.getLogger(__name__)
+
+class MirrorRanking(object):
+    """ Ranks mirror urls by the latency of their server, fastest first. Latencies are measured
+    by a probe function and saved to a file, measurements older than the time to live are measured
+    again. Servers that fail are ranked last until measured again.
+
+    :param _file_path: path to the ranking file
+    :param _ttl: seconds a latency measurement is used for
+    :param _latencies: dictionary of latency (None if failed) and time dictionaries keyed by server
+    :param _lock: lock guarding the latencies and the file
+    """
+    def __init__(self, file_path, ttl):
+        """ Initialise the ranking from the file at *file_path*, using measurements for *ttl*
+        seconds.
+
+        :param file_path: path to the ranking file
+        :type file_path: string
+        :param ttl: seconds a latency measurement is used for
+        """
+        self._file_path = file_path
+        self._ttl = ttl
+        self._latencies = {}
+        self._lock = threading.Lock()
+        if os.path.exists(file_path):
+            try:
+                with open(file_path, "r") as ranking_file:
+                    self._latencies = json.load(ranking_file)
+            except (IOError, ValueError):
+                logger.warning("Mirror ranking %s is unreadable, ignoring it" % file_path)
+    def rank(self, urls, probe):
+        """ Return the *urls* ordered by the latency of their server, fastest first. Servers
+        without a current measurement are measured with *probe*, failed servers are last.
+
+        :param urls: list of mirror urls of the same file
+        :param probe: function taking a url and returning its latency in seconds, raising an
+        IOError if the server fails
+        :return: list of urls
+        """
+        if len(urls) <= 1:
+            return list(urls)
+        latencies = {}
+        for url in urls:
+            latencies[url] = self._latency(url, probe)
+        ranked = sorted(urls, key=lambda url: (latencies[url] is None, latencies[url]))
+        logger.debug("Mirrors ranked %r" % ranked)
+        return ranked
+    def record_failure(self, url):
+        """ Record that the server of the *url* failed, so it is ranked last.
+
+        :param url: url that failed
+        """
+        self._record(_server(url), None)
+    def _latency(self, url, probe):
+        """ Return the latency of the server of the *url*, measuring it with *probe* if needed.
+
+        :param url: mirror url
+        :param probe: function taking a url and returning its latency in seconds
+        :return: latency in seconds or None if the server failed
+        """
+        server = _server(url)
+        with self._lock:
+            entry = self._latencies.get(server)
+        if entry is not None and time.time() - entry["time"] < self._ttl:
+            return entry["latency"]
+        try:
+            latency = probe(url)
+        except IOError:
+            logger.warning("Mirror %s failed to respond" % server, exc_info=True)
+            latency = None
+        self._record(server, latency)
+        return latency
+    def _record(self, server, latency):
+        """ Record the *latency* of the *server* and save the ranking.
+
+        :param server: scheme and host of the server
+        :param latency: latency in seconds or None if the server failed
+        """
+        with self._lock:
+            self._latencies[server] = {"latency" : latency, "time" : time.time()}
+            self._save()
+    def _save(self):
+        """ Save the latencies to the ranking file, the file is replaced atomically."""
+        directory = os.path.dirname(self._file_path)
+        try:
+            if not os.path.exists(directory):
+                os.makedirs(directory)
+            temp_path = "%s.%i" % (self._file_path, os.getpid())
+            with open(temp_path, "w") as ranking_file:
+                json.dump(self._latencies, ranking_file)
+            os.rename(temp_path, self._file_path)
+        except (IOError, OSError):
+            logger.exception("Cannot save the mirror ranking to %s" % self._file_path,
+                             exc_info=True)
+
+def _server(url):
+    """ Return the scheme and host of the *url*.
+
+    :param url: url to parse
+    :return: scheme://host[:port]
+    """
+    parsed = urlparse.urlparse(url)
+    return "%s://%s" % (parsed.scheme, parsed.netloc)
@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+#
+# Placement
+#
+# Places files at a new path with as little copying as the filesystem allows.
+#
+# Author agent - 2026-10-18 <agent@local> : New file.
+####################################################################################################
+import os
+import sys
+import errno
+import shutil
+import logging
+logger = logging.getLogger(__name__)
+try:
+    import fcntl
+except ImportError: # Not on this system
+    fcntl = None
+try:
+    import ctypes
+    import ctypes.util
+    _libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+except (ImportError, OSError, TypeError): # No C library to call
+    _libc = None
+
+# Linux ioctl to share the blocks of one file with another, _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+# Bytes to ask the kernel to copy at a time
+COPY_SIZE = 1024 ** 3
+# Errors meaning a copy method is not supported for these files
+UNSUPPORTED_ERRORS = [errno.EXDEV, errno.EOPNOTSUPP, errno.ENOTTY, errno.EINVAL, errno.ENOSYS,
+                      errno.EBADF, errno.EPERM, errno.ENOTSUP]
+
+def place(source_path, target_path, move=False, shared=False):
+    """ Place the file at *source_path* at *target_path*, replacing any file there. The cheapest
+    method that works is used, in order: rename if *move* is True, a hard link if the source is
+    *shared* read only content (e.g. in the download cache) that is never changed in place, a
+    reflink sharing the blocks of the source, a copy within the kernel and lastly a plain copy.
+    Like shutil.copyfile, copies do not keep the source permissions.
+
+    :param source_path: path to the file
+    :param target_path: path to place the file at
+    :param move: True if the source file is not needed afterwards
+    :param shared: True if the source is read only and may be shared by a hard link
+    :return: name of the method used, rename, link, reflink, copy_file_range, sendfile or copy
+    :rtype: string
+    """
+    if move:
+        try:
+            os.rename(source_path, target_path)
+            return _placed(source_path, target_path, "rename")
+        except OSError as error:
+            if error.errno != errno.EXDEV: # Only another filesystem is expected
+                raise
+    if shared:
+        try:
+            if os.path.lexists(target_path):
+                os.remove(target_path)
+            os.link(source_path, target_path)
+            return _placed(source_path, target_path, "link")
+        except OSError as error:
+            if error.errno not in UNSUPPORTED_ERRORS + [errno.EMLINK]:
+                raise
+    with open(source_path, "rb") as source_file:
+        with open(target_path, "wb") as target_file:
+            for method, copy in [("reflink", _reflink), ("copy_file_range", _copy_file_range),
+                                 ("sendfile", _sendfile), ("copy", _copy)]:
+                if copy(source_file, target_file):
+                    break
+    if move:
+        os.remove(source_path)
+    return _placed(source_path, target_path, method)
+
+def _placed(source_path, target_path, method):
+    """ Log the placement of *source_path* at *target_path* by *method* and return the *method*."""
+    logger.debug("Placed %s at %s by %s" % (source_path, target_path, method))
+    return method
+
+def _reflink(source_file, target_file):
+    """ Make the empty *target_file* share the blocks of the *source_file*.
+
+    :return: True if supported
+    """
+    if fcntl is None or not sys.platform.startswith("linux"):
+        return False
+    try:
+        fcntl.ioctl(target_file.fileno(), FICLONE, source_file.fileno())
+        return True
+    except IOError as error:
+        if error.errno not in UNSUPPORTED_ERRORS:
+            raise
+        return False
+
+def _copy_file_range(source_file, target_file):
+    """ Copy the *source_file* to the empty *target_file* within the kernel, which may share
+    blocks on filesystems that support it.
+
+    :return: True if supported
+    """
+    if _libc is None or not sys.platform.startswith("linux") or \
+            not hasattr(_libc, "copy_file_range"):
+        return False
+    copy_file_range = _libc.copy_file_range
+    copy_file_range.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_int, ctypes.c_void_p,
+                                ctypes.c_size_t, ctypes.c_uint]
+    copy_file_range.restype = ctypes.c_ssize_t
+    return _kernel_copy(lambda: copy_file_range(source_file.fileno(), None, target_file.fileno(),
+                                                None, COPY_SIZE, 0))
+
+def _sendfile(source_file, target_file):
+    """ Copy the *source_file* to the empty *target_file* within the kernel.
+
+    :return: True if supported
+    """
+    if _libc is None or not sys.platform.startswith("linux") or not hasattr(_libc, "sendfile"):
+        return False
+    sendfile = _libc.sendfile
+    sendfile.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_void_p, ctypes.c_size_t]
+    sendfile.restype = ctypes.c_ssize_t
+    return _kernel_copy(lambda: sendfile(target_file.fileno(), source_file.fileno(), None,
+                                         COPY_SIZE))
+
+def _kernel_copy(call):
+    """ Repeat the kernel copy *call*, which returns the bytes copied, until it copies nothing.
+
+    :return: True if supported, False if unsupported before anything was copied
+    """
+    copied = 0
+    while True:
+        result = call()
+        if result == 0:
+            return True
+        if result < 0:
+            error = ctypes.get_errno()
+            if copied == 0 and error in UNSUPPORTED_ERRORS:
+                return False
+            raise OSError(error, os.strerror(error))
+        copied += result
+
+def _copy(source_file, target_file):
+    """ Copy the *source_file* to the *target_file* in user space.
+
+    :return: True
+    """
+    shutil.copyfileobj(source_file, target_file, 1024 * 1024)
+    return True
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+#
+# RateLimiter
+#
+# Limits the total rate of all downloads, sharing it between concurrent transfers.
+#
+# Author agent - 2026-10-18 <agent@local> : New file.
+####################################################################################################
+import re
+import time
+import threading
+import logging
+logger = logging.getLogger(__name__)
+
+# Multipliers of the rate suffixes
+RATE_SUFFIXES = {"" : 1, "k" : 1024, "m" : 1024 ** 2, "g" : 1024 ** 3}
+
+class RateLimiter(object):
+    """ Token bucket limiting the bytes per second of all transfers together. Transfers take
+    tokens for each chunk they read and wait once the bucket is empty. Whilst several transfers
+    are active no single transfer may take more than (1 - reserve) of the rate, so a large
+    transfer cannot starve the others.
+
+    :param _rate: bytes per second, None for no limit
+    :param _reserve: fraction of the rate kept for other transfers, between 0 and 1
+    :param _tokens: bytes that can be read now, negative if transfers are waiting
+    :param _updated: time the tokens were last updated
+    :param _transfers: list of the active transfers
+    :param _lock: lock guarding the tokens and transfers
+    """
+    def __init__(self, rate=None, reserve=0.0):
+        """ Initialise the limiter with a *rate* and *reserve*.
+
+        :param rate: bytes per second, None or 0 for no limit
+        :param reserve: fraction of the rate kept for other transfers, between 0 and 1
+        """
+        if rate is not None and rate <= 0:
+            rate = None
+        self._rate = rate
+        self._reserve = reserve
+        self._tokens = float(rate or 0)
+        self._updated = time.time()
+        self._transfers = []
+        self._lock = threading.Lock()
+        if rate is not None:
+            logger.debug("Limiting downloads to %i bytes per second" % rate)
+    def transfer(self):
+        """ Return a new transfer, use it as a context manager around the transfer.
+
+        :return: the transfer
+        :rtype: :class:`Transfer`
+        """
+        return Transfer(self)
+    def consume(self, size, transfer):
+        """ Take *size* bytes for the *transfer*, waiting if the rate is exceeded.
+
+        :param size: number of bytes read
+        :param transfer: the transfer reading them
+        """
+        if self._rate is None:
+            return
+        with self._lock:
+            now = time.time()
+            self._tokens = min(self._rate, self._tokens + (now - self._updated) * self._rate)
+            self._updated = now
+            self._tokens -= size
+            wait = max(0.0, -self._tokens / self._rate)
+            if self._reserve > 0 and len(self._transfers) > 1:
+                wait = max(wait, transfer.take(size, self._rate * (1.0 - self._reserve), now))
+        if wait > 0:
+            time.sleep(wait)
+    def _start(self, transfer):
+        """ Add the *transfer* to the active transfers."""
+        with self._lock:
+            self._transfers.append(transfer)
+    def _end(self, transfer):
+        """ Remove the *transfer* from the active transfers."""
+        with self._lock:
+            self._transfers.remove(transfer)
+
+class Transfer(object):
+    """ A transfer sharing the rate of a :class:`RateLimiter`, with its own token bucket for the
+    share of the rate it can take whilst other transfers are active.
+
+    :param _limiter: the rate limiter
+    :param _tokens: bytes this transfer can read now
+    :param _updated: time the tokens were last updated, None if never
+    """
+    def __init__(self, limiter):
+        """ Initialise the transfer for the *limiter*.
+
+        :param limiter: the rate limiter
+        """
+        self._limiter = limiter
+        self._tokens = 0.0
+        self._updated = None
+    def __enter__(self):
+        self._limiter._start(self)
+        return self
+    def __exit__(self, type, value, traceback):
+        self._limiter._end(self)
+    def consume(self, size):
+        """ Take *size* bytes, waiting if the rate is exceeded.
+
+        :param size: number of bytes read
+        """
+        self._limiter.consume(size, self)
+    def take(self, size, rate, now):
+        """ Take *size* bytes from this transfer's bucket at *rate*, called with the limiter lock.
+
+        :param size: number of bytes read
+        :param rate: bytes per second this transfer can take
+        :param now: the current time
+        :return: seconds to wait
+        """
+        if self._updated is None:
+            self._tokens = rate
+        else:
+            self._tokens = min(rate, self._tokens + (now - self._updated) * rate)
+        self._updated = now
+        self._tokens -= size
+        return max(0.0, -self._tokens / rate)
+
+def parse_rate(text):
+    """ Return the bytes per second of the rate *text*, a number optionally followed by k, M or G
+    for kibi, mebi or gibi bytes, e.g. 500k or 2M. A rate of 0 means no limit.
+
+    :param text: the rate
+    :return: bytes per second, None if the text is None, empty or 0
+    """
+    if text is None or text.strip() == "":
+        return None
+    match = re.match(r"^\s*([0-9.]+)\s*([kmg]?)\s*$", text.lower())
+    if match is None:
+        raise ValueError("Cannot understand the rate %s" % text)
+    rate = int(float(match.group(1)) * RATE_SUFFIXES[match.group(2)])
+    if rate == 0:
+        return None
+    return rate
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+#
+# RetryPolicy
+#
+# Decides how often and when to retry failed downloads.
+#
+# Author agent - 2026-10-18 <agent@local> : New file.
+####################################################################################################
+import time
+import random
+import urllib2
+import logging
+logger = logging.getLogger(__name__)
+
+# HTTP status codes that may succeed if retried, other HTTP errors will not
+RETRY_STATUS_CODES = [408, 429, 500, 502, 503, 504]
+
+class DeadlineError(IOError):
+    """ Raised when an attempt is still running at the deadline, it is not retried."""
+    pass
+
+class RetryPolicy(object):
+    """ Retries a failed attempt after an exponentially growing, randomly shortened (jittered)
+    delay. Each attempt has a timeout, the longest an attempt may stall waiting to connect or for
+    the next bytes, and all the attempts together must finish by a deadline. Attempts are given
+    the time the deadline ends at and must raise a :class:`DeadlineError` if still running then.
+
+    :param _retries: number of retries after the first attempt
+    :param _backoff: delay in seconds before the first retry, doubling for each retry
+    :param _max_backoff: longest delay in seconds between attempts
+    :param _jitter: fraction of each delay that is random, between 0 and 1
+    :param _timeout: stall timeout in seconds of each attempt, None for no timeout
+    :param _deadline: seconds all attempts must finish within, None for no deadline
+    """
+    def __init__(self, retries=3, backoff=1.0, max_backoff=60.0, jitter=0.5, timeout=60.0,
+                 deadline=None):
+        """ Initialise the policy.
+
+        :param retries: number of retries after the first attempt
+        :type retries: int
+        :param backoff: delay in seconds before the first retry
+        :param max_backoff: longest delay in seconds between attempts
+        :param jitter: fraction of each delay that is random, between 0 and 1
+        :param timeout: stall timeout in seconds of each attempt, None for no timeout
+        :param deadline: seconds all attempts must finish within, None for no deadline
+        """
+        self._retries = retries
+        self._backoff = backoff
+        self._max_backoff = max_backoff
+        self._jitter = jitter
+        self._timeout = timeout
+        self._deadline = deadline
+    def with_retries(self, retries):
+        """ Return a copy of this policy with a different number of *retries*.
+
+        :param retries: number of retries after the first attempt
+        :type retries: int
+        :return: the new policy
+        :rtype: :class:`RetryPolicy`
+        """
+        return RetryPolicy(retries, self._backoff, self._max_backoff, self._jitter, self._timeout,
+                           self._deadline)
+    def get_retries(self):
+        """ Return the number of retries after the first attempt.
+
+        :return: the number of retries
+        :rtype: int
+        """
+        return self._retries
+    def delay(self, retry):
+        """ Return the delay in seconds before the *retry*, counting from 0.
+
+        :param retry: index of the retry
+        :type retry: int
+        :return: the delay in seconds
+        """
+        delay = min(self._max_backoff, self._backoff * (2 ** retry))
+        return delay * (1.0 - self._jitter * random.random())
+    def call(self, attempt, description="attempt"):
+        """ Call *attempt* with the timeout in seconds for the attempt and the time it must end by,
+        retrying if it raises an IOError that may not happen again. The last error is raised if
+        every attempt fails.
+
+        :param attempt: function taking the timeout, None for no timeout, and the end time as from
+        time.time(), None for no deadline
+        :param description: description of the attempt to log
+        :return: the result of the successful attempt
+        """
+        start = time.time()
+        end = None
+        if self._deadline is not None:
+            end = start + self._deadline
+        retry = 0
+        while True:
+            timeout = self._timeout
+            if end is not None:
+                remaining = end - time.time()
+                timeout = remaining if timeout is None else min(timeout, remaining)
+            try:
+                return attempt(timeout, end)
+            except IOError as error:
+                if not self._is_retryable(error) or retry >= self._retries:
+                    raise
+                delay = self.delay(retry)
+                if self._deadline is not None and \
+                        time.time() - start + delay >= self._deadline:
+                    logger.warning("No time left to retry %s" % description)
+                    raise
+                logger.warning("Retrying %s in %.1fs after %s" % (description, delay, error))
+                time.sleep(delay)
+                retry += 1
+    def _is_retryable(self, error):
+        """ Check if the *error* may not happen again.
+
+        :param error: the error an attempt raised
+        :return: True if the attempt should be retried
+        """
+        if isinstance(error, DeadlineError):
+            return False
+        if isinstance(error, urllib2.HTTPError):
+            return error.code in RETRY_STATUS_CODES
+        return True
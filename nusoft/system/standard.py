@@ -7,25 +7,83 @@
 # Author P G Jones - 2014-02-22 <p.g.jones@qmul.ac.uk> : New file.
 ####################################################################################################
 import system
+import library_index
+import downloader
+import connection_pool
+import placement
+import archive
+import jobserver
+import retry_policy
 import os
 import shutil
-import tarfile
-import urllib2
 import base64
 import subprocess
-from contextlib import closing
+import tempfile
+import hashlib
+import json
+import threading
+import types
 import logging
 logger = logging.getLogger(__name__)
 
+# Seconds to wait for a mirror to respond when ranking mirrors
+MIRROR_PROBE_TIMEOUT = 10.0
+
 class Standard(system.System):
-    """ The standard system implementation"""
-    def __init__(self, install_path):
+    """ The standard system implementation
+
+    :param _compilation_results: compilation test results keyed by headers and flags tuple
+    :param _compilation_queue: compilation tests to run in the next batch
+    :param _compilation_lock: lock guarding the compilation results and queue
+    :param _library_index: index of the libraries and headers the compiler can find
+    :param _path_listings: dictionary of sets of file names keyed by PATH directory
+    :param _downloader: downloads files, resuming failed downloads
+    :param _connection_pool: persistent connections shared by all downloads
+    :param _deferred: dictionary of downloads to stream when untarred, keyed by file path
+    """
+    def __init__(self, install_path, **kwargs):
         """ Initialise the system with an *install_path*
 
         :param install_path: Location to install to
         :type install_path: string
+        :param kwargs: optional system settings, see :class:`system.System`
         """
-        super(Standard, self).__init__(install_path)
+        super(Standard, self).__init__(install_path, **kwargs)
+        self._compilation_results = {}
+        self._compilation_queue = []
+        self._compilation_lock = threading.Lock()
+        self._library_index = None
+        self._path_listings = {}
+        self._connection_pool = connection_pool.ConnectionPool(self._connections_per_host)
+        self._downloader = downloader.Downloader(self._connection_pool, self._rate_limiter)
+        self._deferred = {}
+        self._jobserver = jobserver.JobServer(self.get_make_jobs())
+    def close(self):
+        """ Close the download connections and the jobserver pipe."""
+        self._connection_pool.close()
+        self._jobserver.close()
+####################################################################################################
+# Probe commands
+    def probe_fingerprint(self, commands=None, data=None):
+        """ Return a fingerprint of everything that can change a probe result, the search paths,
+        the location and modification time of each of the *commands* and the *data*.
+
+        :param commands: optional list of commands the result depends on
+        :type commands: list of strings
+        :param data: optional json serialisable data the result depends on
+        :return: the fingerprint
+        :rtype: string
+        """
+        parts = [os.environ.get(key, "") for key in ["PATH", "LIBRARY_PATH", "LD_LIBRARY_PATH", 
+                                                     "CPLUS_INCLUDE_PATH", "C_INCLUDE_PATH"]]
+        for command in (commands or []):
+            location = self.which(command)
+            if location is None:
+                parts.append([command, None])
+            else:
+                parts.append([command, location, os.path.getmtime(location)])
+        parts.append(data)
+        return hashlib.sha1(json.dumps(parts, sort_keys=True)).hexdigest()
 ####################################################################################################
 # Comamnds to alter/create files
     def exists(self, file):
@@ -68,42 +126,111 @@ class Standard(system.System):
         file_path = self._file_path(file)
         os.chmod(file_path, value)
         logger.debug("Setting chmod of %s to %s" % (file_path, value))
-    def download(self, url, authenticate=False, name=None, retries=0):
+    def download(self, url, authenticate=False, name=None, retries=None, progress=None,
+                 sha256=None, segments=None):
         """ Download the *url* to a file called *name* in the temporary path, if *name* is not set
         will save to the url filename. If *authenticate* is True the credentials are queried and
-        required. Retry downloading *retries* number of times
+        required. Retry downloading as the *retries* policy allows. The file is streamed in chunks 
+        to a .part file which is renamed when complete, a failed download is continued from the 
+        .part file on retry, or next time, if the server allows. Files are checked against the 
+        *sha256* digest if given, and are taken from and added to the download cache unless 
+        authentication is required. If *url* is a list of mirrors they are tried fastest first.
+        When streaming, tarballs are not downloaded until they are untarred, see :meth:`untar`.
         
-        :param url: of the file to download
-        :type url: string
+        :param url: of the file to download, or list of mirror urls of the file
+        :type url: string or list of strings
         :param authenticate: True if authentication is required.
         :param name: optional name to save to in the temporary path
         :type name: string
-        :param retries: number of retries
-        :type retries: int
+        :param retries: optional number of retries or retry policy, defaults to the system policy
+        :type retries: int or :class:`nusoft.system.retry_policy.RetryPolicy`
+        :param progress: optional function called with the bytes downloaded, the total bytes (None 
+        if unknown) and the throughput in bytes per second after each chunk
+        :param sha256: optional expected sha256 hex digest of the file
+        :type sha256: string
+        :param segments: optional number of segments to download a large file in at once, 
+        defaults to the system setting
+        :type segments: int
         """
+        urls = url if isinstance(url, types.ListType) else [url]
         if name is None:
-            name = url.split('/')[-1]
+            name = urls[0].split('/')[-1]
         target_path = self._file_path(name)
         if self.exists(target_path):
-            return
-        url_request = urllib2.Request(url)
+            if sha256 is None or downloader.file_sha256(target_path).hexdigest() == sha256.lower():
+                return
+            logger.warning("%s does not match its sha256, downloading it again" % target_path)
+            self.remove(target_path)
+        if not authenticate and self._download_cache is not None:
+            for mirror in urls:
+                cache_path = self._download_cache.lookup(mirror, sha256)
+                if cache_path is not None:
+                    placement.place(cache_path, target_path, shared=True)
+                    logger.debug("Placed %s at %s from the download cache" % (mirror, target_path))
+                    return
+        headers = {}
         if authenticate: # HTTP authentication needed
             credentials = self._credentials.authenticate()
             if type(credentials) is tuple:
-                b64string = base64.encodestring('%s:%s' % credentials)
-                url_request.add_header("Authorization", "Basic %s" % b64string)
+                b64string = base64.encodestring('%s:%s' % credentials).replace('\n', '')
+                headers["Authorization"] = "Basic %s" % b64string
             else:
-                url_request.add_header("Authorization", "token %s" % credentials)
+                headers["Authorization"] = "token %s" % credentials
+        urls = self._mirror_ranking.rank(urls, lambda mirror: self._downloader.probe(
+                mirror, headers, MIRROR_PROBE_TIMEOUT))
+        policy = self.get_retry_policy(retries)
+        if self._stream and archive.is_streamable(name):
+            self._deferred[target_path] = (urls, headers, progress, policy, sha256, authenticate)
+            logger.debug("Deferring the download of %s until it is untarred" % urls[0])
+            return
+        if segments is None:
+            segments = self._segments
         try:
-            remote_file = urllib2.urlopen(url_request)
-            with open(target_path, 'wb') as local_file:
-                local_file.write(remote_file.read())
-            remote_file.close()
-        except urllib2.URLError as error: # No internet connection
-            logger.exception("Tried to download %s to %s" % (url, target_path), exc_info=True)
-            self.remove(target_path)
+            size, digest = policy.call(lambda timeout, end: self._fetch_mirrors(urls, target_path, 
+                                                                                 headers, progress,
+                                                                                 timeout, sha256,
+                                                                                 segments, end),
+                                       "download of %s" % urls[0])
+        except IOError as error: # No internet connection or the connection dropped
+            logger.exception("Tried to download %s to %s" % (urls[0], target_path), exc_info=True)
             raise
-        logger.debug("Downloaded %s to %s" % (url, target_path))
+        logger.debug("Downloaded %s to %s, %i bytes with sha256 %s" % (urls[0], target_path, size, 
+                                                                       digest))
+        if not authenticate and self._download_cache is not None:
+            self._download_cache.store(urls[0], target_path, digest)
+    def _fetch_mirrors(self, urls, target_path, headers, progress, timeout, sha256, segments, 
+                       end):
+        """ Download from each of the mirror *urls* in turn until one succeeds, or in *segments*
+        from the mirrors if more than one and the file is large enough, see 
+        :meth:`downloader.Downloader.fetch` for the arguments.
+
+        :return: number of bytes in the file and its sha256 hex digest
+        """
+        if segments > 1:
+            result = self._downloader.fetch_segmented(urls, target_path, segments, headers, 
+                                                      progress, timeout, sha256, end)
+            if result is not None:
+                return result
+        return self._each_mirror(urls, lambda url: self._downloader.fetch(url, target_path, 
+                                                                          headers, progress, 
+                                                                          timeout, sha256, end))
+    def _each_mirror(self, urls, fetch):
+        """ Call *fetch* with each of the mirror *urls* in turn until one succeeds, or the 
+        deadline passes.
+
+        :param urls: list of mirror urls
+        :param fetch: function taking a url
+        :return: the result of *fetch*
+        """
+        for index, url in enumerate(urls):
+            try:
+                return fetch(url)
+            except IOError as error:
+                if index == len(urls) - 1 or isinstance(error, retry_policy.DeadlineError):
+                    raise
+                self._mirror_ranking.record_failure(url)
+                logger.warning("Download from %s failed, trying %s" % (url, urls[index + 1]),
+                               exc_info=True)
     def git_clone(self, url, target):
         """ Git clone the repository at *url* to the *target* path.
 
@@ -137,7 +264,11 @@ class Standard(system.System):
             return False # cannot update the repo
     def untar(self, file, target, strip_depth=0):
         """ Untar the *file* to *target*, the *file* is assumed to be in the temporary directory.
-        Optionally strip the *strip_depth* of leading directories in the tar *file*.
+        Optionally strip the *strip_depth* of leading directories in the tar *file*, members are
+        renamed as they are read so the archive is extracted in one pass straight to *target*. If
+        the download of the *file* was deferred it is extracted as it downloads instead. Tar 
+        archives compressed with gzip, bzip2, xz or zstd, and zip archives are supported, see 
+        :func:`archive.extract`.
 
         :param file: name of the file
         :type file: string
@@ -148,27 +279,54 @@ class Standard(system.System):
         """
         file_path = self._file_path(file)
         target_path = self._file_path(target)
+        deferred = self._deferred.pop(file_path, None)
+        if deferred is not None:
+            self._stream_untar(deferred, file_path, target_path, strip_depth)
+            return
         if self.exists(target_path):
             self.remove(target_path)
-        if strip_depth == 0: # Untar directly into target
-            with closing(tarfile.open(file_path)) as tar_file:
-                tar_file.extractall(target_path)
-        else: # Must extract to temp target then copy strip directory to real target
-            temp_path = self._file_path("tartemp")
-            if self.exists(temp_path): # Delete it
-                self.remove(temp_path)
-            os.makedirs(temp_path)
-            with closing(tarfile.open(file_path)) as tar_file:
-                tar_file.extractall(temp_path)
-            copy_path = temp_path
-            for depth in range(0, strip_depth):
-                sub_folders = os.listdir(copy_path)
-                if 'pax_global_header' in sub_folders:
-                    sub_folders.remove('pax_global_header')
-                copy_path = os.path.join(copy_path, sub_folders[0])
-            shutil.copytree(copy_path, target_path)
-            self.remove(temp_path)
+        archive.extract(file_path, target_path, strip_depth, which=self.which)
         logger.debug("Untaring file %s to %s, with %i stripped" % (file_path, target_path, strip_depth))
+    def _stream_untar(self, deferred, file_path, target_path, strip_depth):
+        """ Download the *deferred* tarball and extract it to *target_path* as it arrives, 
+        stripping *strip_depth* leading directories. Unless authentication is required the tarball
+        is also saved in the download cache, if there is one, so nothing else is written. A failed
+        or mismatching download is extracted again from scratch.
+
+        :param deferred: tuple of the download urls, headers, progress, retry policy, sha256 and 
+        authenticate arguments
+        :param file_path: path the tarball would have been downloaded to
+        :param target_path: target location, absolute path
+        :param strip_depth: number of leading directories to strip
+        """
+        urls, headers, progress, policy, sha256, authenticate = deferred
+        tee_path = None
+        if not authenticate and self._download_cache is not None:
+            try:
+                tee_path = self._download_cache.make_temporary()
+            except (IOError, OSError): # The cache is an optimisation, stream without it
+                logger.warning("Cannot save %s in the download cache" % urls[0], exc_info=True)
+        def extract(stream):
+            if self.exists(target_path):
+                self.remove(target_path)
+            archive.extract(stream, target_path, strip_depth, name=file_path, which=self.which)
+        try:
+            size, digest = policy.call(lambda timeout, end: self._each_mirror(
+                    urls, lambda url: self._downloader.fetch_stream(url, extract, headers, progress,
+                                                                    timeout, sha256, tee_path, 
+                                                                    end)),
+                                       "streamed download of %s" % urls[0])
+        except Exception: # Never leave a partial or unverified extraction
+            logger.exception("Tried to stream %s to %s" % (urls[0], target_path), exc_info=True)
+            self.remove(target_path)
+            if tee_path is not None:
+                self.remove(tee_path)
+            raise
+        if tee_path is not None:
+            self._download_cache.store(urls[0], tee_path, digest, move=True)
+            self.remove(tee_path)
+        logger.debug("Streamed %s to %s, %i bytes with sha256 %s, with %i stripped" % 
+                     (urls[0], target_path, size, digest, strip_depth))
     def configure(self, command='./configure', args=None, cwd=None, env=None):
         """ Run a configure *command* in the *cwd* directory with arguments, *args* and optional *env*, 
         environment.
@@ -190,9 +348,12 @@ class Standard(system.System):
         if not result[0]:
             raise Exception("Configuration failed")
         return result
-    def make(self, command='make', args=None, cwd=None, env=None):
+    def make(self, command='make', args=None, cwd=None, env=None, max_jobs=None):
         """ Run a make *command* in the *cwd* directory with arguments, *args* and optional *env*, 
-        environment.
+        environment. Make takes its jobs from the jobserver shared by all builds, unless the build
+        is limited to *max_jobs* when it is given -j :meth:`get_make_jobs`, or the *args* set them.
+        A -j1 build runs within the job its package holds, but larger limits and jobs set by the
+        *args* run outside the jobserver's budget, on top of the jobs of the other builds.
         
         :param command: optional command to execute
         :type command: string
@@ -202,10 +363,18 @@ class Standard(system.System):
         :type cwd: string
         :param env: optional dictionary of environment 
         :type env: dictionary of keys with values, all strings
+        :param max_jobs: optional most jobs the build can run
+        :type max_jobs: int
         :return: standard output from command
         :rtype: string
         :raises Exception: if the make fails
         """
+        args = list(args or [])
+        if not any(arg.startswith("-j") or arg.startswith("--jobs") for arg in args):
+            if max_jobs is None and self._jobserver is not None:
+                env = self._jobserver.get_environment(env)
+            else:
+                args.insert(0, "-j%i" % self.get_make_jobs(max_jobs))
         logger.debug("Make via command %s" % command)
         result = self.execute(command, args, cwd, env)
         if not result[0]:
@@ -213,8 +382,9 @@ class Standard(system.System):
         return result
     def execute_commands(self, commands):
         
-        file_name = os.path.join(self.get_install_path(), "temp.sh")
-        with open(file_name, "w") as command_file:
+        # Unique file names, as packages can install in parallel
+        file_handle, file_name = tempfile.mkstemp(suffix=".sh", dir=self.get_install_path())
+        with os.fdopen(file_handle, "w") as command_file:
             command_file.write('\n'.join(commands))
         self.execute("/bin/bash", args=[file_name])
         self.remove(file_name)
@@ -238,7 +408,7 @@ class Standard(system.System):
         # Firstly setup the environment
         local_env = os.environ.copy()
         if env is not None:
-            pass
+            local_env.update(env)
         # Now open and run the shell_command
         shell_command = [command]
         if args is not None:
@@ -255,22 +425,177 @@ class Standard(system.System):
         if process.returncode != 0:
             logger.error("Tried executing %s and failed %i" % (' '.join(shell_command), process.returncode))
         return (process.returncode == 0, output) # Very useful for library checking
+    def which(self, command):
+        """ Return the absolute location of the *command* on the PATH, as which would, or None if
+        not found. Each PATH directory is listed once per session.
+
+        :param command: name of the command
+        :type command: string
+        :return: location of the command
+        :rtype: string
+        """
+        if os.sep in command: # A path rather than a name
+            if os.path.isfile(command) and os.access(command, os.X_OK):
+                return os.path.abspath(command)
+            return None
+        for directory in os.environ.get("PATH", "").split(os.pathsep):
+            if directory not in self._path_listings:
+                try:
+                    self._path_listings[directory] = set(os.listdir(directory or os.curdir))
+                except OSError:
+                    self._path_listings[directory] = set()
+            if command in self._path_listings[directory]:
+                location = os.path.join(directory, command)
+                if os.path.isfile(location) and os.access(location, os.X_OK):
+                    logger.debug("Command %s is at %s" % (command, location))
+                    return os.path.abspath(location)
+        logger.debug("Command %s is not on the PATH" % command)
+        return None
     def compilation_test(self, headers=None, flags=None):
         """ Test that a file can be compiled by g++ with the *headers* and linkage *flags*.
+
+        Any queued tests are run in the same batch.
         
         :param headers: list of header names with extension
         :param flags: list of flags
         :return: True if compiles
         """
-        logger.debug("Testing compilation with headers %r and flags %r" % (headers, flags))
-        file_text = ""
-        for header in headers:
-            file_text += "#include <%s>\n" % header
-        file_text += "int main( int a, char* b[] ) { }"
-        file_path = self._file_path("temp.cc")
-        with open(file_path, "w") as test_file:
-            test_file.write(file_text)
-        output = self.execute("g++", [file_path] + flags, cwd=self.get_temporary_path())
-        self.remove(file_path)
+        with self._compilation_lock:
+            tests = self._compilation_queue + [(headers, flags)]
+            self._compilation_queue = []
+        return self.compilation_tests(tests)[-1]
+    def compilation_tests(self, tests):
+        """ Run many compilation *tests* together, each test is a tuple of a list of header 
+        names and a list of flags.
+
+        Tests are first looked up in the library index, only those it cannot confirm are compiled.
+        These are compiled together first, each test's headers in a file of its own, only if this
+        fails are they split to find the failing tests. Results are remembered for the session.
+
+        :param tests: list of tuples of headers and flags
+        :return: list of True if compiles for each test
+        :rtype: list of bool
+        """
+        keys = [(tuple(headers or []), tuple(flags or [])) for headers, flags in tests]
+        # Only one batch at a time, so parallel callers reuse each others results
+        with self._compilation_lock:
+            unknown = []
+            for key in keys:
+                if key in self._compilation_results or key in unknown:
+                    continue
+                if self._get_library_index().lookup(key[0], key[1]):
+                    self._compilation_results[key] = True
+                else:
+                    unknown.append(key)
+            if len(unknown) > 0:
+                self._batch_compilation_test(unknown)
+            return [self._compilation_results[key] for key in keys]
+    def queue_compilation_test(self, headers=None, flags=None):
+        """ Queue a compilation test with *headers* and *flags* to run in the next batch of
+        tests, the batch runs when any compilation test result is next needed.
+
+        :param headers: list of header names with extension
+        :param flags: list of flags
+        """
+        with self._compilation_lock:
+            self._compilation_queue.append((headers, flags))
+    def _get_library_index(self):
+        """ Return the library index, building it on first use from ldconfig and the compiler
+        search directories.
+
+        :return: the library index
+        :rtype: :class:`library_index.LibraryIndex` instance
+        """
+        if self._library_index is not None:
+            return self._library_index
+        library_paths = os.environ.get("LIBRARY_PATH", "").split(os.pathsep)
+        include_paths = os.environ.get("CPLUS_INCLUDE_PATH", "").split(os.pathsep)
+        # Library directories are listed as 'libraries: =dir:dir'
+        for line in self._compiler_output(["-print-search-dirs"]).splitlines():
+            if line.startswith("libraries:"):
+                library_paths.extend(line.split("=", 1)[-1].split(os.pathsep))
+        # Include directories are listed one per line after 'search starts here:'
+        searching = False
+        for line in self._compiler_output(["-xc++", "-E", "-v", os.devnull]).splitlines():
+            if line.startswith("#include <...> search starts here:"):
+                searching = True
+            elif line.startswith("End of search list."):
+                searching = False
+            elif searching:
+                include_paths.append(line.strip().split(" ")[0])
+        ldconfig = self.which("ldconfig") or "/sbin/ldconfig"
+        ldconfig_output = None
+        if os.path.exists(ldconfig):
+            ldconfig_output = self._compiler_output(["-p"], ldconfig)
+        self._library_index = library_index.LibraryIndex([path for path in library_paths if path],
+                                                         [path for path in include_paths if path],
+                                                         ldconfig_output)
+        return self._library_index
+    def _compiler_output(self, args, command="g++"):
+        """ Return the combined standard output and error of the compiler (or *command*) run 
+        with *args*, compilers print their search paths to the standard error.
+
+        :param args: list of arguments
+        :param command: optional command to run instead of g++
+        :return: output, empty if the command fails to run
+        :rtype: string
+        """
+        try:
+            process = subprocess.Popen(args=[command] + args, stdout=subprocess.PIPE, 
+                                       stderr=subprocess.STDOUT, cwd=self.get_temporary_path())
+        except OSError:
+            logger.exception("Tried executing %s and failed" % command, exc_info=True)
+            return ""
+        output = process.communicate()[0]
+        logger.debug("Executing %s %s, gives \n%s" % (command, ' '.join(args), output))
+        return output
+    def _batch_compilation_test(self, keys):
+        """ Compile the tests with *keys* together, splitting the batch in two and trying each 
+        half if the batch fails. Results are saved in the compilation results.
+
+        :param keys: list of tuples of header tuples and flag tuples
+        """
+        header_sets = []
+        flags = []
+        for key in keys:
+            if key[0] not in header_sets:
+                header_sets.append(key[0])
+            flags.extend([flag for flag in key[1] if flag not in flags])
+        result = self._compile(header_sets, flags)
+        if result or len(keys) == 1:
+            for key in keys:
+                self._compilation_results[key] = result
+        else:
+            logger.debug("Batch of %i compilation tests failed, splitting" % len(keys))
+            self._batch_compilation_test(keys[:len(keys) / 2])
+            self._batch_compilation_test(keys[len(keys) / 2:])
+    def _compile(self, header_sets, flags):
+        """ Compile a file for each of the *header_sets*, so that each set of headers is compiled
+        without the others, and link them together with the linkage *flags*, in one g++ call.
+        
+        :param header_sets: list of lists of header names with extension
+        :param flags: list of flags
+        :return: True if compiles
+        """
+        logger.debug("Testing compilation with headers %r and flags %r" % (header_sets, flags))
+        file_paths = []
+        for index, headers in enumerate(header_sets or [[]]):
+            file_text = ""
+            for header in headers:
+                file_text += "#include <%s>\n" % header
+            if index == 0:
+                file_text += "int main( int a, char* b[] ) { }"
+            # Unique file names, as tests can run in parallel
+            file_handle, file_path = tempfile.mkstemp(suffix=".cc", dir=self.get_temporary_path())
+            with os.fdopen(file_handle, "w") as test_file:
+                test_file.write(file_text)
+            file_paths.append(file_path)
+        output_path = file_paths[0][:-3] + ".out"
+        output = self.execute("g++", file_paths + ["-o", output_path] + list(flags), 
+                              cwd=self.get_temporary_path())
+        for file_path in file_paths:
+            self.remove(file_path)
+        self.remove(output_path)
         return output[0]
     
+
@@ -8,18 +8,48 @@
 ####################################################################################################
 import os
 import tempfile
+import multiprocessing
 import nusoft.credentials
+import nusoft.probe_cache
+import nusoft.system.retry_policy
+import nusoft.system.download_cache
+import nusoft.system.mirror_ranking
+import nusoft.system.rate_limiter
 import logging
 logger = logging.getLogger(__name__)
 
+# Default number of files to download at once
+DOWNLOADS = 4
+# Default seconds to use a mirror ranking for
+MIRROR_TTL = 24 * 60 * 60
+# Default number of connections to use to each server at once
+CONNECTIONS_PER_HOST = 4
+# Default fraction of a limited download rate reserved for other transfers
+RATE_RESERVE = 0.25
+
 class System(object):
     """ The system commands, 
 
     :param _install_path: The installation path
     :param _temporary_path: The temporary/cache path
     :param _credentials: The credentials needed to download.
+    :param _probe_cache: The cache of system probe results
+    :param _jobs: The number of jobs to run in parallel, None for automatic, also the make jobs
+    :param _downloads: The number of files to download at once, None for the default
+    :param _retry_policy: The policy for retrying failed downloads
+    :param _download_cache: The cache of downloaded files, None if downloads are not cached
+    :param _mirror_ranking: The ranking of download mirrors by latency
+    :param _segments: The number of segments to download large files in
+    :param _connections_per_host: The number of connections to use to each server at once
+    :param _rate_limiter: The limit on the download rate
+    :param _stream: True to extract tarballs as they download, rather than saving them first
+    :param _jobserver: The make jobserver shared by all builds, None if makes are given -j
+    :param _repositories_path: The package repositories location
     """
-    def __init__(self, install_path, temporary_path=None, token=None):
+    def __init__(self, install_path, temporary_path=None, token=None, refresh_probes=False,
+                 jobs=None, repositories_path=None, downloads=None, retry_policy=None,
+                 download_cache=None, mirror_ttl=None, segments=1, connections_per_host=None,
+                 limit_rate=None, rate_reserve=None, stream=False):
         """ Initialise the system with an *install_path* and an optional *temporary_path*
 
         :param install_path: Location to install to
@@ -27,6 +57,35 @@ class System(object):
         :param temporary_path: Optional path to save files to temporarily
         :type temporary_path: string
         :param token: Download token key
+        :param refresh_probes: True to ignore (and replace) cached system probe results
+        :type refresh_probes: bool
+        :param jobs: Optional number of jobs to run in parallel, including make jobs
+        :type jobs: int
+        :param repositories_path: Optional package repositories location, defaults to the 
+        packages directory in nusoft
+        :type repositories_path: string
+        :param downloads: Optional number of files to download at once
+        :type downloads: int
+        :param retry_policy: Optional policy for retrying failed downloads
+        :type retry_policy: :class:`nusoft.system.retry_policy.RetryPolicy`
+        :param download_cache: Optional path to the download cache, defaults to the 
+        NUSOFT_DOWNLOAD_CACHE environment variable or the cache directory in the temporary path, 
+        an empty path for no cache
+        :type download_cache: string
+        :param mirror_ttl: Optional seconds to use a ranking of mirrors for, defaults to a day
+        :param segments: Optional number of segments to download large files in at once, over 
+        several connections, defaults to 1
+        :type segments: int
+        :param connections_per_host: Optional number of connections to use to each server at once
+        :type connections_per_host: int
+        :param limit_rate: Optional limit of all downloads together in bytes per second, or text 
+        e.g. 500k, defaults to the NUSOFT_LIMIT_RATE environment variable or no limit, 0 for no 
+        limit
+        :param rate_reserve: Optional fraction of a limited rate that a single download cannot 
+        take whilst others are active, defaults to 0.25
+        :param stream: Optional, True to extract tarballs as they download rather than saving 
+        them first, defaults to False
+        :type stream: bool
         """
         self._install_path = install_path
         if temporary_path is not None:
@@ -38,6 +97,42 @@ class System(object):
         logger.info("System initialised, the install path is %s and the temporary path is %s" % 
                     (self._install_path, self._temporary_path))
         self._credentials = nusoft.credentials.Credentials(token)
+        self._probe_cache = nusoft.probe_cache.ProbeCache(os.path.join(self.get_cache_path(), 
+                                                                       "probes.json"),
+                                                          refresh_probes)
+        self._jobs = jobs
+        self._downloads = downloads
+        if retry_policy is None:
+            retry_policy = nusoft.system.retry_policy.RetryPolicy()
+        self._retry_policy = retry_policy
+        if download_cache is None:
+            download_cache = os.environ.get("NUSOFT_DOWNLOAD_CACHE", 
+                                            os.path.join(self._temporary_path, "cache"))
+        self._download_cache = None
+        if download_cache != "":
+            self._download_cache = nusoft.system.download_cache.DownloadCache(download_cache)
+        if mirror_ttl is None:
+            mirror_ttl = MIRROR_TTL
+        self._mirror_ranking = nusoft.system.mirror_ranking.MirrorRanking(
+            os.path.join(self.get_cache_path(), "mirrors.json"), mirror_ttl)
+        self._segments = segments
+        if connections_per_host is None:
+            connections_per_host = CONNECTIONS_PER_HOST
+        self._connections_per_host = connections_per_host
+        if limit_rate is None:
+            limit_rate = os.environ.get("NUSOFT_LIMIT_RATE")
+        if isinstance(limit_rate, basestring):
+            limit_rate = nusoft.system.rate_limiter.parse_rate(limit_rate)
+        if rate_reserve is None:
+            rate_reserve = RATE_RESERVE
+        self._rate_limiter = nusoft.system.rate_limiter.RateLimiter(limit_rate, rate_reserve)
+        self._stream = stream
+        self._jobserver = None
+        if repositories_path is not None:
+            self._repositories_path = os.path.abspath(repositories_path)
+        else:
+            self._repositories_path = os.path.abspath(os.path.join(os.path.dirname(__file__), 
+                                                                   "../../packages"))
 ####################################################################################################
 # Path commands
     def get_repositories_path(self):
@@ -46,7 +141,7 @@ class System(object):
         :return: the repositories base location
         :rtype: string
         """
-        return os.path.abspath(os.path.join(os.path.dirname(__file__), "../../packages"))
+        return self._repositories_path
     def get_install_path(self):
         """ Return the install path
 
@@ -61,6 +156,75 @@ class System(object):
         :rtype: string
         """
         return self._temporary_path
+    def get_jobs(self):
+        """ Return the number of jobs to run in parallel, defaults to the number of cpus.
+
+        :return: the number of jobs
+        :rtype: int
+        """
+        if self._jobs is not None:
+            return self._jobs
+        return multiprocessing.cpu_count()
+    def get_make_jobs(self, max_jobs=None):
+        """ Return the number of jobs make should run, the jobs setting if set otherwise the 
+        number of cpus not already busy as given by the load average. At most *max_jobs*.
+
+        :param max_jobs: optional most jobs the build can run
+        :type max_jobs: int
+        :return: the number of make jobs, at least 1
+        :rtype: int
+        """
+        jobs = self._jobs
+        if jobs is None:
+            jobs = multiprocessing.cpu_count()
+            try:
+                jobs -= int(os.getloadavg()[0])
+            except (AttributeError, OSError): # Load average not available on this system
+                pass
+        if max_jobs is not None:
+            jobs = min(jobs, max_jobs)
+        return max(1, jobs)
+    def get_jobserver(self):
+        """ Return the make jobserver shared by all builds, or None if there is none.
+
+        :return: the jobserver
+        :rtype: :class:`nusoft.system.jobserver.JobServer`
+        """
+        return self._jobserver
+    def get_downloads(self):
+        """ Return the number of files to download at once, defaults to DOWNLOADS.
+
+        :return: the number of downloads
+        :rtype: int
+        """
+        if self._downloads is not None:
+            return self._downloads
+        return DOWNLOADS
+    def get_retry_policy(self, retries=None):
+        """ Return the policy for retrying failed downloads, *retries* overrides the system 
+        policy for a single download.
+
+        :param retries: None for the system policy, a number of retries or a policy
+        :type retries: None, int or :class:`nusoft.system.retry_policy.RetryPolicy`
+        :return: the policy
+        :rtype: :class:`nusoft.system.retry_policy.RetryPolicy`
+        """
+        if retries is None:
+            return self._retry_policy
+        elif isinstance(retries, nusoft.system.retry_policy.RetryPolicy):
+            return retries
+        return self._retry_policy.with_retries(retries)
+    def get_cache_path(self):
+        """ Return the path nusoft keeps its caches in, within the install path
+
+        :return: the cache path
+        :rtype: string
+        """
+        return os.path.join(self._install_path, ".nusoft")
+    def close(self):
+        """ Release what the system holds open, e.g. connections and the jobserver pipe, the system
+        cannot be used afterwards."""
+        pass
     def _file_path(self, file):
         """ Return a full path for the file if required, or return the *file*
         
@@ -74,6 +238,50 @@ class System(object):
         else:
             return os.path.abspath(os.path.join(self.get_temporary_path(), file))
 ####################################################################################################
+# Probe commands
+    def cached_probe(self, name, probe, commands=None, data=None):
+        """ Return the result of the *probe* called *name*, the result is cached and only
+        recalculated if the fingerprint of the *commands* and *data* changes.
+
+        :param name: unique name of the probe
+        :type name: string
+        :param probe: function to call to get the result, the result must be json serialisable
+        :param commands: optional list of commands the result depends on
+        :type commands: list of strings
+        :param data: optional json serialisable data the result depends on
+        :return: the probe result
+        """
+        fingerprint = self.probe_fingerprint(commands, data)
+        entry = self._probe_cache.get(name, fingerprint)
+        if entry is not None:
+            return entry["result"]
+        result = probe()
+        self._probe_cache.set(name, fingerprint, result)
+        return result
+    def is_probe_cached(self, name, commands=None, data=None):
+        """ Check if the result of the probe called *name* is cached for the *commands* and 
+        *data*.
+
+        :param name: unique name of the probe
+        :type name: string
+        :param commands: optional list of commands the result depends on
+        :type commands: list of strings
+        :param data: optional json serialisable data the result depends on
+        :return: True if cached
+        """
+        return self._probe_cache.get(name, self.probe_fingerprint(commands, data)) is not None
+    def probe_fingerprint(self, commands=None, data=None):
+        """ Return a fingerprint of everything that can change a probe result, the system 
+        environment, the *commands* and the *data*.
+
+        :param commands: optional list of commands the result depends on
+        :type commands: list of strings
+        :param data: optional json serialisable data the result depends on
+        :return: the fingerprint
+        :rtype: string
+        """
+        pass
+####################################################################################################
 # Comamnds to alter/create files
     def exists(self, file):
         """ Check if the *file* or directory at *file* exists
@@ -102,17 +310,25 @@ class System(object):
         :param value: to set
         """
         pass
-    def download(self, url, authenticate=False, name=None, retries=0):
+    def download(self, url, authenticate=False, name=None, retries=None, progress=None,
+                 sha256=None, segments=None):
         """ Download the *url* to a file called *name* in the temporary path, if *name* is not set
         will save to the url filename. If *authenticate* is True the credentials are queried and
-        required. Retry downloading *retries* number of times                                                                                                                                                                             
-        :param url: of the file to download
-        :type url: string
+        required. Retry downloading as the *retries* policy allows                                                                                                                                                                             
+        :param url: of the file to download, or list of mirror urls of the file
+        :type url: string or list of strings
         :param authenticate: True if authentication is required.
         :param name: optional name to save to in the temporary path
         :type name: string
-        :param retries: number of retries
-        :type retries: int
+        :param retries: optional number of retries or retry policy, defaults to the system policy
+        :type retries: int or :class:`nusoft.system.retry_policy.RetryPolicy`
+        :param progress: optional function called with the bytes downloaded, the total bytes (None 
+        if unknown) and the throughput in bytes per second after each chunk
+        :param sha256: optional expected sha256 hex digest of the file
+        :type sha256: string
+        :param segments: optional number of segments to download a large file in at once, 
+        defaults to the system setting
+        :type segments: int
         """
         pass
     def git_clone(self, url, target):
@@ -161,9 +377,12 @@ class System(object):
         :raises Exception: if the configure fails
         """
         pass
-    def make(self, command='make', args=None, cwd=None, env=None):
+    def make(self, command='make', args=None, cwd=None, env=None, max_jobs=None):
         """ Run a make *command* in the *cwd* directory with arguments, *args* and optional *env*,
-        environment.
+        environment. The make jobs are shared through the jobserver, or set to 
+        :meth:`get_make_jobs`, at most *max_jobs* for builds that break with more, unless the 
+        *args* set them. Builds given more than one job by *max_jobs* or the *args* run outside
+        the jobserver's budget.
 
         :param command: optional command to execute
         :type command: string
@@ -173,6 +392,8 @@ class System(object):
         :type cwd: string
         :param env: optional dictionary of environment
         :type env: dictionary of keys with values, all strings
+        :param max_jobs: optional most jobs the build can run
+        :type max_jobs: int
         :return: standard output from command
         :rtype: string
         :raises Exception: if the make fails
@@ -194,6 +415,16 @@ class System(object):
         :rtype: tuple bool and string
         """
         pass
+    def which(self, command):
+        """ Return the absolute location of the *command* on the PATH, as which would, or None if
+        not found.
+
+        :param command: name of the command
+        :type command: string
+        :return: location of the command
+        :rtype: string
+        """
+        pass
     def compilation_test(self, headers=None, flags=None):
         """ Test that a file can be compiled by g++ with the *headers* and linkage *flags*.
         
@@ -202,3 +433,20 @@ class System(object):
         :return: True if compiles
         """
         pass
+    def compilation_tests(self, tests):
+        """ Run many compilation *tests* together, each test is a tuple of a list of header 
+        names and a list of flags.
+
+        :param tests: list of tuples of headers and flags
+        :return: list of True if compiles for each test
+        :rtype: list of bool
+        """
+        pass
+    def queue_compilation_test(self, headers=None, flags=None):
+        """ Queue a compilation test with *headers* and *flags* to run in the next batch of
+        tests, the batch runs when any compilation test result is next needed.
+
+        :param headers: list of header names with extension
+        :param flags: list of flags
+        """
+        pass
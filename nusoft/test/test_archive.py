@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+#
+# TestArchive
+#
+# Tests the archive functions
+#
+# Author agent - 2026-10-18 <agent@local> : First revision
+####################################################################################################
+import unittest
+import nusoft.system.archive
+import nusoft.system.standard
+import os
+import stat
+import shutil
+import tarfile
+import zipfile
+import tempfile
+import subprocess
+
+# Contents of the archived file
+CONTENTS = "".join(chr(index % 256) for index in range(200 * 1024))
+
+class TestArchive(unittest.TestCase):
+
+    def setUp(self):
+        super(TestArchive, self).setUp()
+        self._path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self._path)
+        system = nusoft.system.standard.Standard(os.path.join(self._path, "install"))
+        self.addCleanup(system.close)
+        self._which = system.which
+        os.makedirs(os.path.join(self._path, "package-1.0", "bin"))
+        self._file = os.path.join(self._path, "package-1.0", "bin", "program")
+        with open(self._file, "wb") as archived_file:
+            archived_file.write(CONTENTS)
+        os.chmod(self._file, 0755)
+        self._tar_path = os.path.join(self._path, "package.tar")
+        with tarfile.open(self._tar_path, "w") as tar_file:
+            tar_file.add(os.path.join(self._path, "package-1.0"), "package-1.0")
+    def _archive(self, suffix, command):
+        """ Return the path to the tar compressed by *command* with *suffix*."""
+        archive_path = self._tar_path + suffix
+        with open(self._tar_path, "rb") as tar_file:
+            with open(archive_path, "wb") as archive_file:
+                subprocess.check_call(command, stdin=tar_file, stdout=archive_file)
+        return archive_path
+    def _check(self, target_path):
+        """ Check the archive was extracted to *target_path* with the leading directory stripped."""
+        self.assertEqual(os.listdir(target_path), ["bin"])
+        with open(os.path.join(target_path, "bin", "program"), "rb") as extracted_file:
+            self.assertEqual(extracted_file.read(), CONTENTS)
+        self.assertTrue(os.stat(os.path.join(target_path, "bin", "program")).st_mode & stat.S_IXUSR)
+        shutil.rmtree(target_path)
+    def test_compression(self):
+        """ Test the compression is found from the name or leading bytes."""
+        compression = nusoft.system.archive.compression
+        self.assertEqual(compression("root_v5.34.18.source.tar.gz"), "gz")
+        self.assertEqual(compression("clhep-2.1.0.1.tgz"), "gz")
+        self.assertEqual(compression("geant4.tar.xz"), "xz")
+        self.assertEqual(compression("package.zip"), "zip")
+        self.assertEqual(compression("package", "\x28\xb5\x2f\xfd\x00"), "zst")
+        self.assertEqual(compression("package"), None)
+        self.assertFalse(nusoft.system.archive.is_streamable("package.zip"))
+        self.assertTrue(nusoft.system.archive.is_streamable("package.tar.zst"))
+    def test_in_process(self):
+        """ Test tar, gzip and bzip2 tars are extracted in process, from paths and streams."""
+        for suffix, command in [("", None), (".gz", ["gzip", "-c"]), (".bz2", ["bzip2", "-c"])]:
+            archive_path = self._tar_path
+            if command is not None:
+                archive_path = self._archive(suffix, command)
+            target_path = os.path.join(self._path, "target")
+            nusoft.system.archive.extract(archive_path, target_path, 1)
+            self._check(target_path)
+            with open(archive_path, "rb") as archive_file:
+                nusoft.system.archive.extract(archive_file, target_path, 1, name=archive_path)
+            self._check(target_path)
+    def test_commands(self):
+        """ Test xz and zstd tars are extracted through the commands, from paths and streams."""
+        for suffix, command in [(".xz", ["xz", "-c"]), (".zst", ["zstd", "-c"])]:
+            if self._which(command[0]) is None:
+                continue
+            archive_path = self._archive(suffix, command)
+            target_path = os.path.join(self._path, "target")
+            nusoft.system.archive.extract(archive_path, target_path, 1, which=self._which)
+            self._check(target_path)
+            with open(archive_path, "rb") as archive_file:
+                nusoft.system.archive.extract(archive_file, target_path, 1, name=archive_path,
+                                              which=self._which)
+            self._check(target_path)
+            with open(self._tar_path, "rb") as archive_file: # Not what the name claims
+                self.assertRaises(tarfile.ReadError, nusoft.system.archive.extract, archive_file,
+                                  target_path, 1, name=archive_path, which=self._which)
+    def test_zip(self):
+        """ Test zips are extracted with their permissions."""
+        zip_path = os.path.join(self._path, "package.zip")
+        with zipfile.ZipFile(zip_path, "w") as zip_file:
+            zip_file.write(os.path.join(self._path, "package-1.0"), "package-1.0")
+            zip_file.write(os.path.join(self._path, "package-1.0", "bin"), "package-1.0/bin")
+            zip_file.write(self._file, "package-1.0/bin/program")
+        target_path = os.path.join(self._path, "target")
+        nusoft.system.archive.extract(zip_path, target_path, 1)
+        self._check(target_path)
+
+if __name__ == '__main__':
+    unittest.main()
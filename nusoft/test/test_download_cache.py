@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+#
+# TestDownloadCache
+#
+# Tests the DownloadCache class
+#
+# Author agent - 2026-10-18 <agent@local> : First revision
+####################################################################################################
+import unittest
+import os
+import stat
+import shutil
+import hashlib
+import tempfile
+import threading
+import nusoft.system.download_cache
+
+class TestDownloadCache(unittest.TestCase):
+
+    def setUp(self):
+        super(TestDownloadCache, self).setUp()
+        self._path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self._path)
+        self._file_path = os.path.join(self._path, "nusoft.tar.gz")
+        with open(self._file_path, "wb") as test_file:
+            test_file.write("nusoft")
+        self._sha256 = hashlib.sha256("nusoft").hexdigest()
+    def test_lookup(self):
+        """ Test stored files are found by digest, or by url for unknown digests, read only."""
+        cache = nusoft.system.download_cache.DownloadCache(os.path.join(self._path, "cache"))
+        url = "http://localhost/nusoft.tar.gz"
+        self.assertEqual(cache.lookup(url), None)
+        cache.store(url, self._file_path, self._sha256)
+        cache_path = cache.lookup(url)
+        self.assertEqual(cache.lookup("http://mirror/nusoft.tar.gz", self._sha256), cache_path)
+        self.assertEqual(cache.lookup("http://mirror/nusoft.tar.gz"), None)
+        self.assertEqual(cache.lookup(url, hashlib.sha256("other").hexdigest()), None)
+        with open(cache_path, "rb") as cached_file:
+            self.assertEqual(cached_file.read(), "nusoft")
+        self.assertFalse(os.stat(cache_path).st_mode & stat.S_IWUSR)
+    def test_shared(self):
+        """ Test caches in the same directory share files."""
+        path = os.path.join(self._path, "cache")
+        nusoft.system.download_cache.DownloadCache(path).store("http://localhost/nusoft.tar.gz",
+                                                               self._file_path, self._sha256)
+        cache = nusoft.system.download_cache.DownloadCache(path)
+        self.assertNotEqual(cache.lookup("http://localhost/nusoft.tar.gz"), None)
+    def test_other_owner(self):
+        """ Test urls are not looked up in a urls.json owned by another user, digests are."""
+        cache = nusoft.system.download_cache.DownloadCache(os.path.join(self._path, "cache"))
+        url = "http://localhost/nusoft.tar.gz"
+        cache.store(url, self._file_path, self._sha256)
+        getuid = os.getuid
+        os.getuid = lambda: getuid() + 1
+        try:
+            self.assertEqual(cache.lookup(url), None)
+            self.assertNotEqual(cache.lookup(url, self._sha256), None)
+        finally:
+            os.getuid = getuid
+    def test_changed(self):
+        """ Test cached files that no longer match their digest are not used, then replaced."""
+        cache = nusoft.system.download_cache.DownloadCache(os.path.join(self._path, "cache"))
+        url = "http://localhost/nusoft.tar.gz"
+        cache.store(url, self._file_path, self._sha256)
+        cache_path = cache.lookup(url)
+        os.chmod(cache_path, 0644)
+        with open(cache_path, "wb") as cached_file:
+            cached_file.write("changed")
+        self.assertEqual(cache.lookup(url), None)
+        cache.store(url, self._file_path, self._sha256)
+        with open(cache.lookup(url), "rb") as cached_file:
+            self.assertEqual(cached_file.read(), "nusoft")
+    def test_concurrent_store(self):
+        """ Test urls stored at once by several caches in the same directory are all kept."""
+        path = os.path.join(self._path, "cache")
+        urls = ["http://localhost/nusoft%i.tar.gz" % index for index in range(8)]
+        threads = [threading.Thread(target=nusoft.system.download_cache.DownloadCache(path).store,
+                                    args=(url, self._file_path, self._sha256)) for url in urls]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        cache = nusoft.system.download_cache.DownloadCache(path)
+        for url in urls:
+            self.assertNotEqual(cache.lookup(url), None)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+#
+# TestJobServer
+#
+# Tests the JobServer class
+#
+# Author agent - 2026-10-18 <agent@local> : First revision
+####################################################################################################
+import unittest
+import nusoft.system.jobserver
+import os
+import time
+import shutil
+import select
+import tempfile
+import subprocess
+
+# Makefile of four jobs that each take 0.2 seconds
+MAKEFILE = "all: a b c d\na b c d:\n\tsleep 0.2\n"
+
+class TestJobServer(unittest.TestCase):
+
+    def setUp(self):
+        super(TestJobServer, self).setUp()
+        self._jobserver = nusoft.system.jobserver.JobServer(2)
+        self.addCleanup(self._jobserver.close)
+    def _free(self):
+        """ Check if a token is free without taking it."""
+        return len(select.select([self._jobserver._read], [], [], 0)[0]) > 0
+    def test_tokens(self):
+        """ Test the pipe holds a token for each job beyond the first."""
+        token = self._jobserver.acquire()
+        self.assertFalse(self._free())
+        self._jobserver.release(token)
+        self.assertTrue(self._free())
+        env = self._jobserver.get_environment({"MAKEFLAGS" : "-s"})
+        self.assertTrue(env["MAKEFLAGS"].startswith("-s -j "))
+        self.assertTrue("--jobserver-auth=%i,%i" % (self._jobserver._read, self._jobserver._write)
+                        in env["MAKEFLAGS"])
+    def test_make(self):
+        """ Test make runs as many jobs as the jobserver allows, and returns the tokens."""
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        with open(os.path.join(path, "Makefile"), "w") as makefile:
+            makefile.write(MAKEFILE)
+        env = self._jobserver.get_environment(os.environ)
+        start = time.time()
+        subprocess.check_call(["make", "-s", "-C", path], env=env)
+        self.assertTrue(time.time() - start < 0.7) # Two jobs at once
+        self.assertTrue(self._free())
+        token = self._jobserver.acquire() # Another build has the token
+        start = time.time()
+        subprocess.check_call(["make", "-s", "-C", path], env=env)
+        self.assertTrue(time.time() - start > 0.75) # One job at a time
+        self._jobserver.release(token)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+#
+# TestLibraryIndex
+#
+# Tests the LibraryIndex class
+#
+# Author agent - 2026-10-18 <agent@local> : First revision
+####################################################################################################
+import unittest
+import nusoft.system.library_index
+import tempfile
+import shutil
+import os
+
+class TestLibraryIndex(unittest.TestCase):
+
+    def setUp(self):
+        super(TestLibraryIndex, self).setUp()
+        self._directory = tempfile.mkdtemp()
+        for file_name in ["lib/libfoo.so", "lib/libbar.a", "other/libbaz.so", "include/foo/foo.h"]:
+            file_path = os.path.join(self._directory, file_name)
+            if not os.path.exists(os.path.dirname(file_path)):
+                os.makedirs(os.path.dirname(file_path))
+            open(file_path, "w").close()
+        ldconfig_output = "\tlibbaz.so (libc6,x86-64) => %s/other/libbaz.so\n" % self._directory
+        self._index = nusoft.system.library_index.LibraryIndex([os.path.join(self._directory, "lib")],
+                                                               [os.path.join(self._directory, 
+                                                                             "include")],
+                                                               ldconfig_output)
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+    def test_lookup(self):
+        """ Test libraries and headers are found in the search and ldconfig directories."""
+        self.assertTrue(self._index.lookup(["foo/foo.h"], ["-lfoo", "-lbar", "-lbaz", "-O2"]))
+    def test_unsure(self):
+        """ Test missing libraries, headers and unknown flags are unsure."""
+        self.assertTrue(self._index.lookup([], ["-lmissing"]) is None)
+        self.assertTrue(self._index.lookup(["missing.h"], ["-lfoo"]) is None)
+        self.assertTrue(self._index.lookup([], ["-lfoo", "-Xlinker"]) is None)
+
+if __name__ == '__main__':
+    unittest.main()
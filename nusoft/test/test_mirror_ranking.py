@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+#
+# TestMirrorRanking
+#
+# Tests the MirrorRanking class
+#
+# Author agent - 2026-10-18 <agent@local> : First revision
+####################################################################################################
+import unittest
+import os
+import shutil
+import tempfile
+import nusoft.system.mirror_ranking
+
+LATENCIES = {"http://slow" : 2.0, "http://fast" : 0.1, "ftp://medium" : 1.0}
+URLS = ["http://slow/file.tar.gz", "http://fast/file.tar.gz", "ftp://medium/file.tar.gz"]
+
+class TestMirrorRanking(unittest.TestCase):
+
+    def setUp(self):
+        super(TestMirrorRanking, self).setUp()
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        self._file_path = os.path.join(path, "mirrors.json")
+        self._probes = []
+    def _probe(self, url):
+        """ Return the latency of the *url* from LATENCIES, failing for unknown servers."""
+        self._probes.append(url)
+        for server, latency in LATENCIES.iteritems():
+            if url.startswith(server):
+                return latency
+        raise IOError("Connection refused")
+    def test_rank(self):
+        """ Test mirrors are ranked fastest first, failed mirrors last."""
+        ranking = nusoft.system.mirror_ranking.MirrorRanking(self._file_path, 60)
+        self.assertEqual(ranking.rank(["http://down/file.tar.gz"] + URLS, self._probe),
+                         [URLS[1], URLS[2], URLS[0], "http://down/file.tar.gz"])
+        ranking.record_failure(URLS[1])
+        self.assertEqual(ranking.rank(URLS, self._probe), [URLS[2], URLS[0], URLS[1]])
+    def test_ttl(self):
+        """ Test latencies are remembered, between sessions, for the time to live only."""
+        nusoft.system.mirror_ranking.MirrorRanking(self._file_path, 60).rank(URLS, self._probe)
+        self.assertEqual(len(self._probes), 3)
+        ranking = nusoft.system.mirror_ranking.MirrorRanking(self._file_path, 60)
+        self.assertEqual(ranking.rank(URLS, self._probe)[0], URLS[1])
+        self.assertEqual(len(self._probes), 3)
+        nusoft.system.mirror_ranking.MirrorRanking(self._file_path, 0).rank(URLS, self._probe)
+        self.assertEqual(len(self._probes), 6)
+
+if __name__ == '__main__':
+    unittest.main()
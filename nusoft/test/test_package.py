@@ -0,0 +1,35 @@
+#!/usr/bin/env python
+#
+# TestPackage
+#
+# Tests the Package class
+#
+# Author agent - 2026-10-18 <agent@local> : First revision
+####################################################################################################
+import unittest
+import nusoft.package.package
+import nusoft.system.standard
+import shutil
+import tempfile
+
+class CappedPackage(nusoft.package.package.Package):
+    """ Package whose build breaks with more than two make jobs."""
+    _max_jobs = 2
+
+class TestPackage(unittest.TestCase):
+
+    def test_make_jobs(self):
+        """ Test packages make with at most their make jobs, otherwise through the jobserver."""
+        install_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, install_path)
+        system = nusoft.system.standard.Standard(install_path, jobs=4)
+        self.addCleanup(system.close)
+        executed = []
+        system.execute = lambda command, args, cwd, env: executed.append((args, env)) or (True, "")
+        CappedPackage("capped", system, "test")._make(args=["install"], cwd=install_path)
+        nusoft.package.package.Package("uncapped", system, "test")._make(cwd=install_path)
+        self.assertEqual(executed, [(["-j2", "install"], None),
+                                    ([], system.get_jobserver().get_environment())])
+
+if __name__ == '__main__':
+    unittest.main()
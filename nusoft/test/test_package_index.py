@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+#
+# TestPackageIndex
+#
+# Tests the PackageIndex class
+#
+# Author agent - 2026-10-18 <agent@local> : First revision
+####################################################################################################
+import unittest
+import nusoft.package_index
+import nusoft.package.package
+import tempfile
+import shutil
+import os
+
+class DependentPackage(nusoft.package.package.Package):
+    """ Package with fixed dependencies."""
+    def __init__(self, name, dependencies):
+        super(DependentPackage, self).__init__(name, None, "test")
+        self._dependency_names = dependencies
+    def get_dependencies(self):
+        return self._dependency_names
+
+class TestPackageIndex(unittest.TestCase):
+
+    def setUp(self):
+        super(TestPackageIndex, self).setUp()
+        self._directory = tempfile.mkdtemp()
+        self._module_path = os.path.join(self._directory, "module.py")
+        with open(self._module_path, "w") as module_file:
+            module_file.write("versions = []\n")
+        self._index_path = os.path.join(self._directory, "index.json")
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+    def _build(self):
+        index = nusoft.package_index.PackageIndex(self._index_path)
+        index.set_module(self._module_path, "test", [DependentPackage("a", ["b", ["c", "d"]]),
+                                                     DependentPackage("b", []),
+                                                     DependentPackage("c", []),
+                                                     DependentPackage("d", []),
+                                                     DependentPackage("e", ["a"])])
+        index.set_modules([self._module_path])
+        index.save()
+        return index
+    def test_closure(self):
+        """ Test the dependency closure includes all optional dependencies."""
+        index = self._build()
+        self.assertEqual(index.dependency_closure(["a"]), set(["a", "b", "c", "d"]))
+        self.assertEqual(index.get_package("e")["repository"], "test")
+    def test_current(self):
+        """ Test modules are current until their contents change."""
+        self._build()
+        index = nusoft.package_index.PackageIndex(self._index_path)
+        self.assertTrue(index.is_current(self._module_path))
+        os.utime(self._module_path, (0, 0)) # Same contents, new mtime
+        self.assertTrue(index.is_current(self._module_path))
+        with open(self._module_path, "a") as module_file:
+            module_file.write("# Changed\n")
+        self.assertFalse(index.is_current(self._module_path))
+
+if __name__ == '__main__':
+    unittest.main()
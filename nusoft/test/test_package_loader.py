@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+#
+# TestPackageLoader
+#
+# Tests the PackageLoader class
+#
+# Author agent - 2026-10-18 <agent@local> : First revision
+####################################################################################################
+import unittest
+import nusoft.package_loader
+import nusoft.package_manager
+import tempfile
+import shutil
+import os
+
+# Module defining two versions of a package, formatted with the package name
+MODULE = """import nusoft.package.package
+class Version1(nusoft.package.package.Package):
+    def __init__(self, system, repository):
+        super(Version1, self).__init__("%(name)s-1", system, repository)
+class Version2(nusoft.package.package.Package):
+    def __init__(self, system, repository):
+        super(Version2, self).__init__("%(name)s-2", system, repository)
+versions = [Version1, Version2]
+"""
+
+class RepositorySystem(object):
+    """ System providing only the repositories and cache paths."""
+    def __init__(self, path):
+        self._path = path
+    def get_repositories_path(self):
+        return os.path.join(self._path, "repositories")
+    def get_cache_path(self):
+        return os.path.join(self._path, "cache")
+
+class TestPackageLoader(unittest.TestCase):
+
+    def setUp(self):
+        super(TestPackageLoader, self).setUp()
+        self._path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self._path)
+        self._system = RepositorySystem(self._path)
+        for repository in ["one", "two"]:
+            os.makedirs(os.path.join(self._system.get_repositories_path(), repository))
+            with open(os.path.join(self._system.get_repositories_path(), repository, "geant4.py"),
+                      "w") as module_file:
+                module_file.write(MODULE % {"name" : repository})
+    def _loader(self):
+        """ Return a loader into a new package manager."""
+        return nusoft.package_loader.PackageLoader(self._system,
+                                                   nusoft.package_manager.PackageManager(lazy=True))
+    def test_same_module_names(self):
+        """ Test modules with the same file name in different repositories are kept apart."""
+        self._loader().load_index()
+        loader = self._loader()
+        for name in ["one-1", "two-1", "one-2", "two-2"]:
+            loader.load_packages([name])
+            package = loader._package_manager.get_package(name)
+            self.assertEqual(package.get_repository(), name.split("-")[0])
+
+if __name__ == '__main__':
+    unittest.main()
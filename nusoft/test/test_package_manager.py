@@ -0,0 +1,211 @@
+#!/usr/bin/env python
+#
+# TestPackageManager
+#
+# Tests the PackageManager class
+#
+# Author agent - 2026-10-18 <agent@local> : First revision
+####################################################################################################
+import unittest
+import threading
+import nusoft.package_manager
+import nusoft.package.package
+import nusoft.system.jobserver
+
+class CountingPackage(nusoft.package.package.Package):
+    """ Package that counts how often its state is checked."""
+    def __init__(self, name, dependencies=None, installed=True):
+        super(CountingPackage, self).__init__(name, None, "test")
+        self._dependency_names = dependencies or []
+        self._on_system = installed
+        self.checks = 0
+    def get_dependencies(self):
+        return self._dependency_names
+    def check_state(self):
+        self.checks += 1
+        self._installed = self._on_system
+    def install(self):
+        self._on_system = True
+
+class DownloadingPackage(CountingPackage):
+    """ Package that waits in its download until *started* downloads have started."""
+    def __init__(self, name, dependencies, started, events):
+        super(DownloadingPackage, self).__init__(name, dependencies, installed=False)
+        self._started = started
+        self._events = events
+    def _download(self):
+        self._started.append(self._name)
+        self._events.append("download " + self._name)
+        for wait in range(100):
+            if len(self._started) == 3:
+                return
+            threading.Event().wait(0.05)
+        raise Exception("Downloads are not concurrent")
+    def install(self):
+        self.download()
+        self._events.append("install " + self._name)
+        super(DownloadingPackage, self).install()
+
+class SlowPackage(CountingPackage):
+    """ Package whose download takes a while, recorded in *events*, and whose install fails if
+    *fails* is True."""
+    def __init__(self, name, dependencies, events, fails=False):
+        super(SlowPackage, self).__init__(name, dependencies, installed=False)
+        self._events = events
+        self._fails = fails
+    def _download(self):
+        threading.Event().wait(0.2)
+        self._events.append("download " + self._name)
+    def install(self):
+        if self._fails:
+            raise Exception("Build failed")
+        super(SlowPackage, self).install()
+
+class BuildingPackage(CountingPackage):
+    """ Package that waits in its install until two *started* installs have started, then fails 
+    if *fails*."""
+    def __init__(self, name, dependencies, started, events, fails=False):
+        super(BuildingPackage, self).__init__(name, dependencies, installed=False)
+        self._started = started
+        self._events = events
+        self._fails = fails
+    def install(self):
+        self._started.append(self._name)
+        for wait in range(100):
+            if len(self._started) >= 2:
+                break
+            threading.Event().wait(0.05)
+        if self._fails:
+            raise Exception("Build failed")
+        self._events.append("install " + self._name)
+        super(BuildingPackage, self).install()
+
+class ConcurrentPackage(CountingPackage):
+    """ Package that records the most packages installing at once in *active*."""
+    def __init__(self, name, dependencies, active, lock):
+        super(ConcurrentPackage, self).__init__(name, dependencies, installed=False)
+        self._active = active
+        self._lock = lock
+    def install(self):
+        with self._lock:
+            self._active[0] += 1
+            self._active[1] = max(self._active)
+        threading.Event().wait(0.1)
+        with self._lock:
+            self._active[0] -= 1
+        super(ConcurrentPackage, self).install()
+
+class TestPackageManager(unittest.TestCase):
+
+    def test_eager_register(self):
+        """ Test packages are checked on registration by default."""
+        manager = nusoft.package_manager.PackageManager()
+        package = CountingPackage("a")
+        manager.register_package(package)
+        self.assertEqual(package.checks, 1)
+        self.assertTrue(package.is_installed())
+        self.assertEqual(package.checks, 1)
+    def test_lazy_register(self):
+        """ Test lazy packages are checked once, on first use only."""
+        manager = nusoft.package_manager.PackageManager(lazy=True)
+        package = CountingPackage("a")
+        manager.register_package(package)
+        self.assertEqual(package.checks, 0)
+        self.assertTrue(package.is_installed())
+        self.assertTrue(package.is_installed())
+        self.assertEqual(package.checks, 1)
+    def test_lazy_install(self):
+        """ Test installing only checks packages in the dependency closure."""
+        manager = nusoft.package_manager.PackageManager(lazy=True)
+        packages = [CountingPackage("a", ["b"], installed=False), CountingPackage("b"), CountingPackage("c")]
+        for package in packages:
+            manager.register_package(package)
+        manager.install_package("a")
+        self.assertEqual([package.checks for package in packages], [2, 1, 0])
+    def test_parallel_check(self):
+        """ Test parallel state checks check each package once."""
+        manager = nusoft.package_manager.PackageManager(lazy=True, jobs=4)
+        packages = [CountingPackage(str(index)) for index in range(10)]
+        for package in packages:
+            manager.register_package(package)
+        manager.check_states()
+        manager.check_states()
+        self.assertEqual([package.checks for package in packages], [1] * 10)
+    def test_prefetch(self):
+        """ Test installing downloads the whole plan concurrently, once each, and installs in
+        dependency order."""
+        manager = nusoft.package_manager.PackageManager(lazy=True, downloads=3)
+        started = []
+        events = []
+        for name, dependencies in [("a", ["b", "c"]), ("b", ["c"]), ("c", [])]:
+            manager.register_package(DownloadingPackage(name, dependencies, started, events))
+        manager.install_package("a")
+        self.assertEqual(sorted(started), ["a", "b", "c"])
+        self.assertEqual([event for event in events if event.startswith("install")], 
+                         ["install c", "install b", "install a"])
+        self.assertTrue(events.index("download a") < events.index("install c"))
+    def test_prefetch_cancel(self):
+        """ Test a failed install stops the downloads that have not started."""
+        manager = nusoft.package_manager.PackageManager(lazy=True, downloads=1)
+        events = []
+        for name, dependencies, fails in [("a", ["b"], False), ("b", ["c"], False), 
+                                          ("c", [], True)]:
+            manager.register_package(SlowPackage(name, dependencies, events, fails))
+        self.assertRaises(Exception, manager.install_package, "a")
+        threading.Event().wait(0.5)
+        self.assertFalse("download a" in events)
+    def test_concurrent_install(self):
+        """ Test independent packages install at once and dependents after them."""
+        manager = nusoft.package_manager.PackageManager(lazy=True, jobs=2)
+        started = []
+        events = []
+        for name, dependencies in [("a", ["b", ["c", "d"]]), ("b", []), ("c", []), ("d", [])]:
+            manager.register_package(BuildingPackage(name, dependencies, started, events))
+        manager.install_package("a")
+        self.assertEqual(sorted(started[:2]), ["b", "c"])
+        self.assertEqual(events[-1], "install a")
+        self.assertFalse(manager.get_package("d").is_installed())
+    def test_install_failure(self):
+        """ Test a failed install cancels the packages that have not started."""
+        manager = nusoft.package_manager.PackageManager(lazy=True, jobs=2)
+        started = []
+        events = []
+        for name, dependencies, fails in [("a", ["b", "c"], False), ("b", [], True), 
+                                          ("c", [], False)]:
+            manager.register_package(BuildingPackage(name, dependencies, started, events, fails))
+        self.assertRaises(Exception, manager.install_package, "a")
+        self.assertEqual(sorted(started), ["b", "c"])
+        self.assertEqual(events, ["install c"])
+        self.assertFalse(manager.get_package("a").is_installed())
+    def test_jobserver_install(self):
+        """ Test packages installing at once beyond the first hold a jobserver token."""
+        jobserver = nusoft.system.jobserver.JobServer(2)
+        self.addCleanup(jobserver.close)
+        manager = nusoft.package_manager.PackageManager(lazy=True, jobs=4, jobserver=jobserver)
+        active = [0, 0]
+        lock = threading.Lock()
+        for name, dependencies in [("a", ["b", "c", "d"]), ("b", []), ("c", []), ("d", [])]:
+            manager.register_package(ConcurrentPackage(name, dependencies, active, lock))
+        manager.install_package("a")
+        self.assertEqual(active, [0, 2])
+        token = jobserver.acquire() # The token was returned
+        jobserver.release(token)
+    def test_small_jobserver_install(self):
+        """ Test installs finish when the jobserver has fewer jobs than the job budget."""
+        jobserver = nusoft.system.jobserver.JobServer(1)
+        self.addCleanup(jobserver.close)
+        manager = nusoft.package_manager.PackageManager(lazy=True, jobs=2, jobserver=jobserver)
+        active = [0, 0]
+        lock = threading.Lock()
+        for name, dependencies in [("a", ["b", "c"]), ("b", []), ("c", [])]:
+            manager.register_package(ConcurrentPackage(name, dependencies, active, lock))
+        thread = threading.Thread(target=manager.install_package, args=("a",))
+        thread.daemon = True
+        thread.start()
+        thread.join(10.0)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(active, [0, 1])
+        self.assertTrue(manager.get_package("a").is_installed())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+#
+# TestPlacement
+#
+# Tests the placement functions
+#
+# Author agent - 2026-10-18 <agent@local> : First revision
+####################################################################################################
+import unittest
+import nusoft.system.placement
+import os
+import shutil
+import tempfile
+
+# Contents of the placed files, larger than a copy buffer
+CONTENTS = "".join(chr(index % 256) for index in range(3 * 1024 * 1024 + 7))
+
+class TestPlacement(unittest.TestCase):
+
+    def setUp(self):
+        super(TestPlacement, self).setUp()
+        self._path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self._path)
+        self._source = os.path.join(self._path, "source")
+        with open(self._source, "wb") as source_file:
+            source_file.write(CONTENTS)
+    def _read(self, file_path):
+        """ Return the contents of the file at *file_path*."""
+        with open(file_path, "rb") as placed_file:
+            return placed_file.read()
+    def test_move(self):
+        """ Test moved files are renamed."""
+        target = os.path.join(self._path, "target")
+        self.assertEqual(nusoft.system.placement.place(self._source, target, move=True), "rename")
+        self.assertFalse(os.path.exists(self._source))
+        self.assertEqual(self._read(target), CONTENTS)
+    def test_shared(self):
+        """ Test shared files are linked, replacing the target."""
+        target = os.path.join(self._path, "target")
+        with open(target, "w") as target_file:
+            target_file.write("old")
+        self.assertEqual(nusoft.system.placement.place(self._source, target, shared=True), "link")
+        self.assertEqual(os.stat(target).st_ino, os.stat(self._source).st_ino)
+    def test_copy(self):
+        """ Test copies have the same contents whichever method is used."""
+        target = os.path.join(self._path, "target")
+        with open(target, "w") as target_file:
+            target_file.write("old" * 2 * len(CONTENTS))
+        method = nusoft.system.placement.place(self._source, target)
+        self.assertTrue(method in ["reflink", "copy_file_range", "sendfile", "copy"])
+        self.assertNotEqual(os.stat(target).st_ino, os.stat(self._source).st_ino)
+        self.assertEqual(self._read(target), CONTENTS)
+        for copy in [nusoft.system.placement._copy_file_range, nusoft.system.placement._sendfile,
+                     nusoft.system.placement._copy]:
+            with open(self._source, "rb") as source_file:
+                with open(target, "wb") as target_file:
+                    supported = copy(source_file, target_file)
+            if supported:
+                self.assertEqual(self._read(target), CONTENTS)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+#!/usr/bin/env python
+#
+# TestProbeCache
+#
+# Tests the ProbeCache class
+#
+# Author agent - 2026-10-18 <agent@local> : First revision
+####################################################################################################
+import unittest
+import nusoft.probe_cache
+import tempfile
+import shutil
+import os
+
+class TestProbeCache(unittest.TestCase):
+
+    def setUp(self):
+        super(TestProbeCache, self).setUp()
+        self._directory = tempfile.mkdtemp()
+        self._file_path = os.path.join(self._directory, "cache", "probes.json")
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+    def test_persist(self):
+        """ Test results are saved and reloaded whilst the fingerprint matches."""
+        cache = nusoft.probe_cache.ProbeCache(self._file_path)
+        cache.set("test/x11", "abc", {"installed" : True})
+        cache = nusoft.probe_cache.ProbeCache(self._file_path)
+        self.assertEqual(cache.get("test/x11", "abc")["result"], {"installed" : True})
+        self.assertTrue(cache.get("test/x11", "def") is None)
+        self.assertTrue(cache.get("test/xpm", "abc") is None)
+    def test_refresh(self):
+        """ Test existing results are ignored when refreshing."""
+        cache = nusoft.probe_cache.ProbeCache(self._file_path)
+        cache.set("test/make", "abc", None)
+        cache = nusoft.probe_cache.ProbeCache(self._file_path, refresh=True)
+        self.assertTrue(cache.get("test/make", "abc") is None)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+#
+# TestRateLimiter
+#
+# Tests the RateLimiter class
+#
+# Author agent - 2026-10-18 <agent@local> : First revision
+####################################################################################################
+import unittest
+import time
+import nusoft.system.rate_limiter
+
+class TestRateLimiter(unittest.TestCase):
+
+    def test_parse_rate(self):
+        """ Test rates are understood with and without suffixes."""
+        parse_rate = nusoft.system.rate_limiter.parse_rate
+        self.assertEqual(parse_rate("100"), 100)
+        self.assertEqual(parse_rate("500k"), 500 * 1024)
+        self.assertEqual(parse_rate("1.5M"), 3 * 512 * 1024)
+        self.assertEqual(parse_rate(""), None)
+        self.assertEqual(parse_rate("0"), None)
+        self.assertRaises(ValueError, parse_rate, "fast")
+    def test_rate(self):
+        """ Test transfers wait once the rate is exceeded, after the first second's burst."""
+        limiter = nusoft.system.rate_limiter.RateLimiter(1024 * 1024)
+        start = time.time()
+        with limiter.transfer() as transfer:
+            for chunk in range(0, 24):
+                transfer.consume(64 * 1024)
+        self.assertTrue(0.4 < time.time() - start < 1.0)
+    def test_unlimited(self):
+        """ Test transfers never wait without a rate, or with a rate of 0."""
+        for rate in [None, 0]:
+            limiter = nusoft.system.rate_limiter.RateLimiter(rate)
+            start = time.time()
+            with limiter.transfer() as transfer:
+                transfer.consume(1024 ** 3)
+            self.assertTrue(time.time() - start < 0.1)
+    def test_reserve(self):
+        """ Test a transfer cannot take the reserved rate whilst another is active."""
+        limiter = nusoft.system.rate_limiter.RateLimiter(1024 * 1024, reserve=0.5)
+        with limiter.transfer() as other:
+            with limiter.transfer() as transfer:
+                start = time.time()
+                for chunk in range(0, 12):
+                    transfer.consume(64 * 1024)
+                self.assertTrue(time.time() - start > 0.4) # Half the rate, after a burst
+
+if __name__ == '__main__':
+    unittest.main()
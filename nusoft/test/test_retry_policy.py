@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+#
+# TestRetryPolicy
+#
+# Tests the RetryPolicy class
+#
+# Author agent - 2026-10-18 <agent@local> : First revision
+####################################################################################################
+import unittest
+import urllib2
+import time
+import nusoft.system.retry_policy
+
+class TestRetryPolicy(unittest.TestCase):
+
+    def test_delay(self):
+        """ Test delays double up to the maximum, shortened by at most the jitter."""
+        policy = nusoft.system.retry_policy.RetryPolicy(backoff=1.0, max_backoff=10.0, jitter=0.5)
+        for retry, longest in enumerate([1.0, 2.0, 4.0, 8.0, 10.0, 10.0]):
+            delay = policy.delay(retry)
+            self.assertTrue(longest * 0.5 <= delay <= longest)
+    def test_retry(self):
+        """ Test failed attempts are retried until one succeeds, with the attempt timeout."""
+        policy = nusoft.system.retry_policy.RetryPolicy(retries=2, backoff=0.0, timeout=5.0)
+        timeouts = []
+        def attempt(timeout, end):
+            timeouts.append(timeout)
+            if len(timeouts) < 3:
+                raise IOError("Connection dropped")
+            return "done"
+        self.assertEqual(policy.call(attempt), "done")
+        self.assertEqual(timeouts, [5.0] * 3)
+        self.assertRaises(IOError, policy.with_retries(1).call, attempt_failing)
+    def test_no_retry(self):
+        """ Test errors that will happen again are not retried."""
+        policy = nusoft.system.retry_policy.RetryPolicy(retries=2, backoff=0.0)
+        attempts = []
+        def attempt(timeout, end):
+            attempts.append(timeout)
+            raise urllib2.HTTPError("http://localhost", 404, "Not Found", None, None)
+        self.assertRaises(urllib2.HTTPError, policy.call, attempt)
+        self.assertEqual(len(attempts), 1)
+    def test_deadline(self):
+        """ Test no retries are made that would end after the deadline."""
+        policy = nusoft.system.retry_policy.RetryPolicy(retries=5, backoff=0.2, jitter=0.0, 
+                                                        deadline=0.3)
+        attempts = []
+        def attempt(timeout, end):
+            attempts.append(timeout)
+            raise IOError("Connection dropped")
+        self.assertRaises(IOError, policy.call, attempt)
+        self.assertEqual(len(attempts), 2) # The second retry would end after the deadline
+        self.assertTrue(attempts[1] <= 0.1)
+    def test_deadline_error(self):
+        """ Test attempts are given the deadline and not retried once they run past it."""
+        policy = nusoft.system.retry_policy.RetryPolicy(retries=2, backoff=0.0, deadline=10.0)
+        ends = []
+        def attempt(timeout, end):
+            ends.append(end)
+            raise nusoft.system.retry_policy.DeadlineError("Ran past the deadline")
+        start = time.time()
+        self.assertRaises(nusoft.system.retry_policy.DeadlineError, policy.call, attempt)
+        self.assertEqual(len(ends), 1)
+        self.assertTrue(start + 9.0 < ends[0] <= time.time() + 10.0)
+        self.assertEqual(nusoft.system.retry_policy.RetryPolicy().call(
+                lambda timeout, end: end), None)
+
+def attempt_failing(timeout, end):
+    """ An attempt that always fails."""
+    raise IOError("Connection dropped")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+#
+# TestSearch
+#
+# Tests the SearchEngine class
+#
+# Author agent - 2026-10-18 <agent@local> : First revision
+####################################################################################################
+import unittest
+import nusoft.search
+
+def entry(name, repository, dependencies):
+    return (name, {"name" : name, "repository" : repository, "dependencies" : dependencies})
+
+class TestSearch(unittest.TestCase):
+
+    def setUp(self):
+        super(TestSearch, self).setUp()
+        packages = [entry("geant4.9.6.p02", "snoplus", ["make", "cmake-2.8.12.1"]),
+                    entry("geant4.10.00.p02", "snoplus", ["make", "cmake-2.8.12.1"]),
+                    entry("geant4.9.4.p04", "hyperk", ["make"]),
+                    entry("root_v5.34.21", "snoplus", ["make", "x11"]),
+                    entry("curl-7.26.0", "nusoft", [["uuid", "ossp-uuid"]]),
+                    entry("rat-dev", "snoplus", ["root_v5.34.21"]),
+                    entry("rat-4.5.0", "snoplus", ["root_v5.34.21"]),
+                    entry("rat-5.0.0", "snoplus", ["root_v5.34.21"])]
+        self._engine = nusoft.search.SearchEngine(packages)
+    def test_terms(self):
+        """ Test all terms must match, with prefix matches first."""
+        self.assertEqual(self._engine.search("geant4 9.6"), ["geant4.9.6.p02"])
+        self.assertEqual(self._engine.search("root")[0], "root_v5.34.21")
+        self.assertEqual(self._engine.search("dev"), ["rat-dev"])
+    def test_fuzzy(self):
+        """ Test misspelt terms still match."""
+        self.assertTrue("geant4.9.6.p02" in self._engine.search("gaent4"))
+        self.assertEqual(self._engine.search("krul"), [])
+    def test_versions(self):
+        """ Test version words must start the package version, and are never fuzzy matched."""
+        self.assertEqual(self._engine.search("rat-5"), ["rat-5.0.0"])
+        self.assertEqual(self._engine.search("rta-4.5"), ["rat-4.5.0"])
+        self.assertEqual(self._engine.search("rta-5"), ["rat-5.0.0"])
+        self.assertEqual(self._engine.search("root-5.34"), ["root_v5.34.21"])
+        self.assertEqual(self._engine.search("geant4-9.4"), ["geant4.9.4.p04"])
+    def test_filters(self):
+        """ Test the repository and dependency filters."""
+        self.assertEqual(self._engine.search("geant4 repo:hyperk"), ["geant4.9.4.p04"])
+        self.assertEqual(self._engine.search("depends:ossp"), ["curl-7.26.0"])
+        self.assertEqual(self._engine.search("depends:cmake"), ["geant4.10.00.p02", 
+                                                                "geant4.9.6.p02"])
+    def test_pattern(self):
+        """ Test regular expressions still match as before."""
+        self.assertEqual(self._engine.search("root_v5\\.3.*"), ["root_v5.34.21"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -8,13 +8,94 @@
 ####################################################################################################
 import unittest
 import nusoft.system.standard
+import nusoft.system.retry_policy
+import nusoft.system.downloader
+import nusoft.system.connection_pool
 import os
+import shutil
+import hashlib
+import tempfile
+import tarfile
+import time
+import re
+import urllib2
+import threading
+import multiprocessing
+import BaseHTTPServer
+import SocketServer
+
+# Body served by the local server, larger than a download chunk
+BODY = "".join(chr(index % 256) for index in range(300 * 1024))
+
+class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """ Serves the *body* to any GET request, supporting ranges if *ranges* is True. The first
+    *drops* responses of more than a byte are cut off half way. Responses are sent after *delay*
+    seconds."""
+    protocol_version = "HTTP/1.1"
+    body = BODY
+    ranges = True
+    drops = 0
+    delay = 0.0
+    requests = 0
+    connections = 0
+    def setup(self):
+        Handler.connections += 1
+        BaseHTTPServer.BaseHTTPRequestHandler.setup(self)
+    def do_GET(self):
+        Handler.requests += 1
+        time.sleep(self.delay)
+        start, end = 0, len(self.body) - 1
+        match = re.match(r"bytes=(\d+)-(\d*)", self.headers.getheader("Range") or "")
+        if match is not None and self.ranges and \
+                self.headers.getheader("If-Range") in [None, '"body"']:
+            start = int(match.group(1))
+            if match.group(2) != "":
+                end = min(end, int(match.group(2)))
+            self.send_response(206)
+            self.send_header("Content-Range", "bytes %i-%i/%i" % (start, end, len(self.body)))
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", str(end + 1 - start))
+        self.send_header("ETag", '"body"')
+        self.end_headers()
+        if Handler.drops > 0 and end > start: # Never drop range checks
+            Handler.drops -= 1
+            self.wfile.write(self.body[start:start + (end + 1 - start) / 2])
+            self.close_connection = 1
+        else:
+            self.wfile.write(self.body[start:end + 1])
+    def log_message(self, format, *args):
+        pass
+
+class Server(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """ Serves each connection in a thread."""
+    daemon_threads = True
 
 class TestSystem(unittest.TestCase):
     
     def setUp(self):
         super(TestSystem, self).setUp()
-        self._system = nusoft.system.standard.Standard(os.getcwd())
+        self._path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self._path)
+        self._system = self._standard(download_cache=os.path.join(self._path, "cache"))
+    def _standard(self, **kwargs):
+        """ Return a standard system installing to a temporary path, closed after the test."""
+        install_path = tempfile.mkdtemp(dir=self._path)
+        system = nusoft.system.standard.Standard(install_path, **kwargs)
+        self.addCleanup(system.close)
+        return system
+    def _serve(self, ranges=True, drops=0, body=BODY, delay=0.0):
+        """ Start a local server in a thread and return its url, see :class:`Handler`."""
+        Handler.body = body
+        Handler.delay = delay
+        Handler.ranges = ranges
+        Handler.drops = drops
+        server = Server(("127.0.0.1", 0), Handler)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(server.shutdown)
+        return "http://127.0.0.1:%i/nusoft.tar.gz" % server.server_address[1]
     def test_remove(self):
         """ Test the system removes files. 
 
@@ -35,12 +116,262 @@ class TestSystem(unittest.TestCase):
         self._system.download("http://www.github.com", name=test_file)
         self.assertTrue(os.path.exists(test_file))
         os.remove(test_file)
+    def test_download_stream(self):
+        """ Test the system streams downloads in chunks, reporting progress."""
+        test_file = os.path.join(self._system.get_temporary_path(), "nusoft.test")
+        reports = []
+        self._system.download(self._serve(), name=test_file,
+                              progress=lambda done, total, rate: reports.append((done, total)))
+        self.addCleanup(os.remove, test_file)
+        with open(test_file, "rb") as downloaded:
+            self.assertEqual(downloaded.read(), BODY)
+        self.assertFalse(os.path.exists(test_file + ".part"))
+        self.assertTrue(len(reports) > 1)
+        self.assertEqual(reports[-1], (len(BODY), len(BODY)))
+    def test_download_resume(self):
+        """ Test a dropped download continues from where it stopped, or from the start if the 
+        server does not support ranges."""
+        test_file = os.path.join(self._system.get_temporary_path(), "nusoft.test")
+        for ranges in [True, False]:
+            url = self._serve(ranges=ranges, drops=1)
+            self.assertRaises(IOError, self._system.download, url, name=test_file, retries=0)
+            self.assertEqual(os.path.getsize(test_file + ".part"), len(BODY) / 2)
+            reports = []
+            self._system.download(url, name=test_file,
+                                  progress=lambda done, total, rate: reports.append(done))
+            with open(test_file, "rb") as downloaded:
+                self.assertEqual(downloaded.read(), BODY)
+            os.remove(test_file)
+            self.assertFalse(os.path.exists(test_file + ".part"))
+            self.assertFalse(os.path.exists(test_file + ".part.json"))
+            self.assertEqual(len(reports) < 5, ranges) # Half the body in 64kB chunks if resumed
+    def test_download_retry(self):
+        """ Test a download dropped twice is retried, continuing where it stopped."""
+        test_file = os.path.join(self._system.get_temporary_path(), "nusoft.test")
+        url = self._serve(drops=2)
+        policy = nusoft.system.retry_policy.RetryPolicy(retries=2, backoff=0.0, timeout=5.0)
+        self._system.download(url, name=test_file, retries=policy)
+        with open(test_file, "rb") as downloaded:
+            self.assertEqual(downloaded.read(), BODY)
+        os.remove(test_file)
+        url = self._serve(drops=1)
+        self.assertRaises(IOError, self._system.download, url, name=test_file, 
+                          retries=policy.with_retries(0))
+        os.remove(test_file + ".part")
+        os.remove(test_file + ".part.json")
+    def test_download_deadline(self):
+        """ Test a slow download that never stalls is stopped at the deadline."""
+        test_file = os.path.join(self._system.get_temporary_path(), "nusoft.test")
+        cache_path = self._system._download_cache.get_path()
+        system = self._standard(download_cache=cache_path, limit_rate="64k")
+        url = self._serve()
+        policy = nusoft.system.retry_policy.RetryPolicy(retries=2, backoff=0.0, timeout=5.0, 
+                                                        deadline=0.5)
+        start = time.time()
+        self.assertRaises(nusoft.system.retry_policy.DeadlineError, system.download, url, 
+                          name=test_file, retries=policy)
+        self.assertTrue(time.time() - start < 2.0) # The whole download takes over 4s
+        os.remove(test_file + ".part")
+        os.remove(test_file + ".part.json")
+    def test_download_checksum(self):
+        """ Test downloads are checked against their checksum, then cached."""
+        test_file = os.path.join(self._system.get_temporary_path(), "nusoft.test")
+        url = self._serve()
+        self.assertRaises(nusoft.system.downloader.ChecksumError, self._system.download, url, 
+                          name=test_file, retries=0, sha256=hashlib.sha256("other").hexdigest())
+        self.assertFalse(os.path.exists(test_file))
+        self.assertFalse(os.path.exists(test_file + ".part"))
+        self._system.download(url, name=test_file, sha256=hashlib.sha256(BODY).hexdigest())
+        os.remove(test_file)
+        requests = Handler.requests
+        self._system.download(url, name=test_file)
+        self.addCleanup(os.remove, test_file)
+        self.assertEqual(Handler.requests, requests)
+        with open(test_file, "rb") as downloaded:
+            self.assertEqual(downloaded.read(), BODY)
+    def test_download_mirrors(self):
+        """ Test downloads fail over to the next mirror."""
+        test_file = os.path.join(self._system.get_temporary_path(), "nusoft.test")
+        self._system.download(["http://127.0.0.1:1/nusoft.tar.gz", self._serve()], name=test_file,
+                              retries=0)
+        self.addCleanup(os.remove, test_file)
+        with open(test_file, "rb") as downloaded:
+            self.assertEqual(downloaded.read(), BODY)
+    def test_download_segments(self):
+        """ Test large files are downloaded in segments, from several mirrors if the checksum is 
+        known, continuing the segments that fail."""
+        test_file = os.path.join(self._system.get_temporary_path(), "nusoft.test")
+        minimum = nusoft.system.downloader.MIN_SEGMENTED_SIZE
+        nusoft.system.downloader.MIN_SEGMENTED_SIZE = len(BODY) / 2
+        self.addCleanup(setattr, nusoft.system.downloader, "MIN_SEGMENTED_SIZE", minimum)
+        url = self._serve(drops=1)
+        self.assertRaises(IOError, self._system.download, url, name=test_file, retries=0, 
+                          segments=4)
+        self.assertEqual(os.path.getsize(test_file + ".part"), len(BODY)) # Preallocated
+        requests = Handler.requests
+        self._system.download(url, name=test_file, retries=0, segments=4)
+        self.assertEqual(Handler.requests - requests, 2) # Range check and the failed segment
+        with open(test_file, "rb") as downloaded:
+            self.assertEqual(downloaded.read(), BODY)
+        os.remove(test_file)
+        self._system.download([self._serve(), self._serve()], name=test_file, retries=0, 
+                              segments=3, sha256=hashlib.sha256(BODY).hexdigest())
+        self.addCleanup(os.remove, test_file)
+        with open(test_file, "rb") as downloaded:
+            self.assertEqual(downloaded.read(), BODY)
+    def test_download_segments_capped(self):
+        """ Test segments beyond the free connections to a host wait for a segment to finish 
+        rather than for a connection, which would time out."""
+        test_file = os.path.join(self._system.get_temporary_path(), "nusoft.test")
+        minimum = nusoft.system.downloader.MIN_SEGMENTED_SIZE
+        nusoft.system.downloader.MIN_SEGMENTED_SIZE = len(BODY) / 2
+        self.addCleanup(setattr, nusoft.system.downloader, "MIN_SEGMENTED_SIZE", minimum)
+        system = self._standard(download_cache=self._system._download_cache.get_path(), 
+                                connections_per_host=1)
+        policy = nusoft.system.retry_policy.RetryPolicy(retries=0, timeout=0.5)
+        system.download(self._serve(delay=0.2), name=test_file, retries=policy, segments=4)
+        self.addCleanup(os.remove, test_file)
+        with open(test_file, "rb") as downloaded:
+            self.assertEqual(downloaded.read(), BODY)
+    def test_download_keep_alive(self):
+        """ Test downloads from the same server share a connection."""
+        url = self._serve()
+        connections = Handler.connections
+        for index in range(3):
+            test_file = os.path.join(self._system.get_temporary_path(), "nusoft.test%i" % index)
+            self._system.download(url, name=test_file)
+            self.addCleanup(os.remove, test_file)
+            with open(test_file, "rb") as downloaded:
+                self.assertEqual(downloaded.read(), BODY)
+        self.assertEqual(Handler.connections - connections, 1)
+    def test_connections_per_host(self):
+        """ Test requests wait for a connection once a host has the most in use, until their
+        timeout."""
+        pool = nusoft.system.connection_pool.ConnectionPool(max_per_host=1)
+        url = self._serve()
+        first = pool.open(url)
+        self.assertRaises(urllib2.URLError, pool.open, url, timeout=0.1)
+        opened = []
+        thread = threading.Thread(target=lambda: opened.append(pool.open(url)))
+        thread.daemon = True
+        thread.start()
+        thread.join(0.5)
+        self.assertEqual(opened, [])
+        first.read()
+        first.close()
+        thread.join(5.0)
+        self.assertEqual(len(opened), 1)
+        opened[0].close()
     def test_untar(self):
         """ Test the system can untar files.
 
-        Download the a small tar and untar.
+        Build a small pax tar with a global header and a hard link, and untar it stripping the 
+        leading directory.
+        """
+        source_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, source_path)
+        os.makedirs(os.path.join(source_path, "package-1.0", "src"))
+        with open(os.path.join(source_path, "package-1.0", "src", "main.cc"), "w") as source_file:
+            source_file.write("int main() {}\n")
+        os.link(os.path.join(source_path, "package-1.0", "src", "main.cc"), 
+                os.path.join(source_path, "package-1.0", "main.cc"))
+        tar_path = os.path.join(source_path, "package.tar.gz")
+        tar_file = tarfile.open(tar_path, "w:gz", format=tarfile.PAX_FORMAT, 
+                                pax_headers={"comment" : "nusoft"})
+        tar_file.add(os.path.join(source_path, "package-1.0"), "package-1.0")
+        tar_file.close()
+        target_path = os.path.join(source_path, "target")
+        self._system.untar(tar_path, target_path, 1)
+        self.assertEqual(sorted(os.listdir(target_path)), ["main.cc", "src"])
+        with open(os.path.join(target_path, "src", "main.cc"), "r") as source_file:
+            self.assertEqual(source_file.read(), "int main() {}\n")
+        self.assertEqual(os.stat(os.path.join(target_path, "main.cc")).st_ino,
+                         os.stat(os.path.join(target_path, "src", "main.cc")).st_ino)
+        self.assertFalse(os.path.exists(self._system._file_path("tartemp")))
+    def test_untar_stream(self):
+        """ Test tarballs are extracted as they download when streaming, writing nothing to the
+        temporary path, and only to the download cache if there is one.
+
+        Serve a small tar, download and untar it, then serve it with the wrong checksum.
+        """
+        source_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, source_path)
+        tar_path = os.path.join(source_path, "nusoft.test.tar.gz")
+        tar_file = tarfile.open(tar_path, "w:gz")
+        tar_file.add(os.path.abspath(__file__), "package-1.0/test_system.py")
+        tar_file.close()
+        with open(tar_path, "rb") as served_file:
+            body = served_file.read()
+        url = self._serve(body=body)
+        sha256 = hashlib.sha256(body).hexdigest()
+        target_path = os.path.join(source_path, "target")
+        for cache_path in ["", self._system._download_cache.get_path()]:
+            temporary_path = tempfile.mkdtemp(dir=self._path)
+            system = self._standard(download_cache=cache_path, stream=True, 
+                                    temporary_path=temporary_path)
+            system.download(url, name="nusoft.test.tar.gz", sha256=sha256)
+            system.untar("nusoft.test.tar.gz", target_path, 1)
+            with open(os.path.join(target_path, "test_system.py"), "r") as source_file:
+                with open(os.path.abspath(__file__), "r") as original_file:
+                    self.assertEqual(source_file.read(), original_file.read())
+            self.assertEqual(os.listdir(temporary_path), [])
+        self.assertNotEqual(system._download_cache.lookup(url, sha256), None)
+        self.assertEqual([name for name in os.listdir(cache_path) if name.startswith(".")], [])
+        system.download(url, name="nusoft.test.tar.gz", sha256="0" * 64, retries=0)
+        self.assertRaises(nusoft.system.downloader.ChecksumError, system.untar, 
+                          "nusoft.test.tar.gz", target_path, 1)
+        self.assertFalse(os.path.exists(target_path))
+    def test_compilation_tests(self):
+        """ Test batched compilation tests find the failing test.
+
+        Replace the compiler with one that fails if the missing library is linked.
+        """
+        compiles = []
+        def compile(header_sets, flags):
+            compiles.append(flags)
+            return "-lmissing" not in flags
+        self._system._compile = compile
+        tests = [([], ["-l%i" % index]) for index in range(7)] + [([], ["-lmissing"])]
+        self.assertEqual(self._system.compilation_tests(tests), [True] * 7 + [False])
+        self.assertTrue(len(compiles) < len(tests))
+        self.assertFalse(self._system.compilation_test([], ["-lmissing"]))
+        self.assertTrue(len(compiles) < len(tests))
+    def test_compilation_tests_isolated(self):
+        """ Test a header that only compiles after another test's header fails in a batch.
+
+        The second header uses a type the first declares, without including it.
         """
-        
+        if self._system.which("g++") is None:
+            return
+        include_path = tempfile.mkdtemp(dir=self._path)
+        with open(os.path.join(include_path, "declares.hh"), "w") as header_file:
+            header_file.write("struct Declared {};\n")
+        with open(os.path.join(include_path, "uses.hh"), "w") as header_file:
+            header_file.write("inline Declared make() { return Declared(); }\n")
+        flags = ["-I" + include_path, "-Wl,--as-needed"] # The library index is unsure of -Wl
+        self.assertEqual(self._system.compilation_tests([(["declares.hh"], flags), 
+                                                         (["uses.hh"], flags)]), [True, False])
+    def test_make_jobs(self):
+        """ Test make uses the jobserver, or is given the jobs capped by the build, unless the 
+        jobs are already given."""
+        executed = []
+        system = self._standard(jobs=3)
+        self.assertEqual(system.get_jobserver().get_jobs(), 3)
+        system.execute = lambda command, args, cwd, env: executed.append((args, env)) or (True, "")
+        system.make(args=["install"], env={"CC" : "gcc"})
+        system.make(max_jobs=1)
+        system.make(args=["-j2"])
+        env = system.get_jobserver().get_environment({"CC" : "gcc"})
+        self.assertEqual(executed, [(["install"], env), (["-j1"], None), (["-j2"], None)])
+        jobs = self._system.get_make_jobs()
+        self.assertTrue(1 <= jobs <= multiprocessing.cpu_count())
+        self.assertEqual(self._system.get_make_jobs(1), 1)
+    def test_which(self):
+        """ Test the system finds commands where which does."""
+        for command in ["sh", "ls", "nusoft-missing-command"]:
+            result = self._system.execute("which", [command])
+            location = result[1].strip() if result[0] else None
+            self.assertEqual(self._system.which(command), location)
     def test_exists(self):
         """ Test the system believes files exist"""
         self.assertTrue(os.path.exists(__file__) == self._system.exists(__file__))
@@ -33,13 +33,15 @@ class Root(local_package.LocalPackage):
         return ["make", "g++", "gcc", "ld", "python", "x11", "xpm", "xft", "xext", "python-dev"]
     def _download(self):
         """ Download the root tar file."""
-        self._system.download("ftp://root.cern.ch/root/" + self._tar_name)
+        self._system.download(["ftp://root.cern.ch/root/" + self._tar_name,
+                               "https://root.cern.ch/download/" + self._tar_name],
+                              sha256=self._sha256)
     def _install(self):
         """ Untar the tar file and install it to the install path."""
         self._system.untar(self._tar_name, self.get_install_path(), 1)
         args = ['--enable-roofit',  '--enable-python']
         self._system.configure(args=args, cwd=self.get_install_path())
-        self._system.make(cwd=self.get_install_path())
+        self._make(cwd=self.get_install_path())
     def _update(self):
         """ Nothing to do here..."""
         pass
@@ -35,7 +35,8 @@ class Geant4(local_package.LocalPackage):
         return ["make", "g++", "gcc", "cmake-2.8.12.1", "boost_1_56_0"]
     def _download(self):
         """ Download the geant4 tar file."""
-        self._system.download("http://geant4.web.cern.ch/geant4/support/source/" + self._tar_name)
+        self._system.download("http://geant4.web.cern.ch/geant4/support/source/" + self._tar_name,
+                              sha256=self._sha256)
     def _install(self):
         """ Untar the tar file and install it to the install path."""
         self._system.untar(self._tar_name, self._source_path, 1)
@@ -45,8 +46,8 @@ class Geant4(local_package.LocalPackage):
                       "-DGEANT4_INSTALL_DATA=ON", self._source_path]
         cmake = os.path.join(self._dependencies["cmake-2.8.12.1"].get_install_path(), "bin/cmake")
         self._system.configure(cmake, cmake_opts, self.get_install_path())
-        self._system.make(cwd=self.get_install_path())
-        self._system.make(args=['install'], cwd=self.get_install_path())
+        self._make(cwd=self.get_install_path())
+        self._make(args=['install'], cwd=self.get_install_path())
         # Now the python bit
         sys = "linux64"
         if os.uname()[0] == "Darwin":
@@ -57,8 +58,8 @@ class Geant4(local_package.LocalPackage):
                                      "--with-g4install-dir=%s" % self.get_install_path(),
                                      "--prefix=%s" % python_install_path],
                                cwd=os.path.join(self._source_path, "environments/g4py"))
-        self._system.make(cwd=os.path.join(self._source_path, "environments/g4py"))
-        self._system.make(args=['install'], cwd=os.path.join(self._source_path, "environments/g4py"))
+        self._make(cwd=os.path.join(self._source_path, "environments/g4py"))
+        self._make(args=['install'], cwd=os.path.join(self._source_path, "environments/g4py"))
     def _update(self):
         """ Nothing to do here..."""
         pass
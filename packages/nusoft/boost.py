@@ -34,7 +34,10 @@ class Boost(conditional_package.ConditionalPackage):
         return []
     def _download(self):
         """ Download the boost tar file."""
-        self._system.download("http://downloads.sourceforge.net/project/boost/boost/1.56.0/" + self._tar_name)
+        self._system.download(["http://downloads.sourceforge.net/project/boost/boost/1.56.0/" + 
+                               self._tar_name,
+                               "https://archives.boost.io/release/1.56.0/source/" + self._tar_name],
+                              sha256=self._sha256)
     def _install(self):
         """ Untar the tar file to the install path."""
         self._system.untar(self._tar_name, self.get_install_path())
@@ -14,7 +14,9 @@ class Bzip2(conditional_package.ConditionalPackage):
     
     :param _tar_name: name of the tar file to download/install
     :param _version: version of Bzip2 to install.
+    :param _max_jobs: bzip2's makefiles are not written for parallel make, so build in serial
     """
+    _max_jobs = 1
     def __init__(self, system, repository):
         """ Initialise this bzip2 installation package.
 
@@ -34,13 +36,15 @@ class Bzip2(conditional_package.ConditionalPackage):
         return []
     def _download(self):
         """ Download the bzip2 tar file."""
-        self._system.download("http://bzip2.haxx.se/download/" + self._tar_name)
+        self._system.download(["http://bzip2.haxx.se/download/" + self._tar_name,
+                               "https://sourceware.org/pub/bzip2/" + self._tar_name],
+                              sha256=self._sha256)
     def _install(self):
         """ Untar the tar file to the install path."""
         self._system.untar(self._tar_name, self.get_install_path(), 1)
-        self._system.make(args=["-f", "Makefile-libbz2_so"], cwd=self.get_install_path())
-        self._system.make(args=["install", "PREFIX=" + self.get_install_path()], 
-                          cwd=self.get_install_path())
+        self._make(args=["-f", "Makefile-libbz2_so"], cwd=self.get_install_path())
+        self._make(args=["install", "PREFIX=" + self.get_install_path()], 
+                   cwd=self.get_install_path())
     def _update(self):
         """ Nothing to do here..."""
         pass
@@ -56,5 +60,6 @@ class Bzip2(conditional_package.ConditionalPackage):
             and self._system.is_library(os.path.join(self.get_install_path(), "lib/libbz2"))
     
 # The versions of root that can be installed
-versions = [type('bzip2-1.0.6', (Bzip2, object), {"_version" : "bzip2-1.0.6"})]
+versions = [type('bzip2-1.0.6', (Bzip2, object), {"_version" : "bzip2-1.0.6",
+    "_sha256" : "a2848f34fcd5d6cf47def00461fcb528a0484d8edef8208d6d2e2909dc61d9cd"})]
 
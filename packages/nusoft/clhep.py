@@ -33,13 +33,14 @@ class Clhep(local_package.LocalPackage):
         return ["make", "g++", "gcc"]
     def _download(self):
         """ Download the clhep tar file."""
-        self._system.download("http://proj-clhep.web.cern.ch/proj-clhep/DISTRIBUTION/tarFiles/" + self._tar_name)
+        self._system.download("http://proj-clhep.web.cern.ch/proj-clhep/DISTRIBUTION/tarFiles/" + self._tar_name,
+                              sha256=self._sha256)
     def _install(self):
         """ Untar the tar file to the install path."""
         self._system.untar(self._tar_name, self.get_install_path(), 2)
         self._system.configure(args=['--prefix=%s' % self.get_install_path()], cwd=self.get_install_path())
-        self._system.make(cwd=self.get_install_path())
-        self._system.make(args=["install"], cwd=self.get_install_path())
+        self._make(cwd=self.get_install_path())
+        self._make(args=["install"], cwd=self.get_install_path())
     def _update(self):
         """ Nothing to do here..."""
         pass
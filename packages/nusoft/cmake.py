@@ -26,14 +26,15 @@ class Cmake(local_package.LocalPackage):
         self._tar_name = self._version + ".tar.gz"
     def _download(self):
         """ Download the cmake tar file."""
-        self._system.download("http://www.cmake.org/files/v2.8/" + self._tar_name)
+        self._system.download("http://www.cmake.org/files/v2.8/" + self._tar_name,
+                              sha256=self._sha256)
     def _install(self):
         """ Untar the tar file and install it to the install path."""
         self._system.untar(self._tar_name, self.get_install_path(), 1)
         self._system.configure(command="./bootstrap", args=["--prefix=%s" % self.get_install_path()], 
                                cwd=self.get_install_path())
-        self._system.make(cwd=self.get_install_path())
-        self._system.make(args=["install"], cwd=self.get_install_path())
+        self._make(cwd=self.get_install_path())
+        self._make(args=["install"], cwd=self.get_install_path())
     def _update(self):
         """ Nothing to do here..."""
         pass
@@ -35,14 +35,15 @@ class Curl(conditional_package.ConditionalPackage):
         return [["uuid", "ossp-uuid"]]
     def _download(self):
         """ Download the curl tar file."""
-        self._system.download("http://curl.haxx.se/download/" + self._tar_name)
+        self._system.download("http://curl.haxx.se/download/" + self._tar_name,
+                              sha256=self._sha256)
     def _install(self):
         """ Untar the tar file to the install path."""
         self._system.untar(self._tar_name, self._source_path(), 1)
         self._system.configure(args=["--prefix=%s" % self.get_install_path()], 
                                cwd=self._source_path)
-        self._system.make(cwd=self._source_path)
-        self._system.make(args=["install"], cwd=self._source_path)
+        self._make(cwd=self._source_path)
+        self._make(args=["install"], cwd=self._source_path)
     def _update(self):
         """ Nothing to do here..."""
         pass
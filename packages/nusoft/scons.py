@@ -34,7 +34,8 @@ class SCons(local_package.LocalPackage):
     def _download(self):
         """ Download the scons tar file."""
         self._system.download("http://downloads.sourceforge.net/project/scons/scons/" +
-                              self._number + "/" + self._tar_name)
+                              self._number + "/" + self._tar_name,
+                              sha256=self._sha256)
     def _install(self):
         """ Untar the tar file to the install path."""
         self._system.untar(self._tar_name, self.get_install_path(), 1)
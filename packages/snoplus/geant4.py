@@ -35,7 +35,8 @@ class Geant4(local_package.LocalPackage):
         return ["make", "g++", "gcc", "cmake-2.8.12.1"]
     def _download(self):
         """ Download the geant4 tar file."""
-        self._system.download("http://geant4.web.cern.ch/geant4/support/source/" + self._tar_name)
+        self._system.download("http://geant4.web.cern.ch/geant4/support/source/" + self._tar_name,
+                              sha256=self._sha256)
     def _install(self):
         """ Untar the tar file and install it to the install path."""
         self._system.untar(self._tar_name, self._source_path, 1)
@@ -45,8 +46,8 @@ class Geant4(local_package.LocalPackage):
                       "-DGEANT4_INSTALL_DATA=ON", self._source_path]
         cmake = os.path.join(self._dependencies["cmake-2.8.12.1"].get_install_path(), "bin/cmake")
         self._system.configure(cmake, cmake_opts, self.get_install_path())
-        self._system.make(cwd=self.get_install_path())
-        self._system.make(args=['install'], cwd=self.get_install_path())
+        self._make(cwd=self.get_install_path())
+        self._make(args=['install'], cwd=self.get_install_path())
     def _update(self):
         """ Nothing to do here..."""
         pass
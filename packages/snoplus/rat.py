@@ -40,7 +40,7 @@ class RatRelease(local_package.LocalPackage):
     def _download(self):
         """ Download the rat tar file."""
         self._system.download("https://github.com/snoplus/rat/archive/" + self._tar_name, 
-                              authenticate=True)
+                              authenticate=True, sha256=self._sha256)
     def _install(self):
         """ Untar the tar file, write an environment file and install rat."""
         self._system.untar(self._tar_name, self.get_install_path(), 1)